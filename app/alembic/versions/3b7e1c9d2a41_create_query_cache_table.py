@@ -0,0 +1,34 @@
+"""create query cache table
+
+Revision ID: 3b7e1c9d2a41
+Revises: f5d9feeae29f
+Create Date: 2026-10-18 10:12:31.418203
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e1c9d2a41'
+down_revision: Union[str, Sequence[str], None] = 'f5d9feeae29f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE UNLOGGED TABLE query_cache (
+            key TEXT PRIMARY KEY,
+            result BOOLEAN NOT NULL,
+            expires_at TIMESTAMP NOT NULL
+        )
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TABLE query_cache")
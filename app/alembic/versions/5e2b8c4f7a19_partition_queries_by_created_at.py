@@ -0,0 +1,127 @@
+"""partition queries by created_at
+
+Revision ID: 5e2b8c4f7a19
+Revises: c1e5a7f3d820
+Create Date: 2026-10-18 15:40:12.207315
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2b8c4f7a19'
+down_revision: Union[str, Sequence[str], None] = 'c1e5a7f3d820'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Количество месячных секций, создаваемых заранее (дальше их создаёт приложение)
+MONTHS_AHEAD = 3
+
+
+def create_history_indexes() -> None:
+    op.execute("""
+        CREATE INDEX queries_created_at_id_idx
+        ON queries (created_at, id)
+        INCLUDE (cadastral_number, latitude, longitude, result)
+    """)
+    op.execute("""
+        CREATE INDEX queries_cadastral_number_created_at_id_idx
+        ON queries (cadastral_number, created_at, id)
+        INCLUDE (latitude, longitude, result)
+    """)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE queries RENAME TO queries_unpartitioned")
+    op.execute("ALTER TABLE queries_unpartitioned RENAME CONSTRAINT queries_pkey TO queries_unpartitioned_pkey")
+    op.execute("""
+        ALTER TABLE queries_unpartitioned RENAME CONSTRAINT queries_status_check TO queries_unpartitioned_status_check
+    """)
+    # Ключ секционирования обязан входить в первичный ключ
+    op.execute("""
+        CREATE TABLE queries (
+            id INTEGER NOT NULL DEFAULT nextval('queries_id_seq'),
+            cadastral_number TEXT NOT NULL,
+            latitude DOUBLE PRECISION NOT NULL,
+            longitude DOUBLE PRECISION NOT NULL,
+            result BOOLEAN,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            status TEXT NOT NULL DEFAULT 'done',
+            finished_at TIMESTAMP,
+            CONSTRAINT queries_pkey PRIMARY KEY (id, created_at),
+            CONSTRAINT queries_status_check CHECK (status IN ('pending', 'done', 'failed'))
+        ) PARTITION BY RANGE (created_at)
+    """)
+    # Месячные секции от самой старой записи до MONTHS_AHEAD месяцев вперёд
+    op.execute(f"""
+        DO $$
+        DECLARE
+            month DATE;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc('month', COALESCE(MIN(created_at), CURRENT_TIMESTAMP)),
+                    date_trunc('month', CURRENT_TIMESTAMP) + INTERVAL '{MONTHS_AHEAD} months',
+                    INTERVAL '1 month'
+                )::date
+                FROM queries_unpartitioned
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF queries FOR VALUES FROM (%L) TO (%L)',
+                    'queries_' || to_char(month, 'YYYY_MM'),
+                    month,
+                    month + INTERVAL '1 month'
+                );
+            END LOOP;
+        END
+        $$
+    """)
+    # Страховка на случай, если приложение не успело создать секцию заранее
+    op.execute("CREATE TABLE queries_default PARTITION OF queries DEFAULT")
+    op.execute("""
+        INSERT INTO queries (id, cadastral_number, latitude, longitude, result, created_at, status, finished_at)
+        SELECT id, cadastral_number, latitude, longitude, result, created_at, status, finished_at
+        FROM queries_unpartitioned
+    """)
+    op.execute("ALTER SEQUENCE queries_id_seq OWNED BY queries.id")
+    op.execute("DROP TABLE queries_unpartitioned")
+    create_history_indexes()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE queries RENAME TO queries_partitioned")
+    op.execute("ALTER INDEX queries_created_at_id_idx RENAME TO queries_partitioned_created_at_id_idx")
+    op.execute("""
+        ALTER INDEX queries_cadastral_number_created_at_id_idx
+        RENAME TO queries_partitioned_cadastral_number_created_at_id_idx
+    """)
+    op.execute("ALTER TABLE queries_partitioned RENAME CONSTRAINT queries_pkey TO queries_partitioned_pkey")
+    op.execute("""
+        ALTER TABLE queries_partitioned RENAME CONSTRAINT queries_status_check TO queries_partitioned_status_check
+    """)
+    op.execute("""
+        CREATE TABLE queries (
+            id INTEGER PRIMARY KEY DEFAULT nextval('queries_id_seq'),
+            cadastral_number TEXT NOT NULL,
+            latitude DOUBLE PRECISION NOT NULL,
+            longitude DOUBLE PRECISION NOT NULL,
+            result BOOLEAN,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            status TEXT NOT NULL DEFAULT 'done',
+            finished_at TIMESTAMP,
+            CONSTRAINT queries_status_check CHECK (status IN ('pending', 'done', 'failed'))
+        )
+    """)
+    op.execute("""
+        INSERT INTO queries (id, cadastral_number, latitude, longitude, result, created_at, status, finished_at)
+        SELECT id, cadastral_number, latitude, longitude, result, created_at, status, finished_at
+        FROM queries_partitioned
+    """)
+    op.execute("ALTER SEQUENCE queries_id_seq OWNED BY queries.id")
+    op.execute("DROP TABLE queries_partitioned")
+    create_history_indexes()
@@ -0,0 +1,46 @@
+"""add status and finished_at to queries
+
+Revision ID: 8d4f2a6b91c3
+Revises: 3b7e1c9d2a41
+Create Date: 2026-10-18 11:02:47.905114
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4f2a6b91c3'
+down_revision: Union[str, Sequence[str], None] = '3b7e1c9d2a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        ALTER TABLE queries
+            ADD COLUMN status TEXT NOT NULL DEFAULT 'done',
+            ADD COLUMN finished_at TIMESTAMP
+    """)
+    op.execute("""
+        UPDATE queries
+        SET status = CASE WHEN result IS NULL THEN 'failed' ELSE 'done' END,
+            finished_at = created_at
+    """)
+    op.execute("""
+        ALTER TABLE queries
+            ADD CONSTRAINT queries_status_check CHECK (status IN ('pending', 'done', 'failed'))
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        ALTER TABLE queries
+            DROP CONSTRAINT queries_status_check,
+            DROP COLUMN finished_at,
+            DROP COLUMN status
+    """)
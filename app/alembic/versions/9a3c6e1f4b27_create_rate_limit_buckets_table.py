@@ -0,0 +1,67 @@
+"""create rate limit buckets table
+
+Revision ID: 9a3c6e1f4b27
+Revises: 5e2b8c4f7a19
+Create Date: 2026-10-18 17:05:44.381920
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '9a3c6e1f4b27'
+down_revision: Union[str, Sequence[str], None] = '5e2b8c4f7a19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE UNLOGGED TABLE rate_limit_buckets (
+            key TEXT PRIMARY KEY,
+            tokens DOUBLE PRECISION NOT NULL,
+            updated_at TIMESTAMPTZ NOT NULL
+        )
+    """)
+    # Пополняет ведро по прошедшему времени и выдаёт до p_requested целых токенов за один вызов
+    op.execute("""
+        CREATE FUNCTION rate_limit_take(
+            p_key TEXT,
+            p_rate DOUBLE PRECISION,
+            p_burst DOUBLE PRECISION,
+            p_requested INTEGER
+        )
+        RETURNS TABLE (granted INTEGER, available DOUBLE PRECISION)
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            v_now TIMESTAMPTZ := clock_timestamp();
+            v_tokens DOUBLE PRECISION;
+        BEGIN
+            INSERT INTO rate_limit_buckets (key, tokens, updated_at)
+            VALUES (p_key, p_burst, v_now)
+            ON CONFLICT (key) DO NOTHING;
+
+            SELECT LEAST(p_burst, b.tokens + GREATEST(EXTRACT(EPOCH FROM v_now - b.updated_at), 0) * p_rate)
+            INTO v_tokens
+            FROM rate_limit_buckets b
+            WHERE b.key = p_key
+            FOR UPDATE;
+
+            granted := LEAST(p_requested, GREATEST(floor(v_tokens), 0))::INTEGER;
+            available := v_tokens - granted;
+            UPDATE rate_limit_buckets SET tokens = available, updated_at = v_now WHERE key = p_key;
+            RETURN NEXT;
+        END
+        $$
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP FUNCTION rate_limit_take(TEXT, DOUBLE PRECISION, DOUBLE PRECISION, INTEGER)")
+    op.execute("DROP TABLE rate_limit_buckets")
@@ -0,0 +1,50 @@
+"""add spatial index to queries
+
+Revision ID: b7d2e4a19c56
+Revises: 9a3c6e1f4b27
+Create Date: 2026-10-18 18:12:37.604215
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e4a19c56'
+down_revision: Union[str, Sequence[str], None] = '9a3c6e1f4b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def postgis_available() -> bool:
+    return bool(
+        op.get_bind().execute(sa.text("SELECT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'postgis')"))
+        .scalar()
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Индексы на секционированной таблице нельзя создавать CONCURRENTLY; они создаются на каждой секции
+    if postgis_available():
+        op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+        op.execute("""
+            ALTER TABLE queries ADD COLUMN geog geography(Point, 4326)
+            GENERATED ALWAYS AS (ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography) STORED
+        """)
+        op.execute("CREATE INDEX queries_geog_idx ON queries USING GIST (geog)")
+    else:
+        # Без PostGIS точки хранятся в индексе как трёхмерные координаты на сфере (cube),
+        # а оператор `<->` позволяет искать ближайшие точки по индексу
+        op.execute("CREATE EXTENSION IF NOT EXISTS cube")
+        op.execute("CREATE EXTENSION IF NOT EXISTS earthdistance")
+        op.execute("CREATE INDEX queries_earth_idx ON queries USING GIST (ll_to_earth(latitude, longitude))")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS queries_earth_idx")
+    op.execute("DROP INDEX IF EXISTS queries_geog_idx")
+    op.execute("ALTER TABLE queries DROP COLUMN IF EXISTS geog")
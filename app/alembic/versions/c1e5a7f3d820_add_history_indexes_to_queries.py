@@ -0,0 +1,45 @@
+"""add history indexes to queries
+
+Revision ID: c1e5a7f3d820
+Revises: 8d4f2a6b91c3
+Create Date: 2026-10-18 12:21:09.533671
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1e5a7f3d820'
+down_revision: Union[str, Sequence[str], None] = '8d4f2a6b91c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("UPDATE queries SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
+    op.execute("ALTER TABLE queries ALTER COLUMN created_at SET NOT NULL")
+    # Индексы покрывают все сочетания фильтра и сортировки `GET /history`
+    # и позволяют отвечать index-only scan без обращения к heap.
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS queries_created_at_id_idx
+            ON queries (created_at, id)
+            INCLUDE (cadastral_number, latitude, longitude, result)
+        """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS queries_cadastral_number_created_at_id_idx
+            ON queries (cadastral_number, created_at, id)
+            INCLUDE (latitude, longitude, result)
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS queries_cadastral_number_created_at_id_idx")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS queries_created_at_id_idx")
+    op.execute("ALTER TABLE queries ALTER COLUMN created_at DROP NOT NULL")
@@ -0,0 +1,90 @@
+"""create cadastral_latest table
+
+Revision ID: e4c8a2f6d913
+Revises: b7d2e4a19c56
+Create Date: 2026-10-18 21:05:48.318402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4c8a2f6d913'
+down_revision: Union[str, Sequence[str], None] = 'b7d2e4a19c56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE TABLE cadastral_latest (
+            cadastral_number TEXT PRIMARY KEY,
+            latitude DOUBLE PRECISION NOT NULL,
+            longitude DOUBLE PRECISION NOT NULL,
+            result BOOLEAN NOT NULL,
+            updated_at TIMESTAMP NOT NULL,
+            hit_count BIGINT NOT NULL DEFAULT 1
+        )
+    """)
+    # Таблицу обновляет триггер, поэтому её учитывают все пути записи истории: INSERT, COPY и
+    # завершение фоновых запросов. Более старая запись (например, из отложенного буфера) только
+    # увеличивает счётчик и не затирает последний результат
+    op.execute("""
+        CREATE FUNCTION cadastral_latest_upsert() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO cadastral_latest AS latest (cadastral_number, latitude, longitude, result, updated_at)
+            VALUES (
+                NEW.cadastral_number, NEW.latitude, NEW.longitude, NEW.result, COALESCE(NEW.finished_at, NEW.created_at)
+            )
+            ON CONFLICT (cadastral_number) DO UPDATE SET
+                latitude = CASE WHEN EXCLUDED.updated_at >= latest.updated_at
+                    THEN EXCLUDED.latitude ELSE latest.latitude END,
+                longitude = CASE WHEN EXCLUDED.updated_at >= latest.updated_at
+                    THEN EXCLUDED.longitude ELSE latest.longitude END,
+                result = CASE WHEN EXCLUDED.updated_at >= latest.updated_at
+                    THEN EXCLUDED.result ELSE latest.result END,
+                updated_at = GREATEST(EXCLUDED.updated_at, latest.updated_at),
+                hit_count = latest.hit_count + 1;
+            RETURN NULL;
+        END
+        $$
+    """)
+    # Триггеры секционированной таблицы наследуют все её секции, в том числе создаваемые позже
+    op.execute("""
+        CREATE TRIGGER queries_cadastral_latest_insert
+        AFTER INSERT ON queries
+        FOR EACH ROW
+        WHEN (NEW.status = 'done' AND NEW.result IS NOT NULL)
+        EXECUTE FUNCTION cadastral_latest_upsert()
+    """)
+    op.execute("""
+        CREATE TRIGGER queries_cadastral_latest_update
+        AFTER UPDATE OF status ON queries
+        FOR EACH ROW
+        WHEN (NEW.status = 'done' AND NEW.result IS NOT NULL AND OLD.status IS DISTINCT FROM 'done')
+        EXECUTE FUNCTION cadastral_latest_upsert()
+    """)
+    op.execute("""
+        INSERT INTO cadastral_latest (cadastral_number, latitude, longitude, result, updated_at, hit_count)
+        SELECT DISTINCT ON (cadastral_number)
+            cadastral_number,
+            latitude,
+            longitude,
+            result,
+            COALESCE(finished_at, created_at),
+            COUNT(*) OVER (PARTITION BY cadastral_number)
+        FROM queries
+        WHERE status = 'done' AND result IS NOT NULL
+        ORDER BY cadastral_number, COALESCE(finished_at, created_at) DESC, id DESC
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS queries_cadastral_latest_update ON queries")
+    op.execute("DROP TRIGGER IF EXISTS queries_cadastral_latest_insert ON queries")
+    op.execute("DROP FUNCTION IF EXISTS cadastral_latest_upsert()")
+    op.execute("DROP TABLE IF EXISTS cadastral_latest")
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+
+from api.schemas import QueryRequestAddDTO
+from api.validators import CadastralValidator
+from core.cache import CacheStats, TTLCache
+from core.config import settings
+from core.database import Database, db
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(request: QueryRequestAddDTO, precision: int = settings.RESULT_CACHE_COORD_PRECISION) -> str:
+    """Строит ключ кэша по кадастровому номеру и округлённым координатам.
+
+    Args:
+        request: DTO с кадастровым номером и координатами.
+        precision: Количество знаков после запятой при округлении координат.
+
+    Returns:
+        Строковый ключ вида `<номер>:<широта>:<долгота>`.
+    """
+    cadastral_number = CadastralValidator.normalize(request.cadastral_number)
+    return f"{cadastral_number}:{request.latitude:.{precision}f}:{request.longitude:.{precision}f}"
+
+
+class ResultCache(ABC):
+    """Базовый класс кэша результатов внешнего сервиса."""
+
+    def __init__(self) -> None:
+        self.stats = CacheStats()
+
+    @abstractmethod
+    async def get(self, key: str) -> bool | None:
+        """Возвращает закэшированный результат или None при промахе."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bool) -> None:
+        """Сохраняет результат в кэше."""
+
+    async def start(self) -> None:
+        """Запускает фоновое обслуживание кэша, если оно нужно."""
+
+    async def stop(self) -> None:
+        """Останавливает фоновое обслуживание кэша."""
+
+
+class InMemoryResultCache(ResultCache):
+    """Кэш результатов в памяти процесса (LRU с TTL)."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        """Инициализирует кэш.
+
+        Args:
+            maxsize: Максимальное количество записей.
+            ttl: Время жизни записи в секундах.
+        """
+        self._cache: TTLCache[str, bool] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.stats = self._cache.stats
+
+    async def get(self, key: str) -> bool | None:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bool) -> None:
+        self._cache.set(key, value)
+
+
+class PostgresResultCache(ResultCache):
+    """Общий для всех воркеров кэш результатов в таблице `query_cache`.
+
+    Ошибки базы данных не прерывают обработку запроса: чтение считается промахом,
+    а запись пропускается. Просроченные записи удаляются в фоне каждые `purge_interval` секунд,
+    иначе таблица росла бы с каждой новой парой номера и координат.
+    """
+
+    def __init__(self, database: Database, ttl: float, purge_interval: float = 300.0) -> None:
+        """Инициализирует кэш.
+
+        Args:
+            database: Экземпляр подключения к базе данных.
+            ttl: Время жизни записи в секундах.
+            purge_interval: Период удаления просроченных записей в секундах (0 — не удалять).
+        """
+        super().__init__()
+        self.db = database
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._task: asyncio.Task | None = None
+
+    async def get(self, key: str) -> bool | None:
+        try:
+            row = await self.db.fetchrow(
+                "SELECT result, expires_at > now() AS fresh FROM query_cache WHERE key = $1",
+                key,
+                read_only=True,
+            )
+        except Exception:
+            logger.exception("Failed to read result cache")
+            row = None
+        if row is None or not row["fresh"]:
+            if row is not None:
+                self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return row["result"]
+
+    async def set(self, key: str, value: bool) -> None:
+        try:
+            await self.db.execute(
+                """
+                INSERT INTO query_cache (key, result, expires_at)
+                VALUES ($1, $2, now() + make_interval(secs => $3))
+                ON CONFLICT (key) DO UPDATE SET result = EXCLUDED.result, expires_at = EXCLUDED.expires_at
+                """,
+                key,
+                value,
+                self.ttl,
+                track=False,
+            )
+        except Exception:
+            logger.exception("Failed to write result cache")
+
+    async def purge_expired(self) -> int:
+        """Удаляет просроченные записи.
+
+        Returns:
+            Количество удалённых записей.
+        """
+        status = await self.db.execute("DELETE FROM query_cache WHERE expires_at <= now()", track=False)
+        return int(status.split()[-1])
+
+    async def start(self) -> None:
+        """Запускает периодическое удаление просроченных записей."""
+        if self.purge_interval <= 0 or self._task is not None:
+            return
+
+        async def run() -> None:
+            while True:
+                await asyncio.sleep(self.purge_interval)
+                try:
+                    purged = await self.purge_expired()
+                    if purged:
+                        logger.info("Purged %s expired result cache entries", purged)
+                except Exception:
+                    logger.exception("Failed to purge result cache")
+
+        self._task = asyncio.create_task(run())
+
+    async def stop(self) -> None:
+        """Останавливает удаление просроченных записей."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+def build_result_cache(backend: str) -> ResultCache | None:
+    """Создаёт кэш результатов по названию бэкенда из настроек.
+
+    Args:
+        backend: `memory`, `postgres` или `none`.
+
+    Returns:
+        Экземпляр кэша или None, если кэширование отключено.
+    """
+    if backend == "memory":
+        return InMemoryResultCache(maxsize=settings.RESULT_CACHE_MAXSIZE, ttl=settings.RESULT_CACHE_TTL)
+    if backend == "postgres":
+        return PostgresResultCache(
+            db, ttl=settings.RESULT_CACHE_TTL, purge_interval=settings.RESULT_CACHE_PURGE_INTERVAL
+        )
+    return None
+
+
+result_cache = build_result_cache(settings.RESULT_CACHE_BACKEND)
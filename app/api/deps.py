@@ -0,0 +1,97 @@
+from typing import Annotated, Awaitable, Callable
+
+from fastapi import Depends, HTTPException, Response, status
+
+from api.cache import ResultCache, result_cache
+from api.writer import QueryWriteBuffer, query_writer
+from auth.deps import ActiveAuthUser
+from core.config import settings
+from core.database import db
+from core.rate_limit import InMemoryKeyedRateLimiter, KeyedRateLimiter, PostgresKeyedRateLimiter, RateLimitPolicy
+
+
+def get_result_cache() -> ResultCache | None:
+    """Возвращает кэш результатов внешнего сервиса.
+
+    Returns:
+        Экземпляр кэша или None, если кэширование отключено.
+    """
+    return result_cache
+
+
+ResultCacheDep = Annotated[ResultCache | None, Depends(get_result_cache)]
+
+
+def get_query_writer() -> QueryWriteBuffer | None:
+    """Возвращает буфер отложенной записи истории запросов.
+
+    Returns:
+        Запущенный буфер или None, если запросы записываются в БД сразу.
+    """
+    return query_writer if query_writer.running else None
+
+
+QueryWriterDep = Annotated[QueryWriteBuffer | None, Depends(get_query_writer)]
+
+
+def build_api_rate_limiter(backend: str) -> KeyedRateLimiter:
+    """Создаёт хранилище лимитов запросов пользователей по названию бэкенда из настроек.
+
+    Args:
+        backend: `memory` или `postgres`.
+
+    Returns:
+        Экземпляр хранилища лимитов.
+    """
+    if backend == "postgres":
+        return PostgresKeyedRateLimiter(
+            db, lease=settings.API_RATE_LIMIT_LEASE, maxsize=settings.API_RATE_LIMIT_MAXSIZE
+        )
+    return InMemoryKeyedRateLimiter(maxsize=settings.API_RATE_LIMIT_MAXSIZE)
+
+
+api_rate_limiter = build_api_rate_limiter(settings.API_RATE_LIMIT_BACKEND)
+api_rate_limits = {route: RateLimitPolicy.parse(value) for route, value in settings.API_RATE_LIMITS.items()}
+
+
+def get_api_rate_limiter() -> KeyedRateLimiter:
+    """Возвращает хранилище лимитов запросов пользователей.
+
+    Returns:
+        Экземпляр хранилища лимитов.
+    """
+    return api_rate_limiter
+
+
+def user_rate_limit(route: str) -> Callable[..., Awaitable[None]]:
+    """Создаёт зависимость, ограничивающую частоту запросов пользователя к маршруту.
+
+    Лимит берётся из `API_RATE_LIMITS[route]`; если он не задан, запросы не ограничиваются.
+    Заголовки `RateLimit-*` добавляются к ответу (кроме ответов, которые маршрут
+    возвращает напрямую, например потоковых) и к ошибке `429 Too Many Requests`.
+
+    Args:
+        route: Название маршрута в настройках.
+
+    Returns:
+        Зависимость FastAPI.
+    """
+
+    async def check_rate_limit(
+        user: ActiveAuthUser,
+        response: Response,
+        limiter: Annotated[KeyedRateLimiter, Depends(get_api_rate_limiter)],
+    ) -> None:
+        policy = api_rate_limits.get(route)
+        if policy is None:
+            return
+        decision = await limiter.hit(f"{route}:{user.id}", policy)
+        if not decision.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers=decision.headers(),
+            )
+        response.headers.update(decision.headers())
+
+    return check_rate_limit
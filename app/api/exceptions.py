@@ -5,3 +5,29 @@ class ExternalServiceUnavailable(Exception):
     """
 
     pass
+
+
+class ExternalCircuitOpen(ExternalServiceUnavailable):
+    """
+    Исключение, которое выбрасывается без обращения к внешнему сервису, пока автоматический выключатель разомкнут.
+    Такие ошибки не повторяются.
+    """
+
+    pass
+
+
+class ExternalRateLimited(ExternalServiceUnavailable):
+    """
+    Исключение, которое выбрасывается, если обращение к внешнему сервису не уложилось
+    в ограничение частоты или количества одновременных вызовов. Такие ошибки не повторяются.
+    """
+
+    pass
+
+
+class JobQueueFull(Exception):
+    """
+    Исключение, которое выбрасывается, если очередь фоновых запросов переполнена или не запущена.
+    """
+
+    pass
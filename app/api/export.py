@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+import zlib
+from typing import Any, AsyncIterator, Iterable, Mapping
+
+from api.schemas import ExportFormat
+from core.database import Database
+
+EXPORT_COLUMNS = ("id", "cadastral_number", "latitude", "longitude", "result", "created_at")
+
+
+def rows_to_ndjson(rows: Iterable[Mapping]) -> str:
+    """Сериализует строки истории в NDJSON.
+
+    Args:
+        rows: Строки таблицы `queries`.
+
+    Returns:
+        Строки JSON, по одной на запись, каждая с переводом строки.
+    """
+    return "".join(
+        json.dumps({column: row[column] for column in EXPORT_COLUMNS}, default=str, ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def rows_to_csv(rows: Iterable[Mapping], header: bool = False) -> str:
+    """Сериализует строки истории в CSV.
+
+    Args:
+        rows: Строки таблицы `queries`.
+        header: Добавить ли строку с названиями колонок.
+
+    Returns:
+        Фрагмент CSV-файла.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows([row[column] for column in EXPORT_COLUMNS] for row in rows)
+    return buffer.getvalue()
+
+
+async def iter_export(
+    db: Database,
+    query: str,
+    params: list[Any],
+    export_format: ExportFormat,
+    chunk_size: int,
+) -> AsyncIterator[str]:
+    """Выгружает результат SQL-запроса порциями в формате NDJSON или CSV.
+
+    Args:
+        db: Экземпляр подключения к базе данных.
+        query: SQL-запрос, возвращающий колонки `EXPORT_COLUMNS`.
+        params: Параметры для запроса.
+        export_format: Формат выгрузки.
+        chunk_size: Количество строк, читаемых из курсора за раз.
+
+    Yields:
+        Текстовые фрагменты выгрузки.
+    """
+    if export_format == ExportFormat.csv:
+        yield rows_to_csv([], header=True)
+    async for rows in db.iterate(query, *params, chunk_size=chunk_size, read_only=True):
+        yield rows_to_ndjson(rows) if export_format == ExportFormat.ndjson else rows_to_csv(rows)
+
+
+async def gzip_stream(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """Сжимает поток текстовых фрагментов в формат gzip на лету.
+
+    Args:
+        chunks: Текстовые фрагменты.
+
+    Yields:
+        Сжатые фрагменты; последний фрагмент завершает gzip-поток.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
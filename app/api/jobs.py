@@ -0,0 +1,131 @@
+import asyncio
+import logging
+
+from api.cache import ResultCache
+from api.exceptions import ExternalServiceUnavailable, JobQueueFull
+from api.schemas import QueryRequestAddDTO, QueryStatus
+from api.services import get_external_result
+from api.utils import finish_query_job
+from core.database import Database
+from core.http_client import HttpClient
+
+logger = logging.getLogger(__name__)
+
+
+class QueryJobQueue:
+    """Очередь фоновых запросов к внешнему сервису с пулом воркеров.
+
+    Запрос заранее сохраняется в БД в статусе `pending`; воркер получает результат
+    и дописывает его в ту же запись.
+    """
+
+    def __init__(self) -> None:
+        """Инициализирует неактивную очередь."""
+        self._queue: asyncio.Queue[tuple[int, QueryRequestAddDTO]] | None = None
+        self._workers: list[asyncio.Task] = []
+        self._events: dict[int, asyncio.Event] = {}
+        self._pending: set[int] = set()
+        self._db: Database | None = None
+        self._http_client: HttpClient | None = None
+        self._cache: ResultCache | None = None
+
+    async def start(
+        self,
+        db: Database,
+        http_client: HttpClient,
+        cache: ResultCache | None,
+        workers: int,
+        maxsize: int,
+    ) -> None:
+        """Запускает воркеры.
+
+        Args:
+            db: Экземпляр подключения к базе данных.
+            http_client: Общий HTTP-клиент внешнего сервиса.
+            cache: Кэш результатов (None, если кэширование отключено).
+            workers: Количество воркеров.
+            maxsize: Максимальное количество ожидающих задач.
+        """
+        self._db, self._http_client, self._cache = db, http_client, cache
+        self._queue = asyncio.Queue(maxsize=maxsize)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(workers)]
+
+    async def stop(self) -> None:
+        """Останавливает воркеры; незавершённые задачи помечаются как `failed`."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._pending and self._db is not None:
+            await self._db.execute(
+                "UPDATE queries SET status = $2, finished_at = CURRENT_TIMESTAMP WHERE id = ANY($1) AND status = $3",
+                list(self._pending),
+                QueryStatus.failed.value,
+                QueryStatus.pending.value,
+                track=False,
+            )
+        for event in self._events.values():
+            event.set()
+        self._events.clear()
+        self._pending.clear()
+        self._queue = None
+
+    def submit(self, query_id: int, request: QueryRequestAddDTO) -> None:
+        """Ставит сохранённый запрос в очередь на выполнение.
+
+        Args:
+            query_id: Идентификатор записи в таблице `queries`.
+            request: DTO с кадастровым номером и координатами.
+
+        Raises:
+            JobQueueFull: Если очередь не запущена или переполнена.
+        """
+        if self._queue is None:
+            raise JobQueueFull("Background query queue is not running")
+        try:
+            self._queue.put_nowait((query_id, request))
+        except asyncio.QueueFull:
+            raise JobQueueFull("Background query queue is full")
+        self._events[query_id] = asyncio.Event()
+        self._pending.add(query_id)
+
+    async def wait(self, query_id: int, timeout: float) -> None:
+        """Ожидает завершения задачи этого процесса не дольше `timeout` секунд.
+
+        Если задача выполняется в другом процессе, просто ждёт `timeout` секунд.
+
+        Args:
+            query_id: Идентификатор записи.
+            timeout: Максимальное время ожидания в секундах.
+        """
+        event = self._events.get(query_id)
+        if event is None:
+            await asyncio.sleep(timeout)
+            return
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _worker(self) -> None:
+        """Выполняет задачи из очереди до отмены."""
+        assert self._queue is not None and self._db is not None and self._http_client is not None
+        while True:
+            query_id, request = await self._queue.get()
+            try:
+                try:
+                    result = await get_external_result(request, self._http_client, self._cache)
+                except ExternalServiceUnavailable:
+                    result = None
+                await finish_query_job(self._db, query_id, result, track=False)
+                self._pending.discard(query_id)
+            except Exception:
+                logger.exception("Background query %s failed", query_id)
+            finally:
+                self._queue.task_done()
+                event = self._events.pop(query_id, None)
+                if event is not None:
+                    event.set()
+
+
+query_jobs = QueryJobQueue()
@@ -0,0 +1,112 @@
+import base64
+import hashlib
+import json
+from datetime import datetime
+from typing import Any
+
+
+def cursor_scope(*params: Any) -> str:
+    """Возвращает отпечаток параметров запроса, к которым привязан курсор.
+
+    Курсор задаёт позицию только в пределах той же сортировки и тех же фильтров:
+    с другими параметрами он указывал бы на чужую последовательность строк.
+
+    Args:
+        *params: Параметры запроса, определяющие порядок и состав строк (None — параметр не задан).
+
+    Returns:
+        Короткая шестнадцатеричная строка.
+    """
+    raw = json.dumps(
+        [param.isoformat() if isinstance(param, datetime) else param for param in params],
+        separators=(",", ":"),
+    )
+    return hashlib.blake2b(raw.encode(), digest_size=8).hexdigest()
+
+
+def _encode(position: list[Any], scope: str) -> str:
+    raw = json.dumps([*position, scope], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode(cursor: str, scope: str) -> list[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        *position, bound_scope = json.loads(raw)
+    except (TypeError, ValueError) as exc_info:
+        raise ValueError("Invalid cursor") from exc_info
+    if not position or not isinstance(bound_scope, str):
+        raise ValueError("Invalid cursor")
+    if bound_scope != scope:
+        raise ValueError("Cursor does not match the query parameters")
+    return position
+
+
+def encode_cursor(created_at: datetime, row_id: int, scope: str) -> str:
+    """Кодирует позицию последней строки страницы в непрозрачный курсор.
+
+    Args:
+        created_at: Дата создания последней строки.
+        row_id: Идентификатор последней строки.
+        scope: Отпечаток параметров запроса от `cursor_scope`.
+
+    Returns:
+        Курсор в виде base64url-строки.
+    """
+    return _encode([created_at.isoformat(), row_id], scope)
+
+
+def decode_cursor(cursor: str, scope: str) -> tuple[datetime, int]:
+    """Декодирует курсор, полученный от `encode_cursor`.
+
+    Args:
+        cursor: Курсор в виде base64url-строки.
+        scope: Отпечаток параметров текущего запроса от `cursor_scope`.
+
+    Returns:
+        Кортеж (дата создания, идентификатор) последней строки предыдущей страницы.
+
+    Raises:
+        ValueError: Если курсор повреждён или выдан для других параметров запроса.
+    """
+    position = _decode(cursor, scope)
+    try:
+        created_at, row_id = position
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError) as exc_info:
+        raise ValueError("Invalid cursor") from exc_info
+
+
+def encode_distance_cursor(distance: float, row_id: int, scope: str) -> str:
+    """Кодирует позицию последней строки страницы поиска по расстоянию.
+
+    Args:
+        distance: Расстояние до последней строки в метрах.
+        row_id: Идентификатор последней строки.
+        scope: Отпечаток точки и радиуса поиска от `cursor_scope`.
+
+    Returns:
+        Курсор в виде base64url-строки.
+    """
+    return _encode([distance, row_id], scope)
+
+
+def decode_distance_cursor(cursor: str, scope: str) -> tuple[float, int]:
+    """Декодирует курсор, полученный от `encode_distance_cursor`.
+
+    Args:
+        cursor: Курсор в виде base64url-строки.
+        scope: Отпечаток точки и радиуса текущего запроса от `cursor_scope`.
+
+    Returns:
+        Кортеж (расстояние, идентификатор) последней строки предыдущей страницы.
+
+    Raises:
+        ValueError: Если курсор повреждён или выдан для других параметров запроса.
+    """
+    position = _decode(cursor, scope)
+    try:
+        distance, row_id = position
+        return float(distance), int(row_id)
+    except (TypeError, ValueError) as exc_info:
+        raise ValueError("Invalid cursor") from exc_info
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import Literal
+
+from core.database import Database
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME_RE = re.compile(r"^queries_(\d{4})_(\d{2})$")
+
+# Ключ advisory-блокировки, чтобы обслуживание секций не выполнялось в нескольких процессах одновременно
+MAINTENANCE_LOCK_KEY = 7_301_014
+
+RetentionMode = Literal["drop", "archive"]
+
+
+def add_months(month: date, months: int) -> date:
+    """Сдвигает первое число месяца на `months` месяцев.
+
+    Args:
+        month: Дата (используются только год и месяц).
+        months: Количество месяцев (может быть отрицательным).
+
+    Returns:
+        Первое число полученного месяца.
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Возвращает название месячной секции таблицы `queries`.
+
+    Args:
+        month: Дата внутри месяца.
+
+    Returns:
+        Название вида `queries_2026_10`.
+    """
+    return f"queries_{month:%Y_%m}"
+
+
+def partition_month(name: str) -> date | None:
+    """Определяет месяц по названию секции.
+
+    Args:
+        name: Название секции.
+
+    Returns:
+        Первое число месяца или None, если это не месячная секция (например, `queries_default`).
+    """
+    match = PARTITION_NAME_RE.match(name)
+    if match is None:
+        return None
+    return date(int(match[1]), int(match[2]), 1)
+
+
+def maintenance_script(
+    partitions: list[str],
+    today: date,
+    months_ahead: int,
+    retention_months: int,
+    retention_mode: RetentionMode,
+    archive_schema: str,
+) -> list[str]:
+    """Строит SQL-команды обслуживания секций.
+
+    Создаёт секции с текущего месяца на `months_ahead` месяцев вперёд и отсоединяет секции,
+    которые целиком старше `retention_months` месяцев: удаляет их или переносит в `archive_schema`.
+
+    Args:
+        partitions: Названия существующих секций.
+        today: Текущая дата.
+        months_ahead: Количество месяцев, для которых секции создаются заранее.
+        retention_months: Срок хранения в месяцах (0 — хранить всё).
+        retention_mode: `drop` — удалять старые секции, `archive` — переносить в архивную схему.
+        archive_schema: Схема для архивных секций.
+
+    Returns:
+        Список SQL-команд.
+    """
+    current = today.replace(day=1)
+    existing = set(partitions)
+    commands = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(month)
+        if name not in existing:
+            commands.append(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF queries "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            )
+
+    if retention_months <= 0:
+        return commands
+    cutoff = add_months(current, -retention_months)
+    expired = sorted(name for name in partitions if (month := partition_month(name)) is not None and month < cutoff)
+    if expired and retention_mode == "archive":
+        commands.append(f'CREATE SCHEMA IF NOT EXISTS "{archive_schema}"')
+    for name in expired:
+        commands.append(f"ALTER TABLE queries DETACH PARTITION {name}")
+        if retention_mode == "archive":
+            commands.append(f'ALTER TABLE {name} SET SCHEMA "{archive_schema}"')
+        else:
+            commands.append(f"DROP TABLE {name}")
+    return commands
+
+
+async def maintain_partitions(
+    db: Database,
+    months_ahead: int,
+    retention_months: int,
+    retention_mode: RetentionMode,
+    archive_schema: str,
+    today: date | None = None,
+) -> list[str]:
+    """Создаёт будущие секции таблицы `queries` и применяет политику хранения.
+
+    Команды выполняются одной транзакцией под advisory-блокировкой.
+
+    Args:
+        db: Экземпляр подключения к базе данных.
+        months_ahead: Количество месяцев, для которых секции создаются заранее.
+        retention_months: Срок хранения в месяцах (0 — хранить всё).
+        retention_mode: `drop` или `archive`.
+        archive_schema: Схема для архивных секций.
+        today: Текущая дата (по умолчанию — сегодня по UTC).
+
+    Returns:
+        Выполненные SQL-команды.
+    """
+    rows = await db.fetch(
+        """
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'queries'::regclass
+        """,
+        track=False,
+    )
+    commands = maintenance_script(
+        partitions=[row["relname"] for row in rows],
+        today=today or datetime.now(timezone.utc).date(),
+        months_ahead=months_ahead,
+        retention_months=retention_months,
+        retention_mode=retention_mode,
+        archive_schema=archive_schema,
+    )
+    if commands:
+        # Несколько команд в одном вызове без параметров выполняются одной неявной транзакцией
+        await db.execute(
+            ";\n".join([f"SELECT pg_advisory_xact_lock({MAINTENANCE_LOCK_KEY})", *commands]),
+            track=False,
+        )
+    return commands
+
+
+class PartitionMaintenance:
+    """Периодическое обслуживание секций таблицы `queries` в фоне."""
+
+    def __init__(self) -> None:
+        """Инициализирует неактивную задачу."""
+        self._task: asyncio.Task | None = None
+
+    async def start(
+        self,
+        db: Database,
+        interval: float,
+        months_ahead: int,
+        retention_months: int,
+        retention_mode: RetentionMode,
+        archive_schema: str,
+    ) -> None:
+        """Запускает обслуживание секций каждые `interval` секунд.
+
+        Args:
+            db: Экземпляр подключения к базе данных.
+            interval: Период обслуживания в секундах.
+            months_ahead: Количество месяцев, для которых секции создаются заранее.
+            retention_months: Срок хранения в месяцах (0 — хранить всё).
+            retention_mode: `drop` или `archive`.
+            archive_schema: Схема для архивных секций.
+        """
+
+        async def run() -> None:
+            while True:
+                try:
+                    commands = await maintain_partitions(
+                        db, months_ahead, retention_months, retention_mode, archive_schema
+                    )
+                    for command in commands:
+                        logger.info("Partition maintenance: %s", command)
+                except Exception:
+                    logger.exception("Partition maintenance failed")
+                await asyncio.sleep(interval)
+
+        self._task = asyncio.create_task(run())
+
+    async def stop(self) -> None:
+        """Останавливает обслуживание секций."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+partition_maintenance = PartitionMaintenance()
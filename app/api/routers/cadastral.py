@@ -0,0 +1,42 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Path, status
+
+from api.deps import user_rate_limit
+from api.schemas import CadastralLatestDTO
+from api.utils import get_latest_result
+from api.validators import CadastralValidator
+from auth.deps import ActiveAuthUser
+from core.deps import DbInstanceDep
+
+router = APIRouter(tags=["Cadastral Numbers"])
+
+
+@router.get(
+    "/cadastral/{cadastral_number}",
+    dependencies=[Depends(user_rate_limit("cadastral"))],
+    response_model=CadastralLatestDTO,
+    summary="Получить последний результат по кадастровому номеру",
+    description=(
+        "Возвращает последний известный результат проверки кадастрового номера, координаты, "
+        "для которых он получен, время получения и количество успешных запросов по номеру.\n\n"
+        "- Данные берутся из таблицы `cadastral_latest`, которая обновляется при каждой записи истории, "
+        "поэтому поиск не просматривает историю запросов.\n"
+        "- Если номер некорректен, возвращается ошибка `422 Unprocessable Entity`.\n"
+        "- Если результатов по номеру ещё нет, возвращается ошибка `404 Not Found`."
+    ),
+)
+async def get_cadastral_latest(
+    db: DbInstanceDep,
+    user: ActiveAuthUser,
+    cadastral_number: Annotated[str, Path(..., json_schema_extra={"example": "77:01:0004012:2041"})],
+) -> CadastralLatestDTO:
+    parsed = CadastralValidator.parse(cadastral_number)
+    if parsed is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Incorrect cadastral number format"
+        )
+    row = await get_latest_result(db, str(parsed))
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cadastral number not found")
+    return CadastralLatestDTO(**dict(row))
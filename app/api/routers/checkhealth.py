@@ -1,26 +1,96 @@
+from typing import Any
+
 from fastapi import APIRouter, HTTPException, status
 
-from core.deps import DbInstanceDep
+from api.deps import QueryWriterDep, ResultCacheDep
+from api.services import (
+    external_breaker,
+    external_calls,
+    external_latency,
+    external_limiter,
+    external_stats,
+    external_timeout,
+)
+from auth.cache import token_cache, user_cache
+from core.deps import DbInstanceDep, HttpClientDep
 
 router = APIRouter(tags=["Service Health"])
 
 
 @router.get(
     "/ping",
-    response_model=dict[str, bool],
+    response_model=dict[str, Any],
     summary="Проверка запуска сервера",
     description=(
         "Проверяет, запущен ли сервер и установлено ли соединение с базой данных.\n\n"
-        "Возвращает `db_alive: true`, если соединение успешно.\n\n"
+        "Возвращает `db_alive: true`, если соединение успешно, и состояние автоматического "
+        "выключателя внешнего сервиса `external_circuit` (`closed`, `open`, `half_open` "
+        "или `null`, если выключатель отключён).\n\n"
         "Если база данных недоступна, возвращается ошибка `503 Service Unavailable`."
     ),
 )
-async def ping(db: DbInstanceDep) -> dict[str, bool]:
+async def ping(db: DbInstanceDep) -> dict[str, Any]:
     try:
         row = await db.fetchrow("SELECT 1;")
-        return {"db_alive": row is not None and row[0] == 1}
+        return {
+            "db_alive": row is not None and row[0] == 1,
+            "external_circuit": external_breaker.state.value if external_breaker else None,
+        }
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Database connection unavailable",
         )
+
+
+@router.get(
+    "/stats",
+    response_model=dict[str, Any],
+    summary="Статистика работы сервиса",
+    description=(
+        "Возвращает внутренние счётчики текущего процесса.\n\n"
+        "- `result_cache` — попадания, промахи и вытеснения кэша результатов внешнего сервиса "
+        "(`null`, если кэш отключён).\n"
+        "- `external_singleflight` — количество выполняющихся обращений к внешнему сервису "
+        "и количество запросов, присоединившихся к уже выполняющемуся обращению.\n"
+        "- `external_circuit` — состояние автоматического выключателя внешнего сервиса, "
+        "доли ошибок и медленных вызовов и текущий таймаут обращения.\n"
+        "- `external_limiter` — длина очереди к внешнему сервису, выполняющиеся и отклонённые "
+        "обращения и время ожидания разрешения (`null`, если ограничение отключено).\n"
+        "- `external_retries` — количество повторов и дублирующих (hedged) обращений, "
+        "остаток бюджета повторов и распределение обращений к сервису на один запрос.\n"
+        "- `external_batching` — количество пакетных обращений, запросов в них и распределение "
+        "размеров пакетов (`null`, если пакетные обращения отключены).\n"
+        "- `user_cache` — попадания и промахи кэша аутентифицированных пользователей.\n"
+        "- `token_cache` — попадания и промахи кэша проверенных JWT-токенов.\n"
+        "- `database` — размер пула и занятые соединения, время ожидания соединения "
+        "и задержки запросов по методам `Database`.\n"
+        "- `query_writer` — строки в буфере отложенной записи, записанные в БД и отложенные "
+        "в spool-файл (`null`, если отложенная запись отключена)."
+    ),
+)
+async def stats(
+    db: DbInstanceDep,
+    http_client: HttpClientDep,
+    cache: ResultCacheDep,
+    writer: QueryWriterDep,
+) -> dict[str, Any]:
+    return {
+        "result_cache": cache.stats.as_dict() if cache else None,
+        "external_singleflight": {
+            "in_flight": external_calls.in_flight,
+            "coalesced": external_calls.coalesced,
+        },
+        "external_circuit": {
+            **(external_breaker.stats() if external_breaker else {"state": None}),
+            "timeout": external_timeout(),
+            "latency_p99": external_latency.quantile(0.99),
+        },
+        "external_limiter": external_limiter.stats() if external_limiter else None,
+        "external_retries": external_stats.as_dict(),
+        "external_batching": http_client.batcher.stats() if http_client.batcher else None,
+        "user_cache": user_cache.stats.as_dict(),
+        "token_cache": token_cache.stats.as_dict(),
+        "database": db.stats(),
+        "query_writer": writer.stats() if writer else None,
+    }
@@ -1,13 +1,42 @@
-from typing import Annotated, List
+import asyncio
+from datetime import datetime
+from typing import Annotated, Any, AsyncIterator
 
-from fastapi import APIRouter, Body, HTTPException, Query, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from api.exceptions import ExternalServiceUnavailable
-from api.schemas import OrderBy, QueryHistoryResponseDTO, QueryRequestAddDTO, QueryResponseDTO
-from api.services import make_request_to_external
-from api.utils import save_query_to_db
+from api.deps import QueryWriterDep, ResultCacheDep, user_rate_limit
+from api.exceptions import ExternalRateLimited, ExternalServiceUnavailable, JobQueueFull
+from api.export import EXPORT_COLUMNS, gzip_stream, iter_export
+from api.jobs import query_jobs
+from api.pagination import (
+    cursor_scope,
+    decode_cursor,
+    decode_distance_cursor,
+    encode_cursor,
+    encode_distance_cursor,
+)
+from api.schemas import (
+    ExportFormat,
+    OrderBy,
+    QueryBatchItemDTO,
+    QueryBatchResponseDTO,
+    QueryHistoryResponseDTO,
+    QueryJobDTO,
+    QueryJobResponseDTO,
+    QueryMode,
+    QueryNearbyPageDTO,
+    QueryNearbyResponseDTO,
+    QueryRequestAddDTO,
+    QueryResponseDTO,
+    QueryStatus,
+)
+from api.services import get_external_result, iter_batch_results
+from api.spatial import nearby_query, spatial_index
+from api.utils import create_query_job, finish_query_job, get_query_by_id, save_queries_to_db, save_query_to_db
 from auth.deps import ActiveAuthUser
-from core.deps import DbInstanceDep
+from core.config import settings
+from core.deps import DbInstanceDep, HttpClientDep
 
 router = APIRouter(tags=["Cadastral Numbers"])
 
@@ -16,64 +45,349 @@ QueryBody = Annotated[QueryRequestAddDTO, Body()]
 
 @router.post(
     "/query",
+    dependencies=[Depends(user_rate_limit("query"))],
     response_model=QueryResponseDTO,
+    responses={status.HTTP_202_ACCEPTED: {"model": QueryJobDTO}},
     summary="Отправить запрос на внешний сервис",
     description=(
         "Отправляет запрос на внешний сервис и сохраняет результат в базе данных.\n\n"
+        "- Повторные запросы с теми же кадастровым номером и координатами обслуживаются из кэша, "
+        "но всё равно записываются в историю.\n"
+        "- При заданном `CADASTRAL_LATEST_MAX_AGE` ответ берётся из последнего результата по номеру "
+        "(`GET /cadastral/{number}`), если он достаточно свежий и получен для тех же координат; "
+        "внешний сервис при этом не вызывается.\n"
         "- Если внешний сервис недоступен, сохраняет запрос с `result=None` и возвращает "
         "ошибку `503 Service Unavailable`.\n"
-        "- В случае успеха сохраняет результат и возвращает его клиенту."
+        "- Если превышен лимит обращений к внешнему сервису, запрос также сохраняется с `result=None`, "
+        "а ответ — `503` или `429` (по настройке) с заголовком `Retry-After`.\n"
+        "- В случае успеха сохраняет результат и возвращает его клиенту.\n"
+        "- При включённой отложенной записи история сохраняется пакетами в фоне, "
+        "а ответ строится из данных запроса.\n"
+        "- При `mode=async` сразу сохраняет запрос со статусом `pending` и возвращает "
+        "`202 Accepted` с идентификатором задачи; результат можно получить через `GET /query/{id}`."
     ),
 )
-async def submit_query(request: QueryBody, db: DbInstanceDep, user: ActiveAuthUser) -> QueryResponseDTO:
+async def submit_query(
+    request: QueryBody,
+    db: DbInstanceDep,
+    http_client: HttpClientDep,
+    cache: ResultCacheDep,
+    writer: QueryWriterDep,
+    user: ActiveAuthUser,
+    mode: Annotated[QueryMode, Query(...)] = QueryMode.sync,
+) -> QueryResponseDTO | JSONResponse:
+    if mode == QueryMode.asynchronous:
+        return await submit_query_job(request, db)
+
     params = (request.cadastral_number, request.latitude, request.longitude)
 
     try:
-        result = await make_request_to_external(request)
+        result = await get_external_result(request, http_client, cache, db)
     except ExternalServiceUnavailable as exc_info:
-        await save_query_to_db(db, *params, result=None, returning=False)
+        if writer is not None:
+            await writer.add(*params, result=None)
+        else:
+            await save_query_to_db(db, *params, result=None, returning=False)
+        if isinstance(exc_info, ExternalRateLimited):
+            raise HTTPException(
+                status_code=settings.EXTERNAL_RATE_LIMIT_STATUS_CODE,
+                detail=str(exc_info),
+                headers={"Retry-After": "1"},
+            )
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=str(exc_info),
         )
+    if writer is not None:
+        await writer.add(*params, result=result)
+        return QueryResponseDTO(**request.model_dump(), result=result)
     inserted_row = await save_query_to_db(db, *params, result=result, returning=True)
     return QueryResponseDTO(**inserted_row)
 
 
+async def submit_query_job(request: QueryRequestAddDTO, db: DbInstanceDep) -> JSONResponse:
+    """Сохраняет запрос в статусе `pending` и ставит его в очередь фоновых запросов.
+
+    Args:
+        request: DTO с кадастровым номером и координатами.
+        db: Экземпляр подключения к базе данных.
+
+    Returns:
+        Ответ `202 Accepted` с идентификатором задачи и заголовком `Location`.
+
+    Raises:
+        HTTPException: 503 если очередь фоновых запросов переполнена.
+    """
+    query_id = await create_query_job(db, request)
+    try:
+        query_jobs.submit(query_id, request)
+    except JobQueueFull as exc_info:
+        await finish_query_job(db, query_id, result=None)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc_info),
+        )
+    job = QueryJobDTO(id=query_id, status=QueryStatus.pending)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=job.model_dump(mode="json"),
+        headers={"Location": f"/query/{query_id}"},
+    )
+
+
+@router.post(
+    "/query/batch",
+    dependencies=[Depends(user_rate_limit("query_batch"))],
+    response_model=QueryBatchResponseDTO,
+    summary="Отправить пакет запросов на внешний сервис",
+    description=(
+        "Принимает список запросов (кадастровый номер и координаты), проверяет их все сразу "
+        "и отправляет на внешний сервис с ограничением на количество одновременных обращений.\n\n"
+        "- Для каждого элемента возвращается `result` или `error` с его индексом в пакете.\n"
+        "- Все валидные элементы сохраняются в историю одной пакетной вставкой.\n"
+        "- При `stream=true` результаты отдаются в формате NDJSON по мере готовности."
+    ),
+)
+async def submit_query_batch(
+    items: Annotated[list[dict[str, Any]], Body(..., min_length=1, max_length=settings.QUERY_BATCH_MAX_SIZE)],
+    db: DbInstanceDep,
+    http_client: HttpClientDep,
+    cache: ResultCacheDep,
+    user: ActiveAuthUser,
+    stream: Annotated[bool, Query(...)] = False,
+) -> QueryBatchResponseDTO | StreamingResponse:
+    results = iter_batch_results(items, http_client, cache, concurrency=settings.QUERY_BATCH_CONCURRENCY)
+    if stream:
+        return StreamingResponse(stream_batch_results(db, results), media_type="application/x-ndjson")
+
+    collected = [item async for item in results]
+    await save_queries_to_db(db, batch_rows(collected))
+    return QueryBatchResponseDTO(items=sorted(collected, key=lambda item: item.index))
+
+
+def batch_rows(items: list[QueryBatchItemDTO]) -> list[tuple[str, float, float, bool | None]]:
+    """Отбирает валидные элементы пакета для сохранения в историю.
+
+    Args:
+        items: Результаты обработки элементов пакета.
+
+    Returns:
+        Кортежи (кадастровый номер, широта, долгота, результат).
+    """
+    return [
+        (item.cadastral_number, item.latitude, item.longitude, item.result)
+        for item in items
+        if item.cadastral_number is not None
+    ]
+
+
+async def stream_batch_results(db: DbInstanceDep, results: AsyncIterator[QueryBatchItemDTO]) -> AsyncIterator[str]:
+    """Отдаёт результаты пакета в формате NDJSON и сохраняет обработанные элементы в историю.
+
+    Args:
+        db: Экземпляр подключения к базе данных.
+        results: Результаты обработки элементов пакета по мере готовности.
+
+    Yields:
+        Строки NDJSON, по одной на элемент пакета.
+    """
+    collected = []
+    try:
+        async for item in results:
+            collected.append(item)
+            yield item.model_dump_json() + "\n"
+    finally:
+        await save_queries_to_db(db, batch_rows(collected))
+
+
+@router.get(
+    "/query/{query_id}",
+    dependencies=[Depends(user_rate_limit("query_status"))],
+    response_model=QueryJobResponseDTO,
+    summary="Получить статус и результат запроса",
+    description=(
+        "Возвращает запрос по идентификатору вместе со статусом выполнения "
+        "(`pending`, `done` или `failed`).\n\n"
+        "- Параметр `wait` включает long-polling: ответ задерживается до завершения запроса, "
+        "но не дольше указанного количества секунд.\n"
+        "- Если запрос не найден, возвращается ошибка `404 Not Found`."
+    ),
+)
+async def get_query(
+    db: DbInstanceDep,
+    user: ActiveAuthUser,
+    query_id: Annotated[int, Path(..., ge=1)],
+    wait: Annotated[float, Query(..., ge=0, le=60)] = 0,
+) -> QueryJobResponseDTO:
+    row = await get_query_by_id(db, query_id)
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Query not found")
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while row["status"] == QueryStatus.pending.value and (remaining := deadline - loop.time()) > 0:
+        await query_jobs.wait(query_id, timeout=min(remaining, settings.QUERY_JOB_POLL_INTERVAL))
+        row = await get_query_by_id(db, query_id)
+    return QueryJobResponseDTO(**dict(row))
+
+
 @router.get(
     "/history",
-    response_model=List[QueryHistoryResponseDTO],
+    dependencies=[Depends(user_rate_limit("history"))],
+    response_model=list[QueryHistoryResponseDTO],
     summary="Получить историю запросов",
     description=(
         "Возвращает историю запросов из базы данных с поддержкой:\n\n"
-        "- Фильтрации по кадастровому номеру.\n"
+        "- Фильтрации по кадастровому номеру и диапазону дат создания `[created_from, created_to)`; "
+        "диапазон дат ограничивает поиск месячными секциями таблицы, в которые он попадает.\n"
         "- Сортировки по дате создания (по возрастанию или убыванию).\n"
-        "- Пагинации через параметры `limit` и `offset`."
+        "- Курсорной пагинации: курсор из заголовка ответа `X-Next-Cursor` передаётся в параметр `cursor` "
+        "для получения следующей страницы; отсутствие заголовка означает, что страниц больше нет. Курсор действителен "
+        "только с теми же `order_by`, `cadastral_number` и диапазоном дат, иначе `400 Bad Request`.\n"
+        "- Параметр `offset` оставлен для совместимости и не используется вместе с `cursor`."
     ),
 )
 async def get_history(
     db: DbInstanceDep,
     user: ActiveAuthUser,
+    response: Response,
     cadastral_number: Annotated[str | None, Query(...)] = None,
+    created_from: Annotated[datetime | None, Query(...)] = None,
+    created_to: Annotated[datetime | None, Query(...)] = None,
     order_by: Annotated[OrderBy, Query(...)] = OrderBy.ascending,
     limit: Annotated[int, Query(..., gt=0, le=100)] = 10,
-    offset: Annotated[int, Query(..., ge=0)] = 0,
-) -> List[QueryHistoryResponseDTO]:
-    query = "SELECT * FROM queries"
-    params = []
+    cursor: Annotated[str | None, Query(...)] = None,
+    offset: Annotated[int, Query(..., ge=0, deprecated=True)] = 0,
+) -> list[QueryHistoryResponseDTO]:
+    query = "SELECT id, cadastral_number, latitude, longitude, result, created_at FROM queries"
+    conditions = []
+    params: list[Any] = []
     param_index = 1
 
-    if cadastral_number:
-        query += f"\nWHERE cadastral_number = ${param_index}"
-        params.append(cadastral_number)
-        param_index += 1
+    for condition, value in (
+        ("cadastral_number = ${}", cadastral_number or None),
+        ("created_at >= ${}", created_from),
+        ("created_at < ${}", created_to),
+    ):
+        if value is not None:
+            conditions.append(condition.format(param_index))
+            params.append(value)
+            param_index += 1
+
+    comparison, direction = (">", "ASC") if order_by == OrderBy.ascending else ("<", "DESC")
+    scope = cursor_scope(order_by.value, cadastral_number or None, created_from, created_to)
+    if cursor:
+        try:
+            last_created_at, last_id = decode_cursor(cursor, scope)
+        except ValueError as exc_info:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc_info))
+        # Отдельное условие на `created_at` позволяет отсечь уже пройденные секции таблицы
+        conditions.append(f"created_at {comparison}= ${param_index}")
+        conditions.append(f"(created_at, id) {comparison} (${param_index}, ${param_index + 1})")
+        params.extend([last_created_at, last_id])
+        param_index += 2
+        offset = 0
 
-    if order_by == OrderBy.descending:
-        query += "\nORDER BY created_at DESC"
+    if conditions:
+        query += "\nWHERE " + " AND ".join(conditions)
+    query += f"\nORDER BY created_at {direction}, id {direction}"
 
+    # Запрашиваем на одну строку больше, чтобы узнать, есть ли следующая страница
     query += f"\nLIMIT ${param_index} OFFSET ${param_index + 1}"
-    params.extend([limit, offset])
-    param_index += 1
+    params.extend([limit + 1, offset])
+
+    res = await db.fetch(query, *params, read_only=True)
+    items = [QueryHistoryResponseDTO(**dict(row)) for row in res[:limit]]
+    # Тело ответа остаётся списком для совместимости с существующими клиентами
+    if len(res) > limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(items[-1].created_at, items[-1].id, scope)
+    return items
+
+
+@router.get(
+    "/history/nearby",
+    dependencies=[Depends(user_rate_limit("history_nearby"))],
+    response_model=QueryNearbyPageDTO,
+    summary="Найти запросы рядом с точкой",
+    description=(
+        "Возвращает запросы, координаты которых находятся не дальше `radius` метров от точки `(lat, lon)`, "
+        "в порядке возрастания расстояния.\n\n"
+        "- Поиск ближайших точек и фильтр по радиусу выполняются по GiST-индексу "
+        "(PostGIS или cube/earthdistance, в зависимости от миграции).\n"
+        "- Курсорная пагинация: `next_cursor` из ответа передаётся в параметр `cursor` "
+        "для получения следующей страницы; `null` означает, что страниц больше нет. Курсор действителен "
+        "только с теми же `lat`, `lon` и `radius`, иначе `400 Bad Request`."
+    ),
+)
+async def get_history_nearby(
+    db: DbInstanceDep,
+    user: ActiveAuthUser,
+    lat: Annotated[float, Query(..., ge=-90, le=90)],
+    lon: Annotated[float, Query(..., ge=-180, le=180)],
+    radius: Annotated[float, Query(..., gt=0, le=settings.HISTORY_NEARBY_MAX_RADIUS)],
+    limit: Annotated[int, Query(..., gt=0, le=100)] = 10,
+    cursor: Annotated[str | None, Query(...)] = None,
+) -> QueryNearbyPageDTO:
+    backend = await spatial_index.get_backend(db, settings.HISTORY_NEARBY_BACKEND)
+    # Запрашиваем на одну строку больше, чтобы узнать, есть ли следующая страница
+    params: list[Any] = [lat, lon, radius, limit + 1]
+    scope = cursor_scope(lat, lon, radius)
+    if cursor:
+        try:
+            params.extend(decode_distance_cursor(cursor, scope))
+        except ValueError as exc_info:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc_info))
+
+    res = await db.fetch(nearby_query(backend, with_cursor=bool(cursor)), *params, read_only=True)
+    items = [QueryNearbyResponseDTO(**dict(row)) for row in res[:limit]]
+    next_cursor = encode_distance_cursor(items[-1].distance, items[-1].id, scope) if len(res) > limit else None
+    return QueryNearbyPageDTO(items=items, next_cursor=next_cursor)
+
+
+@router.get(
+    "/history/export",
+    dependencies=[Depends(user_rate_limit("history_export"))],
+    response_class=StreamingResponse,
+    summary="Выгрузить историю запросов",
+    description=(
+        "Потоково выгружает всю историю запросов в формате NDJSON или CSV без ограничения на количество строк.\n\n"
+        "- Фильтрация по кадастровому номеру и диапазону дат создания `[created_from, created_to)`.\n"
+        "- Строки читаются из БД серверным курсором порциями по `chunk_size`, "
+        "поэтому потребление памяти не зависит от объёма выгрузки.\n"
+        "- При `gzip=true` ответ сжимается на лету (`Content-Encoding: gzip`)."
+    ),
+)
+async def export_history(
+    db: DbInstanceDep,
+    user: ActiveAuthUser,
+    cadastral_number: Annotated[str | None, Query(...)] = None,
+    created_from: Annotated[datetime | None, Query(...)] = None,
+    created_to: Annotated[datetime | None, Query(...)] = None,
+    export_format: Annotated[ExportFormat, Query(..., alias="format")] = ExportFormat.ndjson,
+    chunk_size: Annotated[int, Query(..., gt=0, le=10_000)] = settings.HISTORY_EXPORT_CHUNK_SIZE,
+    gzip: Annotated[bool, Query(...)] = False,
+) -> StreamingResponse:
+    query = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM queries"
+    conditions = []
+    params: list[Any] = []
+
+    for condition, value in (
+        ("cadastral_number = ${}", cadastral_number),
+        ("created_at >= ${}", created_from),
+        ("created_at < ${}", created_to),
+    ):
+        if value is not None:
+            params.append(value)
+            conditions.append(condition.format(len(params)))
+
+    if conditions:
+        query += "\nWHERE " + " AND ".join(conditions)
+    query += "\nORDER BY created_at, id"
 
-    res = await db.fetch(query, *params)
-    return [QueryHistoryResponseDTO(**dict(row)) for row in res]
+    media_type = "application/x-ndjson" if export_format == ExportFormat.ndjson else "text/csv"
+    headers = {"Content-Disposition": f'attachment; filename="history.{export_format.value}"'}
+    content = iter_export(db, query, params, export_format, chunk_size)
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+        content = gzip_stream(content)
+    return StreamingResponse(content, media_type=media_type, headers=headers)
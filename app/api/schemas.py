@@ -11,20 +11,33 @@ class OrderBy(str, Enum):
     descending = "desc"
 
 
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class QueryMode(str, Enum):
+    sync = "sync"
+    asynchronous = "async"
+
+
+class QueryStatus(str, Enum):
+    pending = "pending"
+    done = "done"
+    failed = "failed"
+
+
 class QueryRequestAddDTO(BaseModel):
     cadastral_number: str = Field(..., json_schema_extra={"example": "77:01:0004012:2041"})
     latitude: float = Field(..., ge=-90, le=90, json_schema_extra={"example": 55.7558})
     longitude: float = Field(..., ge=-180, le=180, json_schema_extra={"example": 37.6173})
 
-    @field_validator("cadastral_number", mode="before")
-    def normalize_cadastral_number(cls, value: str) -> str:
-        return CadastralValidator.normalize(value)
-
     @field_validator("cadastral_number")
     def validate_cadastral_number(cls, value: str) -> str:
-        if not CadastralValidator.is_valid(value):
+        cadastral_number = CadastralValidator.parse(value)
+        if cadastral_number is None:
             raise ValueError("Incorrect cadastral number format")
-        return value
+        return str(cadastral_number)
 
 
 class QueryResponseDTO(QueryRequestAddDTO):
@@ -37,3 +50,41 @@ class QueryResponsesDTO(QueryResponseDTO):
 
 class QueryHistoryResponseDTO(QueryResponsesDTO):
     id: int = Field(...)
+
+
+class QueryNearbyResponseDTO(QueryHistoryResponseDTO):
+    distance: float = Field(..., ge=0)
+
+
+class QueryNearbyPageDTO(BaseModel):
+    items: list[QueryNearbyResponseDTO] = Field(...)
+    next_cursor: str | None = Field(None)
+
+
+class CadastralLatestDTO(QueryRequestAddDTO):
+    result: bool = Field(...)
+    updated_at: datetime = Field(...)
+    hit_count: int = Field(..., ge=1)
+
+
+class QueryJobDTO(BaseModel):
+    id: int = Field(...)
+    status: QueryStatus = Field(...)
+
+
+class QueryJobResponseDTO(QueryHistoryResponseDTO):
+    status: QueryStatus = Field(...)
+    finished_at: datetime | None = Field(None)
+
+
+class QueryBatchItemDTO(BaseModel):
+    index: int = Field(..., ge=0)
+    cadastral_number: str | None = Field(None)
+    latitude: float | None = Field(None)
+    longitude: float | None = Field(None)
+    result: bool | None = Field(None)
+    error: str | None = Field(None)
+
+
+class QueryBatchResponseDTO(BaseModel):
+    items: list[QueryBatchItemDTO] = Field(...)
@@ -1,33 +1,520 @@
-from httpx import AsyncClient, RequestError
+import asyncio
+import contextlib
+import functools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator
 
-from api.exceptions import ExternalServiceUnavailable
-from api.schemas import QueryRequestAddDTO
+from httpx import HTTPError, Response
+from pydantic import ValidationError
+
+from api.cache import make_cache_key
+from api.deps import ResultCacheDep
+from api.exceptions import ExternalCircuitOpen, ExternalRateLimited, ExternalServiceUnavailable
+from api.schemas import QueryBatchItemDTO, QueryRequestAddDTO
+from api.utils import get_latest_result
+from core.batching import MicroBatcher
+from core.circuit_breaker import CircuitBreaker, CircuitOpenError
 from core.config import settings
+from core.database import db
+from core.deps import DbInstanceDep, HttpClientDep
+from core.metrics import Histogram, LatencyWindow, metrics
+from core.rate_limit import CallLimiter, LocalTokenSource, PostgresTokenSource, RateLimitExceeded, TokenSource
+from core.retry import RetryBudget, backoff_delay
+from core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+external_calls: SingleFlight[bool] = SingleFlight()
+external_latency = LatencyWindow(size=settings.EXTERNAL_ADAPTIVE_TIMEOUT_WINDOW)
+external_breaker = (
+    CircuitBreaker(
+        window=settings.EXTERNAL_BREAKER_WINDOW,
+        min_calls=settings.EXTERNAL_BREAKER_MIN_CALLS,
+        failure_rate=settings.EXTERNAL_BREAKER_FAILURE_RATE,
+        slow_call_duration=settings.EXTERNAL_BREAKER_SLOW_CALL_DURATION,
+        slow_call_rate=settings.EXTERNAL_BREAKER_SLOW_CALL_RATE,
+        open_duration=settings.EXTERNAL_BREAKER_OPEN_DURATION,
+        half_open_calls=settings.EXTERNAL_BREAKER_HALF_OPEN_CALLS,
+    )
+    if settings.EXTERNAL_BREAKER_ENABLED
+    else None
+)
+
+
+def build_external_limiter() -> CallLimiter | None:
+    """Создаёт ограничитель обращений к внешнему сервису по настройкам.
+
+    Returns:
+        Ограничитель или None, если не заданы ни частота, ни параллельность.
+    """
+    tokens: TokenSource | None = None
+    if settings.EXTERNAL_RATE_LIMIT > 0:
+        if settings.EXTERNAL_RATE_LIMIT_BACKEND == "postgres":
+            tokens = PostgresTokenSource(
+                db,
+                key="external_service",
+                rate=settings.EXTERNAL_RATE_LIMIT,
+                burst=settings.EXTERNAL_RATE_LIMIT_BURST,
+                lease=settings.EXTERNAL_RATE_LIMIT_LEASE,
+            )
+        else:
+            tokens = LocalTokenSource(rate=settings.EXTERNAL_RATE_LIMIT, burst=settings.EXTERNAL_RATE_LIMIT_BURST)
+    if tokens is None and not settings.EXTERNAL_MAX_CONCURRENCY:
+        return None
+    return CallLimiter(tokens=tokens, concurrency=settings.EXTERNAL_MAX_CONCURRENCY or None)
+
+
+external_limiter = build_external_limiter()
+external_budget = RetryBudget(ratio=settings.EXTERNAL_RETRY_BUDGET_RATIO, burst=settings.EXTERNAL_RETRY_BUDGET_BURST)
+
+
+@dataclass
+class ExternalCallStats:
+    """Счётчики повторов и дублирующих (hedged) обращений к внешнему сервису."""
+
+    requests: int = 0
+    retries: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    budget_exhausted: int = 0
+    # Количество фактических обращений к сервису на один запрос
+    calls_per_request: Histogram = field(default_factory=lambda: Histogram(buckets=(1, 2, 3, 4, 6, 8)))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Возвращает счётчики в виде словаря.
+
+        Returns:
+            Словарь со счётчиками и распределением обращений на запрос.
+        """
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "budget_exhausted": self.budget_exhausted,
+            "budget_tokens": external_budget.tokens,
+            "calls_per_request": self.calls_per_request.as_dict(),
+        }
+
 
+external_stats = ExternalCallStats()
 
-async def make_request_to_external(request: QueryRequestAddDTO) -> bool:
+
+def external_timeout() -> float:
+    """Возвращает таймаут обращения к внешнему сервису.
+
+    Пока задержек в окне меньше `EXTERNAL_ADAPTIVE_TIMEOUT_MIN_SAMPLES` (или адаптация отключена),
+    используется максимальный таймаут; затем — p99 последних задержек с запасом
+    `EXTERNAL_ADAPTIVE_TIMEOUT_MULTIPLIER`, ограниченный снизу и сверху.
+
+    Returns:
+        Таймаут в секундах.
+    """
+    if (
+        not settings.EXTERNAL_ADAPTIVE_TIMEOUT
+        or len(external_latency) < settings.EXTERNAL_ADAPTIVE_TIMEOUT_MIN_SAMPLES
+    ):
+        return settings.EXTERNAL_TIMEOUT_MAX
+    p99 = external_latency.quantile(0.99) or 0.0
+    timeout = p99 * settings.EXTERNAL_ADAPTIVE_TIMEOUT_MULTIPLIER
+    return min(max(timeout, settings.EXTERNAL_TIMEOUT_MIN), settings.EXTERNAL_TIMEOUT_MAX)
+
+
+def hedge_delay() -> float | None:
+    """Возвращает задержку, после которой отправляется дублирующий запрос.
+
+    Returns:
+        Квантиль `EXTERNAL_HEDGE_QUANTILE` последних задержек (не меньше `EXTERNAL_HEDGE_MIN_DELAY`)
+        или None, если hedging отключён или задержек ещё недостаточно.
+    """
+    if not settings.EXTERNAL_HEDGE_ENABLED or len(external_latency) < settings.EXTERNAL_ADAPTIVE_TIMEOUT_MIN_SAMPLES:
+        return None
+    delay = external_latency.quantile(settings.EXTERNAL_HEDGE_QUANTILE) or 0.0
+    return max(delay, settings.EXTERNAL_HEDGE_MIN_DELAY)
+
+
+def external_payload(request: QueryRequestAddDTO) -> dict[str, Any]:
+    """Возвращает тело запроса к внешнему сервису для одного кадастрового номера."""
+    return {
+        "cadastral_number": request.cadastral_number,
+        "latitude": request.latitude,
+        "longitude": request.longitude,
+    }
+
+
+def check_external_response(response: Response) -> None:
+    """Проверяет код ответа внешнего сервиса.
+
+    Raises:
+        ExternalServiceUnavailable: Если сервис ответил ошибкой (4xx/5xx).
+    """
+    if response.is_error:
+        raise ExternalServiceUnavailable(f"External service responded with {response.status_code}")
+
+
+def read_external_field(response: Response, name: str) -> Any:
+    """Возвращает поле JSON-ответа внешнего сервиса.
+
+    Args:
+        response: Успешный ответ внешнего сервиса.
+        name: Название поля.
+
+    Returns:
+        Значение поля.
+
+    Raises:
+        ExternalServiceUnavailable: Если ответ не является JSON-объектом с этим полем.
+    """
+    try:
+        return response.json()[name]
+    except (ValueError, KeyError, TypeError):
+        raise ExternalServiceUnavailable(f"External service returned a malformed response without {name!r}")
+
+
+async def post_external_batch(http_client: HttpClientDep, requests: list[QueryRequestAddDTO]) -> list[bool]:
+    """Отправляет пакет запросов во внешний сервис одним обращением к `/results`.
+
+    Args:
+        http_client: Общий HTTP-клиент внешнего сервиса.
+        requests: DTO с кадастровыми номерами и координатами.
+
+    Returns:
+        Результаты в порядке запросов.
+
+    Raises:
+        HTTPError: Если обращение не удалось.
+        ExternalServiceUnavailable: Если сервис ответил ошибкой или количество результатов не совпадает
+            с размером пакета.
+    """
+    response = await http_client.post("/results", json={"items": [external_payload(request) for request in requests]})
+    check_external_response(response)
+    results = read_external_field(response, "results")
+    if not isinstance(results, list) or len(results) != len(requests):
+        raise ExternalServiceUnavailable(f"External service returned a malformed batch for {len(requests)} items")
+    return results
+
+
+def get_external_batcher(http_client: HttpClientDep) -> MicroBatcher[QueryRequestAddDTO, bool] | None:
+    """Возвращает диспетчер пакетных обращений, хранящийся в HTTP-клиенте.
+
+    Returns:
+        Диспетчер или None, если пакетные обращения отключены.
+    """
+    if not settings.EXTERNAL_BATCH_ENABLED:
+        return None
+    batcher = http_client.batcher
+    if batcher is None:
+        batcher = http_client.batcher = MicroBatcher(
+            functools.partial(post_external_batch, http_client),
+            max_size=settings.EXTERNAL_BATCH_MAX_SIZE,
+            window=settings.EXTERNAL_BATCH_WINDOW,
+        )
+    return batcher
+
+
+async def fetch_external_result(request: QueryRequestAddDTO, http_client: HttpClientDep) -> bool:
+    """Получает результат от внешнего сервиса: отдельным обращением к `/result` или в составе пакета.
+
+    Args:
+        request: DTO с кадастровым номером и координатами.
+        http_client: Общий HTTP-клиент внешнего сервиса.
+
+    Returns:
+        Результат проверки кадастрового номера.
+
+    Raises:
+        HTTPError: Если обращение не удалось.
+        ExternalServiceUnavailable: Если сервис ответил ошибкой или ответ не содержит результата.
+    """
+    batcher = get_external_batcher(http_client)
+    if batcher is not None:
+        return await batcher.submit(request)
+    response = await http_client.post("/result", json=external_payload(request))
+    check_external_response(response)
+    return read_external_field(response, "result")
+
+
+async def call_external(request: QueryRequestAddDTO, http_client: HttpClientDep, timeout: float) -> bool:
+    """Выполняет одно обращение к внешнему сервису.
+
+    Вызов ограничен таймаутом, проходит через ограничитель частоты и параллельности
+    (`external_limiter`) и защищён автоматическим выключателем: пока он разомкнут,
+    ошибка возвращается сразу, без обращения к сервису.
+
+    Args:
+        request: DTO с кадастровым номером и координатами.
+        http_client: Общий HTTP-клиент внешнего сервиса.
+        timeout: Таймаут обращения в секундах.
+
+    Returns:
+        Результат проверки кадастрового номера.
+
+    Raises:
+        ExternalCircuitOpen: Если автоматический выключатель разомкнут.
+        ExternalRateLimited: Если ограничитель обращений не дал разрешения вовремя.
+        ExternalServiceUnavailable: Если внешний сервис недоступен или не ответил вовремя.
+    """
+    if external_breaker is not None:
+        try:
+            external_breaker.allow()
+        except CircuitOpenError:
+            raise ExternalCircuitOpen("External service temporarily unavailable (circuit open)")
+
+    queued_at = time.perf_counter()
+    slot = (
+        external_limiter.slot(max_wait=min(settings.EXTERNAL_RATE_LIMIT_MAX_WAIT, timeout))
+        if external_limiter
+        else None
+    )
+    try:
+        async with slot or contextlib.nullcontext():
+            started_at = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(
+                    fetch_external_result(request, http_client),
+                    # Время ожидания в очереди ограничителя входит в таймаут обращения
+                    timeout=max(timeout - (started_at - queued_at), 0.0),
+                )
+            except (HTTPError, ExternalServiceUnavailable, asyncio.TimeoutError) as exc_info:
+                if isinstance(exc_info, asyncio.TimeoutError):
+                    # Таймаут тоже учитывается в окне, чтобы таймаут рос вместе с задержками сервиса
+                    external_latency.observe(time.perf_counter() - started_at)
+                if external_breaker is not None:
+                    external_breaker.record_failure()
+                raise ExternalServiceUnavailable("External service temporarily unavailable")
+            except Exception:
+                # Любая другая ошибка тоже освобождает пробный слот полуоткрытого выключателя
+                if external_breaker is not None:
+                    external_breaker.record_failure()
+                raise
+    except RateLimitExceeded:
+        if external_breaker is not None:
+            external_breaker.record_cancelled()
+        raise ExternalRateLimited("External service rate limit exceeded")
+    except asyncio.CancelledError:
+        if external_breaker is not None:
+            external_breaker.record_cancelled()
+        raise
+
+    duration = time.perf_counter() - started_at
+    external_latency.observe(duration)
+    if external_breaker is not None:
+        external_breaker.record_success(duration)
+    return result
+
+
+async def make_request_to_external(request: QueryRequestAddDTO, http_client: HttpClientDep) -> bool:
     """Отправляет запрос во внешний сервис для получения результата.
 
+    Неудачные обращения повторяются до `EXTERNAL_RETRY_ATTEMPTS` раз с экспоненциальной паузой
+    и джиттером, пока не истечёт общий срок `EXTERNAL_DEADLINE`. Если обращение длится дольше
+    p95 последних задержек, отправляется дублирующий запрос и берётся первый ответ.
+    Повторы и дубли расходуют общий бюджет `external_budget`, ограничивающий дополнительную
+    нагрузку на внешний сервис.
+
     Args:
         request: DTO с кадастровым номером и координатами.
+        http_client: Общий HTTP-клиент внешнего сервиса.
 
     Returns:
         True, если внешний сервис вернул положительный результат. Иначе False.
 
     Raises:
-        ExternalServiceUnavailable: Если внешний сервис недоступен или произошла ошибка запроса.
+        ExternalServiceUnavailable: Если внешний сервис недоступен, не ответил вовремя
+            или автоматический выключатель разомкнут.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.EXTERNAL_DEADLINE
+    calls = 0
+
+    async def hedged_call(timeout: float) -> bool:
+        nonlocal calls
+        calls += 1
+        primary = asyncio.ensure_future(call_external(request, http_client, timeout))
+        pending = {primary}
+        try:
+            delay = hedge_delay()
+            if delay is None or delay >= timeout:
+                return await primary
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done or not external_budget.withdraw():
+                return await primary
+
+            calls += 1
+            external_stats.hedges += 1
+            hedge = asyncio.ensure_future(call_external(request, http_client, timeout - delay))
+            pending.add(hedge)
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        external_stats.hedge_wins += task is hedge
+                        return task.result()
+                    error = task.exception()
+            assert error is not None
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    external_stats.requests += 1
+    external_budget.deposit()
+    with metrics.span("external.request"):
+        try:
+            for attempt in range(settings.EXTERNAL_RETRY_ATTEMPTS):
+                try:
+                    result = await hedged_call(min(external_timeout(), deadline - loop.time()))
+                    metrics.inc("external_requests", outcome=str(result).lower())
+                    return result
+                except (ExternalCircuitOpen, ExternalRateLimited):
+                    raise
+                except ExternalServiceUnavailable:
+                    pause = backoff_delay(
+                        attempt, settings.EXTERNAL_RETRY_BACKOFF_BASE, settings.EXTERNAL_RETRY_BACKOFF_MAX
+                    )
+                    # Повтор не имеет смысла, если после паузы на обращение не останется времени
+                    if attempt + 1 >= settings.EXTERNAL_RETRY_ATTEMPTS or loop.time() + pause >= deadline:
+                        raise
+                    if not external_budget.withdraw():
+                        external_stats.budget_exhausted += 1
+                        raise
+                    external_stats.retries += 1
+                    await asyncio.sleep(pause)
+            raise ExternalServiceUnavailable("External service temporarily unavailable")
+        except ExternalServiceUnavailable:
+            metrics.inc("external_requests", outcome="unavailable")
+            raise
+        finally:
+            external_stats.calls_per_request.observe(calls)
+
+
+async def get_fresh_latest_result(request: QueryRequestAddDTO, db: DbInstanceDep) -> bool | None:
+    """Возвращает последний результат по номеру из `cadastral_latest`, если его можно переиспользовать.
+
+    Результат подходит, если он не старше `CADASTRAL_LATEST_MAX_AGE` секунд, а его координаты
+    совпадают с координатами запроса с точностью ключа кэша. Ошибка чтения считается промахом.
+
+    Args:
+        request: DTO с кадастровым номером и координатами.
+        db: Экземпляр подключения к базе данных.
+
+    Returns:
+        Результат проверки или None, если подходящего результата нет.
+    """
+    try:
+        row = await get_latest_result(db, request.cadastral_number)
+    except Exception:
+        logger.exception("Failed to read latest result")
+        return None
+    if row is None or row["age"] > settings.CADASTRAL_LATEST_MAX_AGE:
+        return None
+    precision = settings.RESULT_CACHE_COORD_PRECISION
+    same_point = all(
+        f"{row[name]:.{precision}f}" == f"{getattr(request, name):.{precision}f}" for name in ("latitude", "longitude")
+    )
+    return row["result"] if same_point else None
+
+
+async def get_external_result(
+    request: QueryRequestAddDTO,
+    http_client: HttpClientDep,
+    cache: ResultCacheDep,
+    db: DbInstanceDep | None = None,
+) -> bool:
+    """Возвращает результат проверки из кэша или запрашивает его у внешнего сервиса.
+
+    Одновременные запросы с одинаковым ключом объединяются в одно обращение к внешнему сервису.
+    Если передано подключение к базе и задан `CADASTRAL_LATEST_MAX_AGE`, при промахе кэша
+    сначала проверяется свежий результат в таблице `cadastral_latest`.
+
+    Args:
+        request: DTO с кадастровым номером и координатами.
+        http_client: Общий HTTP-клиент внешнего сервиса.
+        cache: Кэш результатов (None, если кэширование отключено).
+        db: Экземпляр подключения к базе данных (None — не обращаться к `cadastral_latest`).
+
+    Returns:
+        Результат проверки кадастрового номера.
+
+    Raises:
+        ExternalServiceUnavailable: Если результата нет в кэше, а внешний сервис недоступен.
+    """
+    key = make_cache_key(request)
+    if cache is not None:
+        cached = await cache.get(key)
+        if cached is not None:
+            return cached
+    if db is not None and settings.CADASTRAL_LATEST_MAX_AGE > 0:
+        latest = await get_fresh_latest_result(request, db)
+        if latest is not None:
+            return latest
+
+    async def fetch() -> bool:
+        result = await make_request_to_external(request, http_client)
+        if cache is not None:
+            await cache.set(key, result)
+        return result
+
+    return await external_calls.do(key, fetch)
+
+
+def format_validation_error(exc_info: ValidationError) -> str:
+    """Формирует краткое описание ошибки валидации элемента пакета.
+
+    Args:
+        exc_info: Ошибка валидации Pydantic.
+
+    Returns:
+        Строка вида `поле: сообщение; поле: сообщение`.
+    """
+    return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in exc_info.errors())
+
+
+async def iter_batch_results(
+    items: list[dict[str, Any]],
+    http_client: HttpClientDep,
+    cache: ResultCacheDep,
+    concurrency: int,
+) -> AsyncIterator[QueryBatchItemDTO]:
+    """Проверяет пакет запросов и возвращает результаты по мере их готовности.
+
+    Сначала валидирует все элементы, затем обращается к внешнему сервису не более чем
+    `concurrency` запросами одновременно. Невалидные элементы возвращаются сразу с описанием ошибки.
+
+    Args:
+        items: Элементы пакета в виде словарей с полями `QueryRequestAddDTO`.
+        http_client: Общий HTTP-клиент внешнего сервиса.
+        cache: Кэш результатов (None, если кэширование отключено).
+        concurrency: Максимальное количество одновременных обращений к внешнему сервису.
+
+    Yields:
+        Результат обработки каждого элемента (порядок соответствует времени завершения).
     """
+    requests: list[tuple[int, QueryRequestAddDTO]] = []
+    for index, item in enumerate(items):
+        try:
+            requests.append((index, QueryRequestAddDTO.model_validate(item)))
+        except ValidationError as exc_info:
+            yield QueryBatchItemDTO(index=index, error=format_validation_error(exc_info))
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def process(index: int, request: QueryRequestAddDTO) -> QueryBatchItemDTO:
+        item = QueryBatchItemDTO(index=index, **request.model_dump())
+        async with semaphore:
+            try:
+                item.result = await get_external_result(request, http_client, cache)
+            except ExternalServiceUnavailable as exc_info:
+                item.error = str(exc_info)
+        return item
+
+    tasks = [asyncio.create_task(process(index, request)) for index, request in requests]
     try:
-        async with AsyncClient() as ac:
-            external_service_url = f"{settings.EXTERNAL_SERVICE_HOST}/result"
-            response = await ac.post(
-                external_service_url,
-                json={
-                    "cadastral_number": request.cadastral_number,
-                    "latitude": request.latitude,
-                    "longitude": request.longitude,
-                },
-            )
-            return response.json()["result"]
-    except RequestError:
-        raise ExternalServiceUnavailable("External service temporarily unavailable")
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
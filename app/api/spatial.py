@@ -0,0 +1,91 @@
+from typing import Literal
+
+from core.database import Database
+
+SpatialBackend = Literal["postgis", "earthdistance"]
+
+# Расстояние от точки запроса до заданной точки ($1 — широта, $2 — долгота) в метрах.
+# Оператор `<->` использует GiST-индекс для поиска ближайших точек (KNN).
+DISTANCE_EXPRESSIONS: dict[SpatialBackend, str] = {
+    "postgis": "geog <-> ST_SetSRID(ST_MakePoint($2, $1), 4326)::geography",
+    "earthdistance": "ll_to_earth(latitude, longitude) <-> ll_to_earth($1, $2)",
+}
+
+# Условие попадания в радиус $3, которое проверяется по индексу
+RADIUS_CONDITIONS: dict[SpatialBackend, str] = {
+    "postgis": "ST_DWithin(geog, ST_SetSRID(ST_MakePoint($2, $1), 4326)::geography, $3, false)",
+    "earthdistance": "earth_box(ll_to_earth($1, $2), $3) @> ll_to_earth(latitude, longitude)",
+}
+
+
+def nearby_query(backend: SpatialBackend, with_cursor: bool) -> str:
+    """Строит запрос ближайших к точке записей истории в пределах радиуса.
+
+    Параметры запроса: `$1` — широта, `$2` — долгота, `$3` — радиус в метрах, `$4` — лимит,
+    при `with_cursor` — `$5` и `$6` — расстояние и идентификатор последней строки предыдущей страницы.
+
+    Args:
+        backend: Способ индексации координат, созданный миграцией.
+        with_cursor: Продолжить выдачу после строки из курсора.
+
+    Returns:
+        SQL-запрос, возвращающий записи по возрастанию расстояния (столбец `distance`).
+    """
+    distance = DISTANCE_EXPRESSIONS[backend]
+    conditions = [RADIUS_CONDITIONS[backend], f"{distance} <= $3"]
+    if with_cursor:
+        conditions.append(f"({distance}, id) > ($5, $6)")
+    return (
+        "SELECT id, cadastral_number, latitude, longitude, result, created_at, "
+        f"{distance} AS distance FROM queries\n"
+        f"WHERE {' AND '.join(conditions)}\n"
+        f"ORDER BY {distance}, id\n"
+        "LIMIT $4"
+    )
+
+
+async def detect_spatial_backend(db: Database) -> SpatialBackend:
+    """Определяет способ индексации координат по наличию столбца `geog` в таблице `queries`.
+
+    Args:
+        db: Экземпляр подключения к базе данных.
+
+    Returns:
+        `postgis`, если миграция создала столбец `geog`, иначе `earthdistance`.
+    """
+    row = await db.fetchrow(
+        """
+        SELECT EXISTS (
+            SELECT 1 FROM information_schema.columns WHERE table_name = 'queries' AND column_name = 'geog'
+        ) AS has_geog
+        """,
+        read_only=True,
+    )
+    return "postgis" if row["has_geog"] else "earthdistance"
+
+
+class SpatialIndex:
+    """Запоминает способ индексации координат после первого обращения к БД."""
+
+    def __init__(self) -> None:
+        """Инициализирует неопределённый способ индексации."""
+        self.backend: SpatialBackend | None = None
+
+    async def get_backend(self, db: Database, configured: str) -> SpatialBackend:
+        """Возвращает способ индексации координат.
+
+        Args:
+            db: Экземпляр подключения к базе данных.
+            configured: Значение настройки: `auto`, `postgis` или `earthdistance`.
+
+        Returns:
+            Способ индексации.
+        """
+        if configured != "auto":
+            return configured
+        if self.backend is None:
+            self.backend = await detect_spatial_backend(db)
+        return self.backend
+
+
+spatial_index = SpatialIndex()
@@ -1,5 +1,6 @@
 from asyncpg import Record
 
+from api.schemas import QueryRequestAddDTO, QueryStatus
 from core.deps import DbInstanceDep
 
 
@@ -23,12 +24,13 @@ async def save_query_to_db(
 
     Returns:
         Если returning=True, возвращает строку с сохранёнными данными.
-        Если returning=False, возвращает None.∑
+        Если returning=False, возвращает None.
     """
-    values = (cadastral_number, latitude, longitude, result)
+    status = QueryStatus.failed if result is None else QueryStatus.done
+    values = (cadastral_number, latitude, longitude, result, status.value)
     query = """
-        INSERT INTO queries (cadastral_number, latitude, longitude, result)
-        VALUES ($1, $2, $3, $4)
+        INSERT INTO queries (cadastral_number, latitude, longitude, result, status, finished_at)
+        VALUES ($1, $2, $3, $4, $5, CURRENT_TIMESTAMP)
     """
     if returning:
         query += """
@@ -38,3 +40,100 @@ async def save_query_to_db(
         return row
     else:
         await db.execute(query, *values)
+
+
+async def save_queries_to_db(db: DbInstanceDep, rows: list[tuple[str, float, float, bool | None]]) -> None:
+    """Сохраняет несколько запросов в базу данных одним пакетом.
+
+    Args:
+        db: Экземпляр подключения к базе данных.
+        rows: Кортежи (кадастровый номер, широта, долгота, результат).
+    """
+    if not rows:
+        return
+    await db.executemany(
+        """
+        INSERT INTO queries (cadastral_number, latitude, longitude, result, status, finished_at)
+        VALUES ($1, $2, $3, $4, $5, CURRENT_TIMESTAMP)
+        """,
+        [(*row, (QueryStatus.failed if row[3] is None else QueryStatus.done).value) for row in rows],
+    )
+
+
+async def create_query_job(db: DbInstanceDep, request: QueryRequestAddDTO) -> int:
+    """Сохраняет запрос в статусе `pending` без результата.
+
+    Args:
+        db: Экземпляр подключения к базе данных.
+        request: DTO с кадастровым номером и координатами.
+
+    Returns:
+        Идентификатор созданной записи.
+    """
+    row = await db.fetchrow(
+        """
+        INSERT INTO queries (cadastral_number, latitude, longitude, result, status)
+        VALUES ($1, $2, $3, NULL, $4)
+        RETURNING id
+        """,
+        request.cadastral_number,
+        request.latitude,
+        request.longitude,
+        QueryStatus.pending.value,
+    )
+    return row["id"]
+
+
+async def finish_query_job(db: DbInstanceDep, query_id: int, result: bool | None, track: bool = True) -> None:
+    """Записывает результат фонового запроса и время его завершения.
+
+    Args:
+        db: Экземпляр подключения к базе данных.
+        query_id: Идентификатор записи.
+        result: Результат выполнения запроса (None, если внешний сервис недоступен).
+        track: Учитывать запись в режиме read-your-writes (False для воркеров очереди).
+    """
+    status = QueryStatus.failed if result is None else QueryStatus.done
+    await db.execute(
+        "UPDATE queries SET result = $2, status = $3, finished_at = CURRENT_TIMESTAMP WHERE id = $1",
+        query_id,
+        result,
+        status.value,
+        track=track,
+    )
+
+
+async def get_latest_result(db: DbInstanceDep, cadastral_number: str) -> Record | None:
+    """Ищет последний известный результат по кадастровому номеру в таблице `cadastral_latest`.
+
+    Args:
+        db: Экземпляр подключения к базе данных.
+        cadastral_number: Нормализованный кадастровый номер.
+
+    Returns:
+        Строка с последним результатом, его координатами, временем, количеством обращений
+        и возрастом в секундах (`age`) или None, если по номеру ещё нет результатов.
+    """
+    return await db.fetchrow(
+        """
+        SELECT cadastral_number, latitude, longitude, result, updated_at, hit_count,
+            EXTRACT(EPOCH FROM LOCALTIMESTAMP - updated_at)::float8 AS age
+        FROM cadastral_latest
+        WHERE cadastral_number = $1
+        """,
+        cadastral_number,
+        read_only=True,
+    )
+
+
+async def get_query_by_id(db: DbInstanceDep, query_id: int) -> Record | None:
+    """Ищет запрос в базе по идентификатору.
+
+    Args:
+        db: Экземпляр подключения к базе данных.
+        query_id: Идентификатор записи.
+
+    Returns:
+        Строка с данными запроса или None, если не найдена.
+    """
+    return await db.fetchrow("SELECT * FROM queries WHERE id = $1", query_id)
@@ -1,4 +1,39 @@
 import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable
+
+# Кадастровый номер нового образца (`77:01:0004012:2041`) или старого образца (`77:01:0004012:12:1:1`)
+CADASTRAL_NUMBER_RE = re.compile(r"(\d{2}):(\d{2}):(\d{6,7}):(\d{2}(?::\d:\d|\d{0,4}))")
+
+# Количество разобранных номеров, которые запоминаются для повторных проверок
+PARSE_CACHE_SIZE = 65_536
+
+
+@dataclass(frozen=True)
+class CadastralNumber:
+    """Кадастровый номер, разобранный на части."""
+
+    district: str
+    area: str
+    quarter: str
+    parcel: str
+
+    @property
+    def legacy(self) -> bool:
+        """True для номера старого образца (номер участка из трёх частей)."""
+        return ":" in self.parcel
+
+    def __str__(self) -> str:
+        return f"{self.district}:{self.area}:{self.quarter}:{self.parcel}"
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse(value: str) -> CadastralNumber | None:
+    match = CADASTRAL_NUMBER_RE.fullmatch(value)
+    if match is None:
+        return None
+    return CadastralNumber(*match.groups())
 
 
 class CadastralValidator:
@@ -14,7 +49,23 @@ class CadastralValidator:
         Returns:
             Нормализованная строка без пробелов.
         """
-        return re.sub(r"\s+", "", value)
+        return "".join(value.split())
+
+    @staticmethod
+    def parse(value: str) -> CadastralNumber | None:
+        """Нормализует кадастровый номер и разбирает его на части.
+
+        Результаты запоминаются, поэтому повторная проверка того же номера не выполняет разбор заново.
+
+        Args:
+            value: Кадастровый номер в виде строки (допускаются пробелы).
+
+        Returns:
+            Части кадастрового номера или None, если номер не соответствует формату.
+        """
+        if not isinstance(value, str):
+            return None
+        return _parse(CadastralValidator.normalize(value))
 
     @staticmethod
     def is_valid(value: str) -> bool:
@@ -26,12 +77,22 @@ class CadastralValidator:
         Returns:
             True, если кадастровый номер валиден. Иначе False.
         """
-        if ":" not in value:
-            return False
-        parts_count = len(value.split(":"))
-        patterns = {
-            4: re.compile(r"\d{2}:\d{2}:\d{6,7}:\d{2,6}"),  # кадастровый номер нового образца
-            6: re.compile(r"\d{2}:\d{2}:\d{6,7}:\d{2}:\d:\d"),  # кадастровый номер старого образца
-        }
-        pattern = patterns.get(parts_count)
-        return bool(pattern and pattern.fullmatch(value))
+        return isinstance(value, str) and _parse(value) is not None
+
+    @staticmethod
+    def validate_many(values: Iterable[str]) -> list[CadastralNumber | None]:
+        """Разбирает пакет кадастровых номеров.
+
+        Args:
+            values: Кадастровые номера в виде строк (допускаются пробелы).
+
+        Returns:
+            Части каждого номера или None для невалидных номеров, в порядке входных данных.
+        """
+        parsed: dict[str, CadastralNumber | None] = {}
+        results = []
+        for value in values:
+            if value not in parsed:
+                parsed[value] = CadastralValidator.parse(value)
+            results.append(parsed[value])
+        return results
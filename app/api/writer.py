@@ -0,0 +1,221 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from api.schemas import QueryStatus
+from core.database import Database
+
+logger = logging.getLogger(__name__)
+
+QUERY_COLUMNS = ("cadastral_number", "latitude", "longitude", "result", "status", "created_at", "finished_at")
+
+QueryRow = tuple[str, float, float, bool | None, str, datetime, datetime]
+
+
+class QueryWriteBuffer:
+    """Отложенная пакетная запись запросов в таблицу `queries`.
+
+    Строки накапливаются в памяти и загружаются через COPY, когда их становится
+    `batch_size` или с момента прошлой записи прошло `max_age` секунд. Если буфер
+    заполнен до `capacity`, добавление ждёт ближайшей записи, но не дольше `max_wait` секунд,
+    после чего строка записывается в БД напрямую. Строки, которые не удалось
+    записать в БД, дописываются в локальный spool-файл и повторно загружаются после
+    следующей успешной записи или при запуске.
+    """
+
+    def __init__(self) -> None:
+        """Инициализирует неактивный буфер."""
+        self._db: Database | None = None
+        self._rows: list[QueryRow] = []
+        self._batch_size = 500
+        self._capacity = 10_000
+        self._max_age = 0.5
+        self._max_wait = 1.0
+        self._spool_path: Path | None = None
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.flushed = 0
+        self.spooled = 0
+
+    @property
+    def running(self) -> bool:
+        """Запущена ли фоновая запись."""
+        return self._task is not None
+
+    async def start(
+        self,
+        db: Database,
+        batch_size: int,
+        max_age: float,
+        capacity: int,
+        spool_path: Path | None,
+        max_wait: float = 1.0,
+    ) -> None:
+        """Запускает фоновую запись и загружает строки, оставшиеся в spool-файле.
+
+        Args:
+            db: Экземпляр подключения к базе данных.
+            batch_size: Количество строк, при котором запись начинается немедленно.
+            max_age: Максимальное время в секундах между записями.
+            capacity: Максимальное количество строк в памяти.
+            spool_path: Путь к spool-файлу (None — строки при ошибке БД теряются).
+            max_wait: Максимальное время ожидания места в заполненном буфере в секундах.
+        """
+        self._db = db
+        self._batch_size, self._max_age, self._capacity = batch_size, max_age, capacity
+        self._max_wait = max_wait
+        self._spool_path = spool_path
+        async with self._lock:
+            await self._replay_spool()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Останавливает фоновую запись и записывает оставшиеся строки."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def add(self, cadastral_number: str, latitude: float, longitude: float, result: bool | None) -> None:
+        """Добавляет завершённый запрос в буфер.
+
+        Args:
+            cadastral_number: Кадастровый номер.
+            latitude: Широта.
+            longitude: Долгота.
+            result: Результат выполнения запроса (None, если внешний сервис недоступен).
+        """
+        # Столбцы `timestamp without time zone` заполняются по UTC; сессии пула `Database` используют
+        # TimeZone UTC, поэтому время совпадает с CURRENT_TIMESTAMP строк, записанных напрямую
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        status = QueryStatus.failed if result is None else QueryStatus.done
+        row = (cadastral_number, latitude, longitude, result, status.value, now, now)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._max_wait
+        while len(self._rows) >= self._capacity:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                # Фоновая запись не успевает освободить место: строка записывается, минуя буфер.
+                # Spool-файл меняется только под блокировкой, иначе строка, дописанная между чтением
+                # и удалением файла в `_replay_spool`, была бы потеряна.
+                async with self._lock:
+                    if not await self._copy([row]):
+                        await self._spool([row])
+                return
+            self._drained.clear()
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(self._drained.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+
+        self._rows.append(row)
+        if len(self._rows) >= self._batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        """Записывает накопленные строки в БД одним COPY."""
+        async with self._lock:
+            rows, self._rows = self._rows, []
+            self._drained.set()
+            if not rows:
+                return
+            if not await self._copy(rows):
+                await self._spool(rows)
+            elif self._spool_path is not None and self._spool_path.exists():
+                await self._replay_spool()
+
+    def stats(self) -> dict[str, int]:
+        """Возвращает счётчики буфера.
+
+        Returns:
+            Словарь с количеством строк в памяти, записанных в БД и отложенных в spool-файл.
+        """
+        return {"buffered": len(self._rows), "flushed": self.flushed, "spooled": self.spooled}
+
+    async def _run(self) -> None:
+        """Записывает буфер по заполнению или по истечении `max_age` до отмены."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._max_age)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # Ошибка одной записи не должна останавливать фоновую запись
+                logger.exception("Failed to flush query write buffer")
+
+    async def _copy(self, rows: list[QueryRow]) -> bool:
+        """Загружает строки через COPY.
+
+        Returns:
+            True, если строки записаны.
+        """
+        assert self._db is not None
+        try:
+            await self._db.copy_records("queries", rows, columns=QUERY_COLUMNS, track=False)
+        except Exception:
+            logger.exception("Failed to flush %s buffered queries", len(rows))
+            return False
+        self.flushed += len(rows)
+        return True
+
+    async def _spool(self, rows: list[QueryRow]) -> None:
+        """Дописывает строки в spool-файл и сбрасывает его на диск."""
+        if self._spool_path is None:
+            logger.error("Dropped %s buffered queries: spool file is not configured", len(rows))
+            return
+        try:
+            await asyncio.to_thread(_append_spool, self._spool_path, rows)
+        except OSError:
+            logger.exception("Dropped %s buffered queries: failed to write spool file", len(rows))
+            return
+        self.spooled += len(rows)
+
+    async def _replay_spool(self) -> None:
+        """Загружает строки из spool-файла и удаляет его при успехе."""
+        if self._spool_path is None or not self._spool_path.exists():
+            return
+        try:
+            rows = await asyncio.to_thread(_read_spool, self._spool_path)
+        except OSError:
+            logger.exception("Failed to read spool file %s", self._spool_path)
+            return
+        if rows and not await self._copy(rows):
+            return
+        self._spool_path.unlink(missing_ok=True)
+        self.spooled = 0
+
+
+def _append_spool(path: Path, rows: list[QueryRow]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as file:
+        for *values, created_at, finished_at in rows:
+            file.write(json.dumps([*values, created_at.isoformat(), finished_at.isoformat()]) + "\n")
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def _read_spool(path: Path) -> list[QueryRow]:
+    rows = []
+    with path.open(encoding="utf-8") as file:
+        for line in file:
+            try:
+                *values, created_at, finished_at = json.loads(line)
+                rows.append((*values, datetime.fromisoformat(created_at), datetime.fromisoformat(finished_at)))
+            except (ValueError, TypeError):
+                # Неполная строка, оборванная при аварийной остановке, или повреждённая запись
+                logger.warning("Skipped malformed spool line: %r", line)
+    return rows
+
+
+query_writer = QueryWriteBuffer()
@@ -0,0 +1,121 @@
+import hashlib
+import time
+from typing import Any
+
+from auth.schemas import UserDTO
+from core.cache import TTLCache
+from core.config import settings
+
+
+class UserCache:
+    """In-process кэш пользователей по subject токена (email).
+
+    Время жизни записи ограничивает, как долго изменения пользователя в БД,
+    сделанные другим процессом, могут оставаться незамеченными.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        """Инициализирует кэш.
+
+        Args:
+            maxsize: Максимальное количество записей.
+            ttl: Время жизни записи в секундах; 0 отключает кэширование.
+        """
+        self.enabled = ttl > 0
+        self._cache: TTLCache[str, UserDTO] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.stats = self._cache.stats
+
+    def get(self, subject: str) -> UserDTO | None:
+        """Возвращает пользователя из кэша.
+
+        Args:
+            subject: Subject токена (email пользователя).
+
+        Returns:
+            Объект пользователя или None при промахе.
+        """
+        if not self.enabled:
+            return None
+        return self._cache.get(subject)
+
+    def set(self, subject: str, user: UserDTO) -> None:
+        """Сохраняет пользователя в кэше.
+
+        Args:
+            subject: Subject токена (email пользователя).
+            user: Объект пользователя.
+        """
+        if self.enabled:
+            self._cache.set(subject, user)
+
+    def invalidate(self, subject: str) -> None:
+        """Удаляет пользователя из кэша, например, после его деактивации.
+
+        Args:
+            subject: Subject токена (email пользователя).
+        """
+        self._cache.delete(subject)
+
+    def clear(self) -> None:
+        """Удаляет всех пользователей из кэша."""
+        self._cache.clear()
+
+
+class TokenCache:
+    """In-process кэш payload уже проверенных JWT-токенов.
+
+    Ключ — SHA-256 от токена, поэтому сами токены в памяти не хранятся.
+    Запись живёт до истечения срока действия токена (`exp`).
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        """Инициализирует кэш.
+
+        Args:
+            maxsize: Максимальное количество записей; 0 отключает кэширование.
+        """
+        self.enabled = maxsize > 0
+        self._cache: TTLCache[bytes, dict[str, Any]] = TTLCache(maxsize=maxsize, ttl=0)
+        self.stats = self._cache.stats
+
+    @staticmethod
+    def _key(token: str | bytes) -> bytes:
+        return hashlib.sha256(token.encode() if isinstance(token, str) else token).digest()
+
+    def get(self, token: str | bytes) -> dict[str, Any] | None:
+        """Возвращает payload проверенного токена.
+
+        Args:
+            token: Строка или байты токена.
+
+        Returns:
+            Копия payload или None при промахе.
+        """
+        if not self.enabled:
+            return None
+        payload = self._cache.get(self._key(token))
+        return dict(payload) if payload is not None else None
+
+    def set(self, token: str | bytes, payload: dict[str, Any]) -> None:
+        """Сохраняет payload проверенного токена до истечения его срока действия.
+
+        Токены без `exp` не кэшируются.
+
+        Args:
+            token: Строка или байты токена.
+            payload: Проверенный payload токена.
+        """
+        exp = payload.get("exp")
+        if not self.enabled or not isinstance(exp, (int, float)):
+            return
+        ttl = exp - time.time()
+        if ttl > 0:
+            self._cache.set(self._key(token), dict(payload), ttl=ttl)
+
+    def clear(self) -> None:
+        """Удаляет все записи."""
+        self._cache.clear()
+
+
+token_cache = TokenCache(maxsize=settings.AUTH_TOKEN_CACHE_MAXSIZE)
+user_cache = UserCache(maxsize=settings.AUTH_USER_CACHE_MAXSIZE, ttl=settings.AUTH_USER_CACHE_TTL)
@@ -4,20 +4,57 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jwt.exceptions import InvalidTokenError
 
+from auth.cache import user_cache
+from auth.exceptions import PasswordHasherBusy
+from auth.hashing import PasswordHasher, password_hasher
 from auth.schemas import UserDTO
-from auth.utils import decode_jwt, get_user_by_email, record_to_model, validate_password
+from auth.utils import decode_jwt_cached, get_user_by_email, record_to_model
+from core.config import settings
 from core.deps import DbInstanceDep
 
 
+# ===== Хеширование паролей =====
+def get_password_hasher() -> PasswordHasher:
+    """Возвращает пул потоков для хеширования паролей.
+
+    Returns:
+        Экземпляр класса PasswordHasher.
+    """
+    return password_hasher
+
+
+PasswordHasherDep = Annotated[PasswordHasher, Depends(get_password_hasher)]
+
+
+def password_hasher_busy(exc_info: PasswordHasherBusy) -> HTTPException:
+    """Формирует ответ 503 с заголовком Retry-After при переполнении пула хеширования.
+
+    Args:
+        exc_info: Исключение переполнения пула.
+
+    Returns:
+        HTTP-исключение для выброса из обработчика.
+    """
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(exc_info),
+        headers={"Retry-After": str(settings.BCRYPT_RETRY_AFTER)},
+    )
+
+
 # ===== Аутентификация пользователя через форму (логин, пароль) =====
 async def validate_auth_user(
     db: DbInstanceDep,
+    hasher: PasswordHasherDep,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> UserDTO:
     """Проверяет логин и пароль пользователя.
 
+    Если хеш пароля посчитан с устаревшим cost factor, он пересчитывается и сохраняется.
+
     Args:
         db: Экземпляр подключения к базе данных.
+        hasher: Пул потоков для хеширования паролей.
         form_data: Данные формы OAuth2 с полями username (email) и password.
 
     Returns:
@@ -26,13 +63,26 @@ async def validate_auth_user(
     Raises:
         HTTPException: 401 если пользователь не найден или пароль неверен.
         HTTPException: 403 если пользователь не активен.
+        HTTPException: 503 если пул хеширования паролей переполнен.
     """
     record = await get_user_by_email(db, email=form_data.username)
-    if not record or not validate_password(form_data.password, record.get("hashed_password")):
+    try:
+        valid = bool(record) and await hasher.verify(form_data.password, record.get("hashed_password"))
+    except PasswordHasherBusy as exc_info:
+        raise password_hasher_busy(exc_info)
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid username or password")
     if not record.get("active"):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="user inactive")
-    return record_to_model(record, UserDTO)
+
+    user = record_to_model(record, UserDTO)
+    if hasher.needs_rehash(user.hashed_password):
+        try:
+            user.hashed_password = await hasher.hash(form_data.password)
+        except PasswordHasherBusy:
+            return user  # пересчитаем при следующем входе
+        await db.execute("UPDATE users SET hashed_password = $2 WHERE id = $1", user.id, user.hashed_password)
+    return user
 
 
 AuthUser = Annotated[UserDTO, Depends(validate_auth_user)]
@@ -55,7 +105,7 @@ def get_current_token_payload(token: Annotated[str, Depends(oauth2_scheme)]) ->
         HTTPException: 401 если токен недействителен.
     """
     try:
-        return decode_jwt(token)
+        return decode_jwt_cached(token)
     except InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -67,7 +117,10 @@ async def get_current_auth_user(
     db: DbInstanceDep,
     payload: Annotated[dict, Depends(get_current_token_payload)],
 ) -> UserDTO:
-    """Получает пользователя из базы данных по email из payload токена.
+    """Получает пользователя по email из payload токена.
+
+    Пользователь берётся из подписанных claims токена (если включено `AUTH_TRUST_TOKEN_CLAIMS`),
+    затем из кэша пользователей и только при промахе — из базы данных.
 
     Args:
         db: Экземпляр подключения к базе данных.
@@ -79,10 +132,19 @@ async def get_current_auth_user(
     Raises:
         HTTPException: 401 если пользователь не найден.
     """
-    record = await get_user_by_email(db, email=payload.get("sub"))
+    subject = payload.get("sub")
+    if settings.AUTH_TRUST_TOKEN_CLAIMS and "uid" in payload and "active" in payload:
+        return UserDTO(id=payload["uid"], email=subject, active=payload["active"])
+
+    user = user_cache.get(subject)
+    if user is not None:
+        return user
+    record = await get_user_by_email(db, email=subject)
     if not record:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="token user not found")
-    return record_to_model(record, UserDTO)
+    user = record_to_model(record, UserDTO)
+    user_cache.set(subject, user)
+    return user
 
 
 def get_current_active_auth_user(user: Annotated[UserDTO, Depends(get_current_auth_user)]) -> UserDTO:
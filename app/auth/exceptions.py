@@ -0,0 +1,7 @@
+class PasswordHasherBusy(Exception):
+    """
+    Исключение, которое выбрасывается, если очередь задач хеширования паролей переполнена.
+    Используется для сброса нагрузки (load-shedding) вместо бесконечного ожидания.
+    """
+
+    pass
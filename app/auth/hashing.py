@@ -0,0 +1,95 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from auth.exceptions import PasswordHasherBusy
+from auth.utils import hash_password, validate_password
+from core.config import settings
+from core.metrics import metrics
+
+T = TypeVar("T")
+
+
+class PasswordHasher:
+    """Выполняет bcrypt в отдельном пуле потоков, не блокируя event loop.
+
+    bcrypt освобождает GIL на время вычисления хеша, поэтому пула потоков достаточно.
+    Количество ожидающих задач ограничено: при переполнении выбрасывается `PasswordHasherBusy`.
+    """
+
+    def __init__(self, rounds: int, max_workers: int, max_pending: int) -> None:
+        """Инициализирует пул потоков.
+
+        Args:
+            rounds: Cost factor bcrypt для новых хешей.
+            max_workers: Количество потоков пула.
+            max_pending: Максимальное количество задач в пуле (выполняющихся и ожидающих).
+        """
+        self.rounds = rounds
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        """Выполняет функцию в пуле потоков с учётом ограничения очереди.
+
+        Raises:
+            PasswordHasherBusy: Если в пуле уже `max_pending` задач.
+        """
+        if self.pending >= self.max_pending:
+            raise PasswordHasherBusy("Too many password operations in progress")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        """Хеширует пароль с текущим cost factor.
+
+        Args:
+            password: Открытый текст пароля.
+
+        Returns:
+            Хешированный пароль.
+        """
+        with metrics.span("auth.bcrypt.hash"):
+            return await self._run(hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Проверяет соответствие пароля его хешу.
+
+        Args:
+            password: Открытый текст пароля.
+            hashed_password: Хешированный пароль.
+
+        Returns:
+            True, если пароль верен. Иначе False.
+        """
+        with metrics.span("auth.bcrypt.verify"):
+            return await self._run(validate_password, password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Проверяет, отличается ли cost factor хеша от текущего.
+
+        Args:
+            hashed_password: Хешированный пароль в формате `$2b$<cost>$...`.
+
+        Returns:
+            True, если хеш нужно пересчитать.
+        """
+        try:
+            return int(hashed_password.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def shutdown(self) -> None:
+        """Останавливает пул потоков."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    max_workers=settings.BCRYPT_MAX_WORKERS,
+    max_pending=settings.BCRYPT_MAX_PENDING,
+)
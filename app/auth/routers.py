@@ -1,8 +1,10 @@
 from fastapi import APIRouter, HTTPException, status
 
-from auth.deps import AuthUser
+from auth.cache import user_cache
+from auth.deps import AuthUser, PasswordHasherDep, password_hasher_busy
+from auth.exceptions import PasswordHasherBusy
 from auth.schemas import MessageResponse, TokenInfo, UserRegisterDTO
-from auth.utils import encode_jwt, hash_password
+from auth.utils import encode_jwt
 from core.deps import DbInstanceDep
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
@@ -15,14 +17,18 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
     description=(
         "Регистрирует нового пользователя по указанному email и паролю.\n\n"
         "- Если пользователь с таким email уже существует, возвращает ошибку 409.\n"
-        "- Пароль хешируется перед сохранением в базе данных."
+        "- Пароль хешируется перед сохранением в базе данных.\n"
+        "- Если сервис перегружен хешированием паролей, возвращает ошибку 503 с заголовком `Retry-After`."
     ),
 )
-async def register(data: UserRegisterDTO, db: DbInstanceDep) -> MessageResponse:
+async def register(data: UserRegisterDTO, db: DbInstanceDep, hasher: PasswordHasherDep) -> MessageResponse:
     existing = await db.fetch("SELECT id FROM users WHERE email = $1", data.email)
     if existing:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User already exists")
-    hashed = hash_password(data.password)
+    try:
+        hashed = await hasher.hash(data.password)
+    except PasswordHasherBusy as exc_info:
+        raise password_hasher_busy(exc_info)
     await db.execute("INSERT INTO users (email, hashed_password) VALUES ($1, $2)", data.email, hashed)
     return MessageResponse(message="User registered successfully")
 
@@ -43,6 +49,9 @@ def login(user: AuthUser) -> TokenInfo:
         payload={
             "sub": user.email,
             "email": user.email,
+            "uid": user.id,
+            "active": user.active,
         }
     )
+    user_cache.set(user.email, user)
     return TokenInfo(access_token=token, token_type="Bearer")
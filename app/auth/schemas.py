@@ -31,7 +31,7 @@ class TokenInfo(BaseModel):
 class UserDTO(BaseModel):
     id: int = Field(..., ge=0)
     email: EmailStr
-    hashed_password: str
+    hashed_password: str | None = None
     active: bool = True
 
 
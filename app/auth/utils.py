@@ -3,16 +3,24 @@ from typing import Any, Type, TypeVar
 
 import bcrypt
 import jwt
+from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
 from pydantic import BaseModel
 
+from auth.cache import token_cache, user_cache
 from auth.schemas import UserDTO
 from core.config import settings
 from core.deps import DbInstanceDep
+from core.metrics import metrics
+
+# Ключи разбираются один раз при импорте; PyJWT принимает готовые объекты ключей
+# и не парсит PEM при каждой подписи и проверке.
+PRIVATE_KEY = load_pem_private_key(settings.jwt.private_key_path.read_bytes(), password=None)
+PUBLIC_KEY = load_pem_public_key(settings.jwt.public_key_path.read_bytes())
 
 
 def encode_jwt(
     payload: dict[str, Any],
-    private_key: str = settings.jwt.private_key_path.read_text(),
+    private_key: Any = PRIVATE_KEY,
     algorithm: str = settings.jwt.algorithm,
     expire_minutes: int = settings.jwt.access_token_expire_minutes,
     expire_timedelta: timedelta | None = None,
@@ -21,7 +29,7 @@ def encode_jwt(
 
     Args:
         payload: Словарь с полезной нагрузкой токена.
-        private_key: Приватный ключ для подписи токена.
+        private_key: Приватный ключ для подписи токена (PEM-строка или объект ключа).
         algorithm: Алгоритм шифрования токена.
         expire_minutes: Время жизни токена в минутах.
         expire_timedelta: Альтернативное указание времени жизни токена.
@@ -38,32 +46,53 @@ def encode_jwt(
 
 def decode_jwt(
     token: str | bytes,
-    public_key: str = settings.jwt.public_key_path.read_text(),
+    public_key: Any = PUBLIC_KEY,
     algorithm: str = settings.jwt.algorithm,
 ) -> Any:
     """Декодирует JWT-токен.
 
     Args:
         token: Строка или байты токена.
-        public_key: Публичный ключ для проверки подписи токена.
+        public_key: Публичный ключ для проверки подписи токена (PEM-строка или объект ключа).
         algorithm: Алгоритм, которым был подписан токен.
 
     Returns:
         Раскодированный payload токена в виде словаря.
     """
-    return jwt.decode(token, public_key, algorithms=[algorithm])
+    with metrics.span("auth.decode_jwt"):
+        return jwt.decode(token, public_key, algorithms=[algorithm])
+
+
+def decode_jwt_cached(token: str | bytes) -> dict[str, Any]:
+    """Декодирует JWT-токен ключом из настроек, повторно не проверяя уже проверенные токены.
+
+    Args:
+        token: Строка или байты токена.
 
+    Returns:
+        Раскодированный payload токена в виде словаря.
+
+    Raises:
+        InvalidTokenError: Если токен недействителен.
+    """
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = decode_jwt(token)
+        token_cache.set(token, payload)
+    return payload
 
-def hash_password(password: str) -> str:
+
+def hash_password(password: str, rounds: int = settings.BCRYPT_ROUNDS) -> str:
     """Хеширует пароль с использованием bcrypt.
 
     Args:
         password: Открытый текст пароля.
+        rounds: Cost factor bcrypt.
 
     Returns:
         Хешированный пароль.
     """
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=rounds)
     return bcrypt.hashpw(password.encode(), salt).decode("utf-8")
 
 
@@ -83,6 +112,9 @@ def validate_password(password: str, hashed_password: str) -> bool:
 async def get_user_by_email(db: DbInstanceDep, email: str) -> UserDTO | None:
     """Ищет пользователя в базе по email.
 
+    Чтение выполняется на основном сервере: вход сразу после регистрации приходит отдельным
+    запросом, и отстающая реплика могла бы ещё не содержать нового пользователя.
+
     Args:
         db: Экземпляр подключения к базе данных.
         email: Email пользователя.
@@ -93,6 +125,18 @@ async def get_user_by_email(db: DbInstanceDep, email: str) -> UserDTO | None:
     return await db.fetchrow("SELECT * FROM users WHERE email = $1", email)
 
 
+async def set_user_active(db: DbInstanceDep, email: str, active: bool) -> None:
+    """Активирует или деактивирует пользователя и сбрасывает его запись в кэше.
+
+    Args:
+        db: Экземпляр подключения к базе данных.
+        email: Email пользователя.
+        active: Новое значение признака активности.
+    """
+    await db.execute("UPDATE users SET active = $2 WHERE email = $1", email, active)
+    user_cache.invalidate(email)
+
+
 T = TypeVar("T", bound=BaseModel)
 
 
@@ -108,4 +152,4 @@ def record_to_model(record: dict[Any, Any], model_class: Type[T]) -> T:
     """
     if not isinstance(record, dict):
         record = dict(record)
-    return model_class.parse_obj(record)
+    return model_class.model_validate(record)
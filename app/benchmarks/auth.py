@@ -0,0 +1,76 @@
+"""Микробенчмарк накладных расходов на проверку JWT в одном запросе.
+
+Сравнивает прежний путь (PEM-строка, разбираемая PyJWT при каждой проверке),
+проверку готовым объектом ключа и кэш уже проверенных токенов для RS256, ES256 и EdDSA.
+
+Запуск из каталога `app`:
+
+    python -m benchmarks.auth --iterations 2000
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Callable
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from auth.cache import TokenCache
+from auth.utils import decode_jwt, encode_jwt
+
+KEY_FACTORIES: dict[str, Callable[[], Any]] = {
+    "RS256": lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048),
+    "ES256": lambda: ec.generate_private_key(ec.SECP256R1()),
+    "EdDSA": lambda: ed25519.Ed25519PrivateKey.generate(),
+}
+
+
+def measure(fn: Callable[[], Any], iterations: int) -> float:
+    """Возвращает среднее время одного вызова в микросекундах."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def run(iterations: int) -> list[dict[str, Any]]:
+    """Измеряет время проверки токена для всех алгоритмов и способов.
+
+    Args:
+        iterations: Количество проверок на каждый замер.
+
+    Returns:
+        Список результатов замеров.
+    """
+    results = []
+    for algorithm, key_factory in KEY_FACTORIES.items():
+        private_key = key_factory()
+        public_key = private_key.public_key()
+        public_pem = public_key.public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode()
+        token = encode_jwt({"sub": "user@example.com"}, private_key=private_key, algorithm=algorithm)
+        cache = TokenCache(maxsize=1000)
+
+        def cached() -> Any:
+            payload = cache.get(token)
+            if payload is None:
+                payload = decode_jwt(token, public_key=public_key, algorithm=algorithm)
+                cache.set(token, payload)
+            return payload
+
+        for mode, fn in (
+            ("pem", lambda: decode_jwt(token, public_key=public_pem, algorithm=algorithm)),
+            ("key_object", lambda: decode_jwt(token, public_key=public_key, algorithm=algorithm)),
+            ("cached", cached),
+        ):
+            results.append({"algorithm": algorithm, "mode": mode, "us_per_request": round(measure(fn, iterations), 2)})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.iterations), indent=2))
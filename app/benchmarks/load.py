@@ -0,0 +1,244 @@
+"""Нагрузочный бенчмарк приложения с детерминированным эмулятором внешнего сервиса.
+
+Запускает приложение (`main.app`) с локальной БД из настроек, подменяет внешний сервис
+транспортом `ExternalStandIn` и прогоняет сценарии `login`, `query` и `history` с заданной
+параллельностью. Отчёт в JSON содержит RPS, p50/p95/p99 и количество запросов к БД на запрос.
+
+Запуск из каталога `app` (миграции должны быть применены):
+
+    python -m benchmarks.load --requests 2000 --concurrency 100 --seed 42 --output benchmark.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import subprocess
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, get_args
+
+import httpx
+
+from benchmarks.stand_in import EmulatorSettings, ExternalStandIn, LatencyModel
+from core.config import settings
+from core.database import db
+from core.http_client import http_client
+from main import app
+
+SCENARIOS = ("login", "query", "history")
+
+
+def percentile(sorted_values: list[float], q: float) -> float | None:
+    """Возвращает квантиль отсортированных значений (метод ближайшего ранга).
+
+    Args:
+        sorted_values: Значения по возрастанию.
+        q: Квантиль от 0 до 1.
+
+    Returns:
+        Значение квантиля или None, если значений нет.
+    """
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values), max(1, math.ceil(q * len(sorted_values)))) - 1]
+
+
+@dataclass
+class ScenarioResult:
+    """Результаты прогона одного сценария."""
+
+    latencies: list[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    db_queries: int = 0
+    elapsed: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Возвращает сводку прогона.
+
+        Returns:
+            Словарь с RPS, квантилями задержки в секундах, кодами ответов и запросами к БД на запрос.
+        """
+        latencies = sorted(self.latencies)
+        requests = len(latencies)
+        return {
+            "requests": requests,
+            "errors": sum(count for status_code, count in self.statuses.items() if status_code >= 400),
+            "statuses": {str(status_code): count for status_code, count in sorted(self.statuses.items())},
+            "elapsed": self.elapsed,
+            "rps": requests / self.elapsed if self.elapsed else None,
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "db_round_trips_per_request": self.db_queries / requests if requests else None,
+        }
+
+
+async def run_scenario(
+    send: Callable[[int], Awaitable[httpx.Response]],
+    requests: int,
+    concurrency: int,
+) -> ScenarioResult:
+    """Отправляет `requests` запросов не более чем `concurrency` одновременно.
+
+    Args:
+        send: Функция, отправляющая запрос с заданным порядковым номером.
+        requests: Общее количество запросов.
+        concurrency: Количество одновременно работающих клиентов.
+
+    Returns:
+        Задержки, коды ответов и количество запросов к БД за прогон.
+    """
+    result = ScenarioResult()
+    next_index = iter(range(requests))
+
+    async def worker() -> None:
+        for index in next_index:
+            started_at = time.perf_counter()
+            response = await send(index)
+            result.latencies.append(time.perf_counter() - started_at)
+            result.statuses[response.status_code] += 1
+
+    queries_before = db.metrics.queries_total
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - started_at
+    result.db_queries = db.metrics.queries_total - queries_before
+    return result
+
+
+def make_cadastral_numbers(count: int, rng: random.Random) -> list[str]:
+    """Генерирует валидные кадастровые номера нового образца.
+
+    Args:
+        count: Количество номеров.
+        rng: Генератор случайных чисел.
+
+    Returns:
+        Список кадастровых номеров.
+    """
+    return [
+        f"{rng.randint(1, 99):02d}:{rng.randint(1, 99):02d}:{rng.randint(0, 9_999_999):07d}:{rng.randint(10, 9999)}"
+        for _ in range(count)
+    ]
+
+
+def git_commit() -> str | None:
+    """Возвращает хеш текущего коммита, чтобы результаты можно было сравнивать между коммитами."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict[str, Any]:
+    """Запускает приложение с эмулятором внешнего сервиса и прогоняет выбранные сценарии.
+
+    Args:
+        args: Аргументы командной строки.
+
+    Returns:
+        Отчёт в виде словаря.
+    """
+    rng = random.Random(args.seed)
+    stand_in = ExternalStandIn(
+        EmulatorSettings(
+            latency_model=args.latency_model,
+            latency=args.latency,
+            latency_low=args.latency_low,
+            latency_high=args.latency_high,
+            latency_sigma=args.latency_sigma,
+            trace_path=args.trace_path,
+            seed=args.seed,
+            error_rate=args.error_rate,
+            timeout_rate=args.timeout_rate,
+            timeout_delay=args.timeout_delay,
+        )
+    )
+    http_client.transport = stand_in
+    # Фоновое обслуживание секций не должно влиять на подсчёт запросов к БД
+    settings.QUERY_PARTITION_MAINTENANCE_ENABLED = False
+    numbers = make_cadastral_numbers(args.numbers, rng)
+    credentials = {"username": args.email, "password": args.password}
+
+    report: dict[str, Any] = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "config": vars(args),
+        "scenarios": {},
+    }
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            await client.post("/auth/register", json={"email": args.email, "password": args.password})
+            response = await client.post("/auth/login", data=credentials)
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            senders: dict[str, Callable[[int], Awaitable[httpx.Response]]] = {
+                "login": lambda index: client.post("/auth/login", data=credentials),
+                "query": lambda index: client.post(
+                    "/query",
+                    headers=headers,
+                    json={
+                        "cadastral_number": numbers[index % len(numbers)],
+                        "latitude": round(rng.uniform(-90, 90), 6),
+                        "longitude": round(rng.uniform(-180, 180), 6),
+                    },
+                ),
+                "history": lambda index: client.get("/history", headers=headers, params={"limit": args.history_limit}),
+            }
+            for name in args.scenarios:
+                result = await run_scenario(senders[name], args.requests, args.concurrency)
+                report["scenarios"][name] = result.as_dict()
+    report["external_calls"] = stand_in.calls
+    return report
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Разбирает аргументы командной строки.
+
+    Args:
+        argv: Аргументы (по умолчанию — `sys.argv`).
+
+    Returns:
+        Разобранные аргументы.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=1000, help="запросов на сценарий")
+    parser.add_argument("--concurrency", type=int, default=50, help="одновременных клиентов")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--numbers", type=int, default=1000, help="различных кадастровых номеров")
+    parser.add_argument("--history-limit", type=int, default=20)
+    parser.add_argument("--latency-model", choices=get_args(LatencyModel), default="fixed")
+    parser.add_argument("--latency", type=float, default=0.01, help="задержка (fixed) или медиана (lognormal)")
+    parser.add_argument("--latency-low", type=float, default=0.005)
+    parser.add_argument("--latency-high", type=float, default=0.05)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--trace-path", type=Path, help="файл с задержками для модели trace")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-delay", type=float, default=30.0)
+    parser.add_argument("--email", default="benchmark@example.com")
+    parser.add_argument("--password", default="benchmark-password")
+    parser.add_argument("--output", help="файл для отчёта (по умолчанию — stdout)")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = json.dumps(asyncio.run(run_benchmark(args)), indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(report + "\n")
+    else:
+        print(report)
@@ -0,0 +1,81 @@
+import importlib.util
+import json
+import sys
+from pathlib import Path
+from types import ModuleType
+
+import httpx
+
+# Эмулятор из `external_app/emulator.py` (только стандартная библиотека): бенчмарк и сервис-эмулятор
+# используют одни и те же модели задержек, внедрение ошибок и ответы
+EMULATOR_PATH = Path(__file__).resolve().parents[2] / "external_app" / "emulator.py"
+
+
+def load_emulator(path: Path = EMULATOR_PATH) -> ModuleType:
+    """Загружает модуль эмулятора внешнего сервиса по пути к файлу.
+
+    Модуль регистрируется под именем `external_emulator`, чтобы не пересекаться с модулями
+    приложения (`main`, `schemas`) каталога `external_app`.
+
+    Args:
+        path: Путь к `emulator.py`.
+
+    Returns:
+        Загруженный модуль.
+    """
+    name = "external_emulator"
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+emulator = load_emulator()
+Emulator = emulator.Emulator
+EmulatorSettings = emulator.EmulatorSettings
+LatencyModel = emulator.LatencyModel
+Outcome = emulator.Outcome
+cadastral_result = emulator.cadastral_result
+
+
+class ExternalStandIn(httpx.AsyncBaseTransport):
+    """Транспорт httpx, эмулирующий внешний сервис без сети.
+
+    Отвечает на `POST /result` и пакетный `POST /results` так же, как `external_app`: задержка,
+    внедрённые `503` и «зависания» с ответом `504` и результаты берутся из `Emulator`. При одинаковых
+    зерне `EmulatorSettings.seed` и порядке обращений прогоны воспроизводимы.
+    """
+
+    def __init__(self, settings: EmulatorSettings) -> None:
+        """Инициализирует эмулятор.
+
+        Args:
+            settings: Настройки эмулятора (модель задержек, доли ошибок и таймаутов, зерно).
+        """
+        self.emulator = Emulator(settings)
+        self.calls = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        if request.method != "POST" or request.url.path not in ("/result", "/results"):
+            return httpx.Response(404, json={"detail": "Not Found"})
+
+        payload = json.loads(await request.aread())
+        batch = request.url.path == "/results"
+        if batch and len(payload["items"]) > self.emulator.settings.batch_max_size:
+            return httpx.Response(413, json={"detail": "Batch is too large"})
+
+        outcome = await self.emulator.respond()
+        if outcome == Outcome.error:
+            return httpx.Response(503, json={"detail": "Injected error"})
+        if outcome == Outcome.timeout:
+            return httpx.Response(504, json={"detail": "Injected timeout"})
+        if batch:
+            return httpx.Response(
+                200, json={"results": [self.emulator.result(item["cadastral_number"]) for item in payload["items"]]}
+            )
+        return httpx.Response(200, json={"result": self.emulator.result(payload["cadastral_number"])})
@@ -0,0 +1,106 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Generic, Sequence, TypeVar
+
+from core.metrics import Histogram
+
+K = TypeVar("K")
+T = TypeVar("T")
+
+
+class MicroBatcher(Generic[K, T]):
+    """Объединяет одновременные вызовы в пакеты.
+
+    Элементы копятся не дольше `window` секунд с момента появления первого элемента пакета
+    или до `max_size` штук, после чего отправляются одним вызовом `send_batch`. Результаты
+    раздаются ожидающим в порядке элементов. Исключение `send_batch` получают все ожидающие
+    пакета. Отменённые до отправки элементы в пакет не попадают.
+    """
+
+    def __init__(
+        self,
+        send_batch: Callable[[list[K]], Awaitable[Sequence[T]]],
+        max_size: int,
+        window: float,
+    ) -> None:
+        """Инициализирует пустой пакет.
+
+        Args:
+            send_batch: Функция, обрабатывающая пакет и возвращающая результаты в том же порядке.
+            max_size: Максимальный размер пакета.
+            window: Максимальное время накопления пакета в секундах.
+        """
+        self.send_batch = send_batch
+        self.max_size = max_size
+        self.window = window
+        self.batches = 0
+        self.items = 0
+        self.sizes = Histogram(buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000))
+        self._pending: list[tuple[K, asyncio.Future[T]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, item: K) -> T:
+        """Добавляет элемент в текущий пакет и ждёт его результат.
+
+        Args:
+            item: Элемент пакета.
+
+        Returns:
+            Результат для этого элемента.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[T] = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        """Отправляет накопленный пакет, не дожидаясь окончания окна."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = [(item, future) for item, future in self._pending if not future.done()]
+        self._pending = []
+        if not batch:
+            return
+        task = asyncio.create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: list[tuple[K, asyncio.Future[T]]]) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        self.sizes.observe(len(batch))
+        try:
+            results = await self.send_batch([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"Expected {len(batch)} results, got {len(results)}")
+        except asyncio.CancelledError:
+            # При остановке приложения ожидающие не должны зависнуть
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as exc_info:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc_info)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict[str, Any]:
+        """Возвращает статистику пакетов.
+
+        Returns:
+            Словарь с количеством пакетов, элементов, ожидающих элементов и распределением размеров пакетов.
+        """
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "pending": len(self._pending),
+            "batch_size": self.sizes.as_dict(),
+        }
@@ -0,0 +1,102 @@
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    """Счётчики обращений к кэшу."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля попаданий среди всех обращений к кэшу."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Возвращает счётчики в виде словаря.
+
+        Returns:
+            Словарь со счётчиками и долей попаданий.
+        """
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+
+class TTLCache(Generic[K, V]):
+    """In-process LRU-кэш с ограничением по размеру и времени жизни записей.
+
+    Значение `None` не хранится: `get` возвращает `None` при промахе.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        """Инициализирует пустой кэш.
+
+        Args:
+            maxsize: Максимальное количество записей.
+            ttl: Время жизни записи в секундах по умолчанию.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K) -> V | None:
+        """Возвращает значение по ключу и помечает запись как недавно использованную.
+
+        Args:
+            key: Ключ записи.
+
+        Returns:
+            Значение или None, если записи нет или её время жизни истекло.
+        """
+        item = self._data.get(key)
+        if item is None:
+            self.stats.misses += 1
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """Сохраняет значение, вытесняя самые давно использованные записи при переполнении.
+
+        Args:
+            key: Ключ записи.
+            value: Значение.
+            ttl: Время жизни записи в секундах (по умолчанию `self.ttl`).
+        """
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    def delete(self, key: K) -> None:
+        """Удаляет запись по ключу, если она есть.
+
+        Args:
+            key: Ключ записи.
+        """
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Удаляет все записи."""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
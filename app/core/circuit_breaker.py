@@ -0,0 +1,152 @@
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Callable
+
+
+class CircuitState(str, Enum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Исключение, которое выбрасывается, если вызов отклонён разомкнутым автоматом."""
+
+    pass
+
+
+class CircuitBreaker:
+    """Автоматический выключатель для вызовов нестабильного сервиса.
+
+    - `closed` — вызовы разрешены; по последним `window` вызовам считаются доли ошибок
+      и медленных вызовов. Если одна из них достигает порога (при не менее чем `min_calls`
+      вызовах), автомат размыкается.
+    - `open` — вызовы сразу отклоняются в течение `open_duration` секунд.
+    - `half_open` — разрешено не больше `half_open_calls` пробных вызовов; если все они
+      успешны, автомат замыкается, при первой ошибке снова размыкается.
+    """
+
+    def __init__(
+        self,
+        *,
+        window: int = 50,
+        min_calls: int = 20,
+        failure_rate: float = 0.5,
+        slow_call_duration: float = 4.0,
+        slow_call_rate: float = 0.8,
+        open_duration: float = 10.0,
+        half_open_calls: int = 3,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Инициализирует замкнутый автомат.
+
+        Args:
+            window: Количество последних вызовов, по которым считаются доли.
+            min_calls: Минимальное количество вызовов в окне для размыкания.
+            failure_rate: Доля ошибок, при которой автомат размыкается.
+            slow_call_duration: Длительность в секундах, начиная с которой вызов считается медленным.
+            slow_call_rate: Доля медленных вызовов, при которой автомат размыкается.
+            open_duration: Время в секундах, в течение которого вызовы отклоняются.
+            half_open_calls: Количество пробных вызовов в состоянии `half_open`.
+            clock: Источник монотонного времени.
+        """
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate = slow_call_rate
+        self.open_duration = open_duration
+        self.half_open_calls = half_open_calls
+        self.rejected = 0
+        self._clock = clock
+        self._outcomes: deque[tuple[bool, bool]] = deque(maxlen=window)  # (ошибка, медленный)
+        self._state = CircuitState.closed
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+
+    @property
+    def state(self) -> CircuitState:
+        """Текущее состояние с учётом истечения `open_duration`."""
+        if self._state == CircuitState.open and self._clock() - self._opened_at >= self.open_duration:
+            self._state = CircuitState.half_open
+            self._probes = self._probe_successes = 0
+        return self._state
+
+    def allow(self) -> None:
+        """Проверяет, можно ли выполнить вызов, и занимает слот пробного вызова в `half_open`.
+
+        Raises:
+            CircuitOpenError: Если автомат разомкнут или все пробные вызовы уже выполняются.
+        """
+        state = self.state
+        if state == CircuitState.open or (state == CircuitState.half_open and self._probes >= self.half_open_calls):
+            self.rejected += 1
+            raise CircuitOpenError("Circuit is open")
+        if state == CircuitState.half_open:
+            self._probes += 1
+
+    def record_success(self, duration: float) -> None:
+        """Учитывает успешный вызов.
+
+        Args:
+            duration: Длительность вызова в секундах.
+        """
+        if self._state == CircuitState.half_open:
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_calls:
+                self._close()
+            return
+        self._record(failed=False, slow=duration >= self.slow_call_duration)
+
+    def record_failure(self) -> None:
+        """Учитывает неудачный вызов (ошибку или таймаут)."""
+        if self._state == CircuitState.half_open:
+            self._open()
+            return
+        self._record(failed=True, slow=False)
+
+    def record_cancelled(self) -> None:
+        """Освобождает слот пробного вызова, если вызов был отменён, не дав результата."""
+        if self._state == CircuitState.half_open and self._probes:
+            self._probes -= 1
+
+    def reset(self) -> None:
+        """Замыкает автомат и очищает окно вызовов."""
+        self._close()
+        self.rejected = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Возвращает состояние автомата.
+
+        Returns:
+            Словарь с состоянием, долями ошибок и медленных вызовов в окне и числом отклонённых вызовов.
+        """
+        calls = len(self._outcomes)
+        return {
+            "state": self.state.value,
+            "calls": calls,
+            "failure_rate": sum(failed for failed, _ in self._outcomes) / calls if calls else 0.0,
+            "slow_call_rate": sum(slow for _, slow in self._outcomes) / calls if calls else 0.0,
+            "rejected": self.rejected,
+        }
+
+    def _record(self, failed: bool, slow: bool) -> None:
+        self._outcomes.append((failed, slow))
+        calls = len(self._outcomes)
+        if self._state != CircuitState.closed or calls < self.min_calls:
+            return
+        failures = sum(failed for failed, _ in self._outcomes)
+        slow_calls = sum(slow for _, slow in self._outcomes)
+        if failures / calls >= self.failure_rate or slow_calls / calls >= self.slow_call_rate:
+            self._open()
+
+    def _open(self) -> None:
+        self._state = CircuitState.open
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+
+    def _close(self) -> None:
+        self._state = CircuitState.closed
+        self._outcomes.clear()
+        self._probes = self._probe_successes = 0
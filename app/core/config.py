@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from typing import Literal
 
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -10,7 +11,7 @@ BASE_DIR = Path(__file__).parent.parent
 class JWTSettings(BaseModel):
     private_key_path: Path = BASE_DIR / "certs" / "private.pem"
     public_key_path: Path = BASE_DIR / "certs" / "public.pem"
-    algorithm: str = "RS256"
+    algorithm: Literal["RS256", "ES256", "EdDSA"] = "RS256"
     access_token_expire_minutes: int = 15
 
 
@@ -21,7 +22,146 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
 
+    DB_POOL_MIN_SIZE: int = 10
+    DB_POOL_MAX_SIZE: int = 10
+    DB_POOL_MAX_INACTIVE_CONNECTION_LIFETIME: float = 300.0
+    # 0 отключает кэш подготовленных выражений (нужно для PgBouncer в режиме transaction pooling)
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_COMMAND_TIMEOUT: float | None = None
+    # SQL, выполняемый на каждом новом соединении пула
+    DB_INIT_SQL: str | None = None
+
+    # Реплики только для чтения: `host:port` через запятую, остальные параметры как у основного сервера
+    POSTGRES_REPLICA_HOSTS: str = ""
+    DB_READ_STRATEGY: Literal["round_robin", "least_loaded"] = "round_robin"
+    # Чтения после записи в рамках одного запроса выполняются на основном сервере
+    DB_READ_YOUR_WRITES: bool = True
+    DB_REPLICA_HEALTH_CHECK_INTERVAL: float = 5.0
+
     EXTERNAL_SERVICE_HOST: str
+    EXTERNAL_SERVICE_HTTP2: bool = False
+    EXTERNAL_SERVICE_MAX_CONNECTIONS: int = 100
+    EXTERNAL_SERVICE_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    EXTERNAL_SERVICE_KEEPALIVE_EXPIRY: float = 5.0
+    EXTERNAL_SERVICE_CONNECT_TIMEOUT: float = 5.0
+    EXTERNAL_SERVICE_READ_TIMEOUT: float = 5.0
+    EXTERNAL_SERVICE_WRITE_TIMEOUT: float = 5.0
+    EXTERNAL_SERVICE_POOL_TIMEOUT: float = 5.0
+
+    # Общий таймаут обращения к внешнему сервису; при адаптации — p99 последних задержек с запасом
+    EXTERNAL_ADAPTIVE_TIMEOUT: bool = True
+    EXTERNAL_ADAPTIVE_TIMEOUT_WINDOW: int = 200
+    EXTERNAL_ADAPTIVE_TIMEOUT_MIN_SAMPLES: int = 50
+    EXTERNAL_ADAPTIVE_TIMEOUT_MULTIPLIER: float = 1.5
+    EXTERNAL_TIMEOUT_MIN: float = 1.0
+    EXTERNAL_TIMEOUT_MAX: float = 10.0
+
+    # Повторы с экспоненциальной паузой и дублирующие (hedged) запросы в пределах общего срока
+    EXTERNAL_DEADLINE: float = 10.0
+    EXTERNAL_RETRY_ATTEMPTS: int = 3
+    EXTERNAL_RETRY_BACKOFF_BASE: float = 0.1
+    EXTERNAL_RETRY_BACKOFF_MAX: float = 1.0
+    EXTERNAL_HEDGE_ENABLED: bool = False
+    EXTERNAL_HEDGE_QUANTILE: float = 0.95
+    EXTERNAL_HEDGE_MIN_DELAY: float = 0.05
+    # Повторы и дубли вместе не превышают этой доли от исходных обращений (плюс запас BURST)
+    EXTERNAL_RETRY_BUDGET_RATIO: float = 0.2
+    EXTERNAL_RETRY_BUDGET_BURST: float = 10.0
+
+    # Ограничение частоты (вызовов в секунду, 0 — без ограничения) и параллельности обращений
+    # к внешнему сервису; `postgres` делит лимит частоты между всеми процессами
+    EXTERNAL_RATE_LIMIT: float = 0.0
+    EXTERNAL_RATE_LIMIT_BURST: float = 10.0
+    EXTERNAL_RATE_LIMIT_BACKEND: Literal["memory", "postgres"] = "memory"
+    EXTERNAL_RATE_LIMIT_LEASE: int = 5
+    EXTERNAL_MAX_CONCURRENCY: int = 0
+    # Сколько ждать в очереди ограничителя; 0 — отказывать сразу
+    EXTERNAL_RATE_LIMIT_MAX_WAIT: float = 1.0
+    EXTERNAL_RATE_LIMIT_STATUS_CODE: Literal[429, 503] = 503
+
+    # Автоматический выключатель: размыкается по доле ошибок или медленных вызовов
+    EXTERNAL_BREAKER_ENABLED: bool = True
+    EXTERNAL_BREAKER_WINDOW: int = 50
+    EXTERNAL_BREAKER_MIN_CALLS: int = 20
+    EXTERNAL_BREAKER_FAILURE_RATE: float = 0.5
+    EXTERNAL_BREAKER_SLOW_CALL_DURATION: float = 4.0
+    EXTERNAL_BREAKER_SLOW_CALL_RATE: float = 0.8
+    EXTERNAL_BREAKER_OPEN_DURATION: float = 10.0
+    EXTERNAL_BREAKER_HALF_OPEN_CALLS: int = 3
+
+    RESULT_CACHE_BACKEND: Literal["memory", "postgres", "none"] = "memory"
+    RESULT_CACHE_TTL: float = 300.0
+    RESULT_CACHE_MAXSIZE: int = 10_000
+    RESULT_CACHE_COORD_PRECISION: int = 6
+    # Период удаления просроченных записей из таблицы `query_cache` (0 — не удалять)
+    RESULT_CACHE_PURGE_INTERVAL: float = 300.0
+
+    # 0 — не отвечать на POST /query из таблицы `cadastral_latest`
+    CADASTRAL_LATEST_MAX_AGE: float = 0.0
+
+    QUERY_JOB_WORKERS: int = 10
+    QUERY_JOB_QUEUE_SIZE: int = 1000
+    QUERY_JOB_POLL_INTERVAL: float = 0.5
+
+    QUERY_BATCH_MAX_SIZE: int = 1000
+    QUERY_BATCH_CONCURRENCY: int = 20
+
+    HISTORY_EXPORT_CHUNK_SIZE: int = 1000
+
+    # Поиск запросов рядом с точкой: auto — PostGIS, если миграция создала столбец `geog`, иначе earthdistance
+    HISTORY_NEARBY_BACKEND: Literal["auto", "postgis", "earthdistance"] = "auto"
+    HISTORY_NEARBY_MAX_RADIUS: float = 100_000.0
+
+    # Отложенная пакетная запись истории запросов через COPY
+    QUERY_WRITE_BUFFER_ENABLED: bool = False
+    QUERY_WRITE_BUFFER_BATCH_SIZE: int = 500
+    QUERY_WRITE_BUFFER_MAX_AGE: float = 0.5
+    QUERY_WRITE_BUFFER_CAPACITY: int = 10_000
+    # Сколько секунд запрос ждёт места в заполненном буфере, прежде чем записаться напрямую
+    QUERY_WRITE_BUFFER_MAX_WAIT: float = 1.0
+    # Файл для строк, которые не удалось записать в БД (пусто — не сохранять)
+    QUERY_WRITE_BUFFER_SPOOL_PATH: Path | None = BASE_DIR / "spool" / "queries.ndjson"
+
+    # Месячные секции таблицы `queries`: создаются заранее, старые удаляются или архивируются
+    QUERY_PARTITION_MAINTENANCE_ENABLED: bool = True
+    QUERY_PARTITION_MAINTENANCE_INTERVAL: float = 3600.0
+    QUERY_PARTITION_MONTHS_AHEAD: int = 3
+    # 0 — хранить историю бессрочно
+    QUERY_RETENTION_MONTHS: int = 0
+    QUERY_RETENTION_MODE: Literal["drop", "archive"] = "archive"
+    QUERY_ARCHIVE_SCHEMA: str = "archive"
+
+    # Алгоритм подписи JWT; ключи в certs/ должны быть соответствующего типа (RSA, EC P-256 или Ed25519)
+    JWT_ALGORITHM: Literal["RS256", "ES256", "EdDSA"] = "RS256"
+    JWT_PRIVATE_KEY_PATH: Path = BASE_DIR / "certs" / "private.pem"
+    JWT_PUBLIC_KEY_PATH: Path = BASE_DIR / "certs" / "public.pem"
+    AUTH_TOKEN_CACHE_MAXSIZE: int = 10_000
+
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_MAX_WORKERS: int = 4
+    BCRYPT_MAX_PENDING: int = 32
+    BCRYPT_RETRY_AFTER: int = 1
+
+    AUTH_USER_CACHE_TTL: float = 30.0
+    AUTH_USER_CACHE_MAXSIZE: int = 10_000
+    # Доверять подписанным claims `uid` и `active` токена без обращения к БД.
+    # Деактивация пользователя вступает в силу только после истечения выданных токенов.
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+
+    # Лимиты запросов пользователя по маршрутам: JSON вида {"query": "60/60"} (запросов / секунд)
+    API_RATE_LIMITS: dict[str, str] = {}
+    API_RATE_LIMIT_BACKEND: Literal["memory", "postgres"] = "memory"
+    API_RATE_LIMIT_LEASE: int = 10
+    API_RATE_LIMIT_MAXSIZE: int = 100_000
+
+    # Пакетные обращения к внешнему сервису (`/results`): ожидание не дольше окна или до N запросов
+    EXTERNAL_BATCH_ENABLED: bool = False
+    EXTERNAL_BATCH_MAX_SIZE: int = 100
+    EXTERNAL_BATCH_WINDOW: float = 0.005
+
+    # Метрики Prometheus (`/metrics`) и span'ы горячего пути; OpenTelemetry — если пакет установлен
+    METRICS_ENABLED: bool = True
+    METRICS_OPENTELEMETRY: bool = False
 
     model_config = SettingsConfigDict(
         env_file=os.getenv(key="ENV_FILE", default=".env"),
@@ -35,13 +175,25 @@ class Settings(BaseSettings):
             f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
         )
 
+    @property
+    def replica_urls(self) -> list[str]:
+        return [
+            f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{host.strip()}/{self.POSTGRES_DB}"
+            for host in self.POSTGRES_REPLICA_HOSTS.split(",")
+            if host.strip()
+        ]
+
     @property
     def alembic_url(self) -> str:
         return self.db_url.replace("postgresql", "postgresql+asyncpg")
 
     @property
     def jwt(self) -> JWTSettings:
-        return JWTSettings()
+        return JWTSettings(
+            private_key_path=self.JWT_PRIVATE_KEY_PATH,
+            public_key_path=self.JWT_PUBLIC_KEY_PATH,
+            algorithm=self.JWT_ALGORITHM,
+        )
 
 
 settings = Settings()
@@ -1,26 +1,184 @@
-from typing import Any
+import asyncio
+import itertools
+import logging
+import socket
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Literal, Sequence, TypeVar
 
 import asyncpg
-from asyncpg import Pool, Record
+from asyncpg import Connection, Pool, Record
+
+from core.metrics import Histogram, metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Ошибки соединения с репликой, после которых запрос повторяется на основном сервере. Таймаут запроса
+# (`command_timeout`) сюда не входит: медленный запрос не означает недоступность реплики, а его повтор
+# только перенёс бы ту же нагрузку на основной сервер
+REPLICA_CONNECTION_ERRORS = (
+    ConnectionError,
+    socket.gaierror,
+    asyncpg.PostgresConnectionError,
+    asyncpg.CannotConnectNowError,
+)
+
+# Признак того, что в текущем HTTP-запросе уже выполнялась запись в основную БД.
+# Сбрасывается для каждого запроса `ReadYourWritesMiddleware`; фоновые задачи и служебные записи
+# (токены лимитов, кэш) пишут с `track=False` и не переключают чтения на основной сервер.
+_wrote_to_primary: ContextVar[bool] = ContextVar("wrote_to_primary", default=False)
+
+
+class DatabaseMetrics:
+    """Метрики пула соединений и запросов к базе данных."""
+
+    def __init__(self) -> None:
+        """Инициализирует пустые гистограммы."""
+        self.acquire_wait = Histogram()
+        self.query_latency: dict[str, Histogram] = {}
+
+    def observe_query(self, method: str, started_at: float) -> None:
+        """Добавляет время выполнения запроса в гистограмму метода.
+
+        Args:
+            method: Название метода `Database` (execute, fetch, ...).
+            started_at: Время начала запроса по `time.perf_counter()`.
+        """
+        histogram = self.query_latency.get(method)
+        if histogram is None:
+            histogram = self.query_latency[method] = Histogram()
+        histogram.observe(time.perf_counter() - started_at)
+
+    @property
+    def queries_total(self) -> int:
+        """Общее количество выполненных запросов."""
+        return sum(histogram.count for histogram in self.query_latency.values())
+
+
+def sql_init_hook(sql: str | None) -> Callable[[Connection], Awaitable[None]] | None:
+    """Создаёт init-хук пула, выполняющий SQL на каждом новом соединении.
+
+    Args:
+        sql: SQL-команды, например `SET statement_timeout = '5s'` (None — без хука).
+
+    Returns:
+        Корутина для параметра `init` пула или None.
+    """
+    if not sql:
+        return None
+
+    async def init(conn: Connection) -> None:
+        await conn.execute(sql)
+
+    return init
+
+
+class ReadYourWritesMiddleware:
+    """ASGI-middleware, ограничивающее режим read-your-writes одним HTTP-запросом."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _wrote_to_primary.set(False)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _wrote_to_primary.reset(token)
 
 
 class Database:
-    """Класс для работы с подключением к базе данных через пул соединений."""
+    """Класс для работы с подключением к базе данных через пул соединений.
+
+    Помимо пула основного сервера может управлять пулами реплик: запросы с `read_only=True`
+    направляются на здоровую реплику, а при её недоступности — на основной сервер.
+    """
 
     def __init__(self) -> None:
         """Инициализирует пустой пул соединений."""
         self.pool: Pool | None = None
+        # None — пул реплики ещё не создан (реплика была недоступна при подключении)
+        self.replicas: list[Pool | None] = []
+        self.replica_healthy: list[bool] = []
+        self._replica_dsns: list[str] = []
+        self._pool_options: dict[str, Any] = {}
+        self._replica_connect_timeout = 5.0
+        self.read_strategy: Literal["round_robin", "least_loaded"] = "round_robin"
+        self.read_your_writes = True
+        self.metrics = DatabaseMetrics()
+        self._round_robin = itertools.count()
+        self._health_task: asyncio.Task | None = None
 
-    async def connect(self, dsn: str) -> None:
+    async def connect(
+        self,
+        dsn: str,
+        *,
+        min_size: int = 10,
+        max_size: int = 10,
+        max_inactive_connection_lifetime: float = 300.0,
+        statement_cache_size: int = 100,
+        command_timeout: float | None = None,
+        init: Callable[[Connection], Awaitable[None]] | None = None,
+        replica_dsns: Sequence[str] = (),
+        read_strategy: Literal["round_robin", "least_loaded"] = "round_robin",
+        read_your_writes: bool = True,
+        health_check_interval: float = 5.0,
+    ) -> None:
         """Устанавливает соединение с базой данных и создаёт пул соединений.
 
         Args:
             dsn: Строка подключения к базе данных.
+            min_size: Минимальное количество соединений в пуле.
+            max_size: Максимальное количество соединений в пуле.
+            max_inactive_connection_lifetime: Время в секундах, после которого простаивающее соединение закрывается.
+            statement_cache_size: Размер кэша подготовленных выражений на соединение
+                (0 для PgBouncer в режиме transaction pooling).
+            command_timeout: Таймаут выполнения запроса в секундах по умолчанию.
+            init: Корутина, вызываемая для каждого нового соединения.
+            replica_dsns: Строки подключения к репликам только для чтения.
+            read_strategy: Выбор реплики: по кругу или с наименьшим числом занятых соединений.
+            read_your_writes: Направлять чтения на основной сервер, если в этом же запросе была запись.
+            health_check_interval: Период проверки доступности реплик в секундах.
         """
-        self.pool = await asyncpg.create_pool(dsn=dsn)
+        pool_options = dict(
+            min_size=min_size,
+            max_size=max_size,
+            max_inactive_connection_lifetime=max_inactive_connection_lifetime,
+            statement_cache_size=statement_cache_size,
+            command_timeout=command_timeout,
+            init=init,
+            # `CURRENT_TIMESTAMP` и `LOCALTIMESTAMP` в столбцах `timestamp without time zone` зависят от TimeZone
+            # сессии; UTC совпадает со временем, которое приложение записывает само (буфер записи, секции)
+            server_settings={"timezone": "UTC"},
+        )
+        self.pool = await asyncpg.create_pool(dsn=dsn, **pool_options)
+        # Недоступная при старте реплика не мешает запуску: её пул создаст периодическая проверка
+        self._replica_dsns = list(replica_dsns)
+        self._pool_options = pool_options
+        self._replica_connect_timeout = health_check_interval
+        self.replicas = [await self._create_replica_pool(index) for index in range(len(self._replica_dsns))]
+        self.replica_healthy = [replica is not None for replica in self.replicas]
+        self.read_strategy = read_strategy
+        self.read_your_writes = read_your_writes
+        if self.replicas:
+            self._health_task = asyncio.create_task(self._check_replicas(health_check_interval))
 
     async def disconnect(self) -> None:
-        """Закрывает пул соединений с базой данных."""
+        """Закрывает пулы соединений с базой данных."""
+        if self._health_task:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        for replica in self.replicas:
+            if replica is not None:
+                await replica.close()
         if self.pool:
             await self.pool.close()
 
@@ -36,44 +194,280 @@ class Database:
         assert self.pool is not None
         return self.pool
 
-    async def execute(self, query: str, *args: Any) -> Any:
+    def _read_pool(self) -> Pool:
+        """Выбирает пул для чтения: здоровую реплику или основной сервер.
+
+        Returns:
+            Пул реплики или основного сервера.
+        """
+        if self.read_your_writes and _wrote_to_primary.get():
+            return self._get_pool()
+        healthy = [replica for replica, ok in zip(self.replicas, self.replica_healthy) if ok and replica is not None]
+        if not healthy:
+            return self._get_pool()
+        if self.read_strategy == "least_loaded":
+            return min(healthy, key=lambda replica: replica.get_size() - replica.get_idle_size())
+        return healthy[next(self._round_robin) % len(healthy)]
+
+    async def _create_replica_pool(self, index: int) -> Pool | None:
+        """Создаёт пул соединений с репликой.
+
+        Args:
+            index: Номер реплики в `replica_dsns`.
+
+        Returns:
+            Пул соединений или None, если реплика недоступна.
+        """
+        try:
+            return await asyncio.wait_for(
+                asyncpg.create_pool(dsn=self._replica_dsns[index], **self._pool_options),
+                timeout=self._replica_connect_timeout,
+            )
+        except Exception:
+            logger.warning("Replica %s is unavailable, reads fall back to the primary", index, exc_info=True)
+            return None
+
+    def _mark_unhealthy(self, pool: Pool) -> None:
+        """Исключает реплику из выбора до следующей успешной проверки."""
+        index = self.replicas.index(pool)
+        if self.replica_healthy[index]:
+            logger.warning("Replica %s is unavailable, reads fall back to the primary", index)
+        self.replica_healthy[index] = False
+
+    async def _check_replicas(self, interval: float) -> None:
+        """Периодически проверяет доступность реплик запросом `SELECT 1`.
+
+        Пул реплики, недоступной при подключении, создаётся заново при каждой проверке до первого успеха.
+
+        Args:
+            interval: Период проверки в секундах.
+        """
+        while True:
+            for index, replica in enumerate(self.replicas):
+                if replica is None:
+                    replica = self.replicas[index] = await self._create_replica_pool(index)
+                    if replica is None:
+                        continue
+                try:
+                    async with replica.acquire(timeout=interval) as conn:
+                        await conn.fetchval("SELECT 1", timeout=interval)
+                    self.replica_healthy[index] = True
+                except Exception:
+                    self._mark_unhealthy(replica)
+            await asyncio.sleep(interval)
+
+    @asynccontextmanager
+    async def _acquire(self, pool: Pool) -> AsyncIterator[Connection]:
+        """Берёт соединение из пула, учитывая время ожидания в метриках.
+
+        Args:
+            pool: Пул основного сервера или реплики.
+
+        Yields:
+            Соединение из пула.
+        """
+        started_at = time.perf_counter()
+        async with pool.acquire() as conn:
+            self.metrics.acquire_wait.observe(time.perf_counter() - started_at)
+            yield conn
+
+    async def _run_on(self, pool: Pool, method: str, call: Callable[[Connection], Awaitable[T]]) -> T:
+        """Выполняет запрос на соединении из пула и учитывает его задержку."""
+        with metrics.span(f"db.{method}"):
+            async with self._acquire(pool) as conn:
+                started_at = time.perf_counter()
+                try:
+                    return await call(conn)
+                finally:
+                    self.metrics.observe_query(method, started_at)
+
+    async def _run(
+        self,
+        method: str,
+        read_only: bool,
+        call: Callable[[Connection], Awaitable[T]],
+        track: bool = True,
+    ) -> T:
+        """Выполняет запрос на реплике (для чтения) или на основном сервере.
+
+        Args:
+            method: Название метода для метрик.
+            read_only: Можно ли выполнить запрос на реплике.
+            call: Функция, выполняющая запрос на соединении.
+            track: Учитывать запрос на основном сервере в режиме read-your-writes текущего HTTP-запроса.
+
+        Returns:
+            Результат запроса.
+        """
+        if not read_only:
+            if track:
+                _wrote_to_primary.set(True)
+            return await self._run_on(self._get_pool(), method, call)
+
+        pool = self._read_pool()
+        if pool is self.pool:
+            return await self._run_on(pool, method, call)
+        try:
+            return await self._run_on(pool, method, call)
+        except REPLICA_CONNECTION_ERRORS:
+            self._mark_unhealthy(pool)
+            return await self._run_on(self._get_pool(), method, call)
+
+    async def execute(self, query: str, *args: Any, track: bool = True) -> Any:
         """Выполняет SQL-запрос на изменение данных (INSERT, UPDATE, DELETE).
 
         Args:
             query: SQL-запрос.
             *args: Параметры для запроса.
+            track: Учитывать запись в режиме read-your-writes (False для фоновых и служебных записей).
 
         Returns:
             Результат выполнения запроса.
         """
-        async with self._get_pool().acquire() as conn:
-            return await conn.execute(query, *args)
+        return await self._run("execute", False, lambda conn: conn.execute(query, *args), track)
+
+    async def executemany(self, query: str, args: Iterable[Sequence[Any]]) -> None:
+        """Выполняет SQL-запрос для каждого набора параметров в одной транзакции.
+
+        Args:
+            query: SQL-запрос.
+            args: Наборы параметров для запроса.
+        """
+        await self._run("executemany", False, lambda conn: conn.executemany(query, args))
+
+    async def copy_records(
+        self,
+        table: str,
+        records: Iterable[Sequence[Any]],
+        columns: Sequence[str],
+        track: bool = True,
+    ) -> None:
+        """Загружает строки в таблицу через протокол COPY.
+
+        Args:
+            table: Название таблицы.
+            records: Строки со значениями в порядке `columns`.
+            columns: Названия заполняемых столбцов.
+            track: Учитывать запись в режиме read-your-writes (False для фоновых и служебных записей).
+        """
+        await self._run(
+            "copy_records",
+            False,
+            lambda conn: conn.copy_records_to_table(table, records=records, columns=columns),
+            track,
+        )
 
-    async def fetch(self, query: str, *args: Any) -> Any:
+    async def fetch(self, query: str, *args: Any, read_only: bool = False, track: bool = True) -> Any:
         """Выполняет SQL-запрос и возвращает все найденные строки.
 
         Args:
             query: SQL-запрос.
             *args: Параметры для запроса.
+            read_only: Запрос только читает данные и может быть выполнен на реплике.
+            track: Учитывать запись в режиме read-your-writes (False для фоновых и служебных записей).
 
         Returns:
             Список строк результата.
         """
-        async with self._get_pool().acquire() as conn:
-            return await conn.fetch(query, *args)
+        return await self._run("fetch", read_only, lambda conn: conn.fetch(query, *args), track)
 
-    async def fetchrow(self, query: str, *args: Any) -> Record | None:
+    async def fetchrow(self, query: str, *args: Any, read_only: bool = False, track: bool = True) -> Record | None:
         """Выполняет SQL-запрос и возвращает одну строку результата.
 
         Args:
             query: SQL-запрос.
             *args: Параметры для запроса.
+            read_only: Запрос только читает данные и может быть выполнен на реплике.
+            track: Учитывать запись в режиме read-your-writes (False для фоновых и служебных записей).
 
         Returns:
             Одна строка результата или None.
         """
-        async with self._get_pool().acquire() as conn:
-            return await conn.fetchrow(query, *args)
+        return await self._run("fetchrow", read_only, lambda conn: conn.fetchrow(query, *args), track)
+
+    async def iterate(
+        self,
+        query: str,
+        *args: Any,
+        chunk_size: int = 1000,
+        read_only: bool = False,
+    ) -> AsyncIterator[list[Record]]:
+        """Выполняет SQL-запрос через серверный курсор и возвращает строки порциями.
+
+        Курсор открывается внутри транзакции на отдельном соединении пула, поэтому
+        в памяти одновременно находится не больше `chunk_size` строк. Как и в остальных методах,
+        при ошибке соединения с репликой запрос повторяется на основном сервере, но только
+        если ни одной порции ещё не было возвращено.
+
+        Args:
+            query: SQL-запрос.
+            *args: Параметры для запроса.
+            chunk_size: Количество строк в одной порции.
+            read_only: Выполнить запрос на реплике, если она доступна.
+
+        Yields:
+            Списки строк результата длиной не больше `chunk_size`.
+        """
+        pool = self._read_pool() if read_only else self._get_pool()
+        if pool is not self.pool:
+            started = False
+            try:
+                async for rows in self._iterate_on(pool, query, args, chunk_size):
+                    started = True
+                    yield rows
+                return
+            except REPLICA_CONNECTION_ERRORS:
+                self._mark_unhealthy(pool)
+                if started:
+                    raise
+            pool = self._get_pool()
+        async for rows in self._iterate_on(pool, query, args, chunk_size):
+            yield rows
+
+    async def _iterate_on(
+        self,
+        pool: Pool,
+        query: str,
+        args: Sequence[Any],
+        chunk_size: int,
+    ) -> AsyncIterator[list[Record]]:
+        """Читает результат запроса порциями через серверный курсор на соединении из пула."""
+        async with self._acquire(pool) as conn:
+            async with conn.transaction(readonly=True):
+                cursor = await conn.cursor(query, *args)
+                while True:
+                    started_at = time.perf_counter()
+                    rows = await cursor.fetch(chunk_size)
+                    self.metrics.observe_query("iterate", started_at)
+                    if not rows:
+                        break
+                    yield rows
+
+    def stats(self) -> dict[str, Any]:
+        """Возвращает состояние пула и метрики запросов.
+
+        Returns:
+            Словарь с размером пула, количеством занятых соединений,
+            временем ожидания соединения, задержками запросов по методам и состоянием реплик.
+        """
+        size = self.pool.get_size() if self.pool else 0
+        idle = self.pool.get_idle_size() if self.pool else 0
+        return {
+            "pool_size": size,
+            "pool_idle": idle,
+            "pool_in_use": size - idle,
+            "pool_max_size": self.pool.get_max_size() if self.pool else 0,
+            "acquire_wait": self.metrics.acquire_wait.as_dict(),
+            "queries": {method: histogram.as_dict() for method, histogram in self.metrics.query_latency.items()},
+            "replicas": [
+                {
+                    "healthy": healthy,
+                    "pool_size": replica.get_size() if replica else 0,
+                    "pool_in_use": replica.get_size() - replica.get_idle_size() if replica else 0,
+                }
+                for replica, healthy in zip(self.replicas, self.replica_healthy)
+            ],
+        }
 
 
 db = Database()
@@ -3,6 +3,7 @@ from typing import Annotated
 from fastapi import Depends
 
 from core.database import Database, db
+from core.http_client import HttpClient, http_client
 
 
 def get_db() -> Database:
@@ -15,3 +16,15 @@ def get_db() -> Database:
 
 
 DbInstanceDep = Annotated[Database, Depends(get_db)]
+
+
+def get_http_client() -> HttpClient:
+    """Возвращает общий HTTP-клиент внешнего сервиса.
+
+    Returns:
+        Экземпляр класса HttpClient с пулом keep-alive соединений.
+    """
+    return http_client
+
+
+HttpClientDep = Annotated[HttpClient, Depends(get_http_client)]
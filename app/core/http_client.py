@@ -0,0 +1,101 @@
+from typing import Any
+
+from httpx import AsyncBaseTransport, AsyncClient, Limits, Response, Timeout
+
+from core.batching import MicroBatcher
+
+
+class HttpClient:
+    """Класс для работы с долгоживущим HTTP-клиентом внешнего сервиса.
+
+    Клиент создаётся один раз при старте приложения и переиспользует
+    соединения из пула (keep-alive) между запросами.
+    """
+
+    def __init__(self, transport: AsyncBaseTransport | None = None) -> None:
+        """Инициализирует пустой HTTP-клиент.
+
+        Args:
+            transport: Транспорт httpx вместо сетевого (например, эмулятор внешнего сервиса в бенчмарках).
+        """
+        self.client: AsyncClient | None = None
+        self.transport = transport
+        # Диспетчер пакетных обращений к внешнему сервису (создаётся при первом обращении)
+        self.batcher: MicroBatcher[Any, Any] | None = None
+
+    async def connect(
+        self,
+        base_url: str,
+        *,
+        http2: bool = False,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 5.0,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 5.0,
+        write_timeout: float = 5.0,
+        pool_timeout: float = 5.0,
+    ) -> None:
+        """Создаёт HTTP-клиент с пулом соединений.
+
+        Args:
+            base_url: Базовый адрес внешнего сервиса.
+            http2: Использовать ли HTTP/2 (требуется пакет `h2`).
+            max_connections: Максимальное количество одновременных соединений.
+            max_keepalive_connections: Максимальное количество простаивающих keep-alive соединений.
+            keepalive_expiry: Время жизни простаивающего соединения в секундах.
+            connect_timeout: Таймаут установки соединения в секундах.
+            read_timeout: Таймаут чтения ответа в секундах.
+            write_timeout: Таймаут отправки запроса в секундах.
+            pool_timeout: Таймаут ожидания свободного соединения из пула в секундах.
+        """
+        self.client = AsyncClient(
+            base_url=base_url,
+            http2=http2,
+            transport=self.transport,
+            limits=Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=Timeout(
+                connect=connect_timeout,
+                read=read_timeout,
+                write=write_timeout,
+                pool=pool_timeout,
+            ),
+        )
+
+    async def disconnect(self) -> None:
+        """Закрывает HTTP-клиент и все соединения пула."""
+        self.batcher = None
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+    def _get_client(self) -> AsyncClient:
+        """Возвращает HTTP-клиент.
+
+        Returns:
+            Асинхронный HTTP-клиент.
+
+        Raises:
+            AssertionError: Если клиент не создан.
+        """
+        assert self.client is not None
+        return self.client
+
+    async def post(self, url: str, **kwargs: Any) -> Response:
+        """Выполняет POST-запрос через общий пул соединений.
+
+        Args:
+            url: Адрес относительно базового адреса внешнего сервиса.
+            **kwargs: Параметры запроса, передаваемые в `httpx.AsyncClient.post`.
+
+        Returns:
+            Ответ внешнего сервиса.
+        """
+        return await self._get_client().post(url, **kwargs)
+
+
+http_client = HttpClient()
@@ -0,0 +1,352 @@
+import bisect
+import logging
+import time
+from collections import deque
+from contextlib import AbstractContextManager, nullcontext
+from typing import Any, Sequence
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # OpenTelemetry не обязателен
+    otel_trace = None
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм задержек в секундах
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами (как в Prometheus)."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        """Инициализирует пустую гистограмму.
+
+        Args:
+            buckets: Возрастающие верхние границы корзин.
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # последняя корзина — +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Добавляет наблюдение.
+
+        Args:
+            value: Наблюдаемое значение.
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float | None:
+        """Оценивает квантиль линейной интерполяцией внутри корзины.
+
+        Args:
+            q: Квантиль от 0 до 1.
+
+        Returns:
+            Оценка квантиля или None, если наблюдений нет.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Возвращает сводку по гистограмме.
+
+        Returns:
+            Словарь с количеством, суммой, средним и квантилями p50/p95/p99.
+        """
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "avg": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class LatencyWindow:
+    """Точные квантили по последним `size` наблюдениям.
+
+    В отличие от `Histogram`, быстро отражает изменение задержек. Отсортированная копия
+    окна пересчитывается не чаще одного раза на `refresh_every` наблюдений.
+    """
+
+    def __init__(self, size: int = 200, refresh_every: int = 10) -> None:
+        """Инициализирует пустое окно.
+
+        Args:
+            size: Количество последних наблюдений в окне.
+            refresh_every: Через сколько наблюдений пересчитывать квантили.
+        """
+        self.values: deque[float] = deque(maxlen=size)
+        self.refresh_every = refresh_every
+        self._sorted: list[float] = []
+        self._stale = 0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def observe(self, value: float) -> None:
+        """Добавляет наблюдение, вытесняя самое старое.
+
+        Args:
+            value: Наблюдаемое значение.
+        """
+        self.values.append(value)
+        self._stale += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Возвращает квантиль наблюдений окна.
+
+        Args:
+            q: Квантиль от 0 до 1.
+
+        Returns:
+            Значение квантиля или None, если наблюдений нет.
+        """
+        if self._stale >= self.refresh_every or (self._stale and not self._sorted):
+            self._sorted = sorted(self.values)
+            self._stale = 0
+        if not self._sorted:
+            return None
+        return self._sorted[min(int(q * len(self._sorted)), len(self._sorted) - 1)]
+
+    def clear(self) -> None:
+        """Удаляет все наблюдения."""
+        self.values.clear()
+        self._sorted = []
+        self._stale = 0
+
+
+def escape_label_value(value: str) -> str:
+    """Экранирует значение метки Prometheus (обратная косая черта, кавычка, перевод строки)."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: Sequence[tuple[str, str]]) -> str:
+    """Форматирует метки метрики в синтаксисе Prometheus.
+
+    Args:
+        labels: Пары (название, значение).
+
+    Returns:
+        Строка вида `{name="value",...}` или пустая строка без меток.
+    """
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label_value(value)}"' for name, value in labels) + "}"
+
+
+def render_histogram(name: str, labels: Sequence[tuple[str, str]], histogram: Histogram) -> list[str]:
+    """Возвращает строки гистограммы в текстовом формате Prometheus.
+
+    Args:
+        name: Название метрики.
+        labels: Метки метрики.
+        histogram: Гистограмма.
+
+    Returns:
+        Строки `_bucket` с накопленными счётчиками, `_sum` и `_count`.
+    """
+    lines = []
+    cumulative = 0
+    for bound, bucket_count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+        cumulative += bucket_count
+        lines.append(f"{name}_bucket{format_labels([*labels, ('le', str(bound))])} {cumulative}")
+    lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum}")
+    lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+    return lines
+
+
+class Span:
+    """Измеряет длительность участка кода и, если подключён OpenTelemetry, создаёт span трассировки."""
+
+    __slots__ = ("registry", "name", "started_at", "otel_span")
+
+    def __init__(self, registry: "MetricsRegistry", name: str) -> None:
+        self.registry = registry
+        self.name = name
+        self.started_at = 0.0
+        self.otel_span: Any = None
+
+    def __enter__(self) -> "Span":
+        if self.registry.tracer is not None:
+            self.otel_span = self.registry.tracer.start_as_current_span(self.name)
+            self.otel_span.__enter__()
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        self.registry.observe_span(self.name, time.perf_counter() - self.started_at, failed=exc_type is not None)
+        if self.otel_span is not None:
+            self.otel_span.__exit__(exc_type, exc_value, traceback)
+
+
+class MetricsRegistry:
+    """Метрики и трассировка горячего пути запросов.
+
+    - Гистограммы длительности HTTP-запросов по методу, шаблону маршрута и статусу.
+    - Гистограммы длительности span'ов (`span(name)`) и счётчики span'ов, завершившихся ошибкой.
+    - Произвольные счётчики с метками (`inc`).
+
+    Выключенный реестр ничего не измеряет: `span()` возвращает общий пустой контекстный менеджер.
+    """
+
+    def __init__(self) -> None:
+        """Инициализирует выключенный реестр."""
+        self.enabled = False
+        self.tracer: Any = None
+        self.requests: dict[tuple[str, str, str], Histogram] = {}
+        self.spans: dict[str, Histogram] = {}
+        self.span_errors: dict[str, int] = {}
+        self.counters: dict[tuple[str, tuple[tuple[str, str], ...]], int] = {}
+
+    def configure(self, enabled: bool, opentelemetry: bool = False) -> None:
+        """Включает или выключает сбор метрик.
+
+        Args:
+            enabled: Собирать метрики.
+            opentelemetry: Дополнительно создавать span'ы OpenTelemetry (если пакет установлен).
+        """
+        self.enabled = enabled
+        self.tracer = None
+        if enabled and opentelemetry:
+            if otel_trace is None:
+                logger.warning("OpenTelemetry is not installed, tracing is disabled")
+            else:
+                self.tracer = otel_trace.get_tracer("cadastral-service")
+
+    def span(self, name: str) -> AbstractContextManager:
+        """Создаёт контекстный менеджер, измеряющий длительность участка кода.
+
+        Args:
+            name: Название span'а, например `db.fetch`.
+
+        Returns:
+            `Span` или пустой контекстный менеджер, если метрики выключены.
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def observe_span(self, name: str, duration: float, failed: bool = False) -> None:
+        """Учитывает завершённый span.
+
+        Args:
+            name: Название span'а.
+            duration: Длительность в секундах.
+            failed: Span завершился исключением.
+        """
+        histogram = self.spans.get(name)
+        if histogram is None:
+            histogram = self.spans[name] = Histogram()
+        histogram.observe(duration)
+        if failed:
+            self.span_errors[name] = self.span_errors.get(name, 0) + 1
+
+    def observe_request(self, method: str, route: str, status_code: int, duration: float) -> None:
+        """Учитывает обработанный HTTP-запрос.
+
+        Args:
+            method: HTTP-метод.
+            route: Шаблон маршрута, например `/query/{query_id}`.
+            status_code: Код ответа.
+            duration: Длительность обработки в секундах.
+        """
+        key = (method, route, str(status_code))
+        histogram = self.requests.get(key)
+        if histogram is None:
+            histogram = self.requests[key] = Histogram()
+        histogram.observe(duration)
+
+    def inc(self, name: str, **labels: str) -> None:
+        """Увеличивает счётчик на единицу.
+
+        Args:
+            name: Название счётчика без суффикса `_total`.
+            **labels: Метки счётчика.
+        """
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + 1
+
+    def reset(self) -> None:
+        """Удаляет все собранные значения."""
+        self.requests.clear()
+        self.spans.clear()
+        self.span_errors.clear()
+        self.counters.clear()
+
+    def render(self) -> str:
+        """Возвращает метрики в текстовом формате Prometheus.
+
+        Returns:
+            Текст для эндпоинта `/metrics`.
+        """
+        lines = ["# TYPE http_request_duration_seconds histogram"]
+        for (method, route, status_code), histogram in sorted(self.requests.items()):
+            labels = [("method", method), ("route", route), ("status", status_code)]
+            lines.extend(render_histogram("http_request_duration_seconds", labels, histogram))
+        lines.append("# TYPE span_duration_seconds histogram")
+        for name, histogram in sorted(self.spans.items()):
+            lines.extend(render_histogram("span_duration_seconds", [("span", name)], histogram))
+        lines.append("# TYPE span_errors_total counter")
+        for name, count in sorted(self.span_errors.items()):
+            lines.append(f"span_errors_total{format_labels([('span', name)])} {count}")
+        for name in sorted({name for name, _ in self.counters}):
+            lines.append(f"# TYPE {name}_total counter")
+            for (counter_name, labels), count in sorted(self.counters.items()):
+                if counter_name == name:
+                    lines.append(f"{name}_total{format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+NULL_SPAN = nullcontext()
+
+metrics = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """ASGI-middleware, измеряющее длительность HTTP-запросов по шаблону маршрута."""
+
+    def __init__(self, app: Any, registry: MetricsRegistry = metrics) -> None:
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not self.registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started_at = time.perf_counter()
+
+        async def send_wrapper(message: dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            # Шаблон маршрута вместо пути, чтобы количество меток не зависело от параметров запроса
+            route_path = getattr(route, "path", "<unmatched>")
+            self.registry.observe_request(scope["method"], route_path, status_code, time.perf_counter() - started_at)
@@ -0,0 +1,439 @@
+import asyncio
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable
+
+from core.cache import TTLCache
+from core.database import Database
+from core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """Исключение, которое выбрасывается, если разрешение на вызов не получено за отведённое время."""
+
+    pass
+
+
+class TokenBucket:
+    """Локальное ведро токенов: `rate` токенов в секунду, не больше `burst` в запасе.
+
+    Токены можно резервировать наперёд: баланс уходит в минус, а вызывающий получает
+    время, через которое его токен будет накоплен. Так ожидающие обслуживаются по очереди.
+    """
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic) -> None:
+        """Инициализирует заполненное ведро.
+
+        Args:
+            rate: Скорость пополнения в токенах в секунду.
+            burst: Максимальный запас токенов.
+            clock: Источник монотонного времени.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._clock = clock
+        self._updated_at = clock()
+
+    def reserve(self, max_wait: float, tokens: float = 1) -> float | None:
+        """Резервирует токены, если их можно получить не позже чем через `max_wait` секунд.
+
+        Args:
+            max_wait: Максимальное время ожидания в секундах.
+            tokens: Количество токенов.
+
+        Returns:
+            Время ожидания в секундах (0, если токены есть) или None, если ждать дольше `max_wait`.
+        """
+        now = self._clock()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        wait = max(0.0, (tokens - self.tokens) / self.rate)
+        if wait > max_wait:
+            return None
+        self.tokens -= tokens
+        return wait
+
+
+class TokenSource(ABC):
+    """Источник разрешений на вызовы с ограничением частоты."""
+
+    @abstractmethod
+    async def take(self, max_wait: float) -> bool:
+        """Получает токен, ожидая не дольше `max_wait` секунд.
+
+        Returns:
+            True, если токен получен.
+        """
+
+
+class LocalTokenSource(TokenSource):
+    """Ограничение частоты в пределах процесса."""
+
+    def __init__(self, rate: float, burst: float) -> None:
+        """Инициализирует источник.
+
+        Args:
+            rate: Допустимое количество вызовов в секунду.
+            burst: Допустимое количество вызовов подряд.
+        """
+        self.bucket = TokenBucket(rate=rate, burst=burst)
+
+    async def take(self, max_wait: float) -> bool:
+        wait = self.bucket.reserve(max_wait)
+        if wait is None:
+            return False
+        if wait:
+            await asyncio.sleep(wait)
+        return True
+
+
+class PostgresTokenSource(TokenSource):
+    """Общее для всех процессов ведро токенов в таблице `rate_limit_buckets`.
+
+    Процесс берёт токены у общего ведра партиями по `lease` штук (функция `rate_limit_take`)
+    и расходует их локально, поэтому обращение к БД нужно не чаще раза на `lease` вызовов.
+    Если БД недоступна, используется локальное ведро с той же частотой.
+    """
+
+    def __init__(self, database: Database, key: str, rate: float, burst: float, lease: int) -> None:
+        """Инициализирует источник.
+
+        Args:
+            database: Экземпляр подключения к базе данных.
+            key: Ключ ведра в таблице.
+            rate: Допустимое количество вызовов в секунду для всех процессов вместе.
+            burst: Допустимое количество вызовов подряд.
+            lease: Количество токенов, забираемых из общего ведра за раз.
+        """
+        self.db = database
+        self.key = key
+        self.rate = rate
+        self.burst = burst
+        self.lease = lease
+        self.leased = 0
+        self._lock = asyncio.Lock()
+        self._fallback = LocalTokenSource(rate=rate, burst=burst)
+
+    async def take(self, max_wait: float) -> bool:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_wait
+        if not self._lock.locked():
+            await self._lock.acquire()
+        else:
+            try:
+                await asyncio.wait_for(self._lock.acquire(), timeout=max_wait)
+            except asyncio.TimeoutError:
+                return False
+        try:
+            while not self.leased:
+                try:
+                    row = await self.db.fetchrow(
+                        "SELECT granted, available FROM rate_limit_take($1, $2, $3, $4)",
+                        self.key,
+                        self.rate,
+                        self.burst,
+                        self.lease,
+                        track=False,
+                    )
+                except Exception:
+                    logger.exception("Failed to lease rate limit tokens, falling back to the local bucket")
+                    return await self._fallback.take(max(deadline - loop.time(), 0.0))
+                self.leased = row["granted"]
+                if self.leased:
+                    break
+                wait = (1 - row["available"]) / self.rate
+                if loop.time() + wait > deadline:
+                    return False
+                await asyncio.sleep(wait)
+            self.leased -= 1
+            return True
+        finally:
+            self._lock.release()
+
+
+class CallLimiter:
+    """Ограничение частоты и количества одновременных вызовов с очередью ожидания."""
+
+    def __init__(self, tokens: TokenSource | None, concurrency: int | None) -> None:
+        """Инициализирует ограничитель.
+
+        Args:
+            tokens: Источник токенов (None — без ограничения частоты).
+            concurrency: Максимальное количество одновременных вызовов (None — без ограничения).
+        """
+        self.tokens = tokens
+        self.concurrency = concurrency
+        self.waiting = 0
+        self.max_waiting = 0
+        self.in_flight = 0
+        self.rejected = 0
+        self.wait_time = Histogram()
+        self._semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+
+    @asynccontextmanager
+    async def slot(self, max_wait: float) -> AsyncIterator[None]:
+        """Ожидает разрешения на вызов не дольше `max_wait` секунд и удерживает его до выхода из блока.
+
+        Args:
+            max_wait: Максимальное время ожидания в секундах (0 — отказ без ожидания).
+
+        Raises:
+            RateLimitExceeded: Если разрешение не получено вовремя.
+        """
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            if self.tokens is not None and not await self.tokens.take(max_wait):
+                self.rejected += 1
+                raise RateLimitExceeded("Rate limit exceeded")
+            if self._semaphore is not None:
+                if not self._semaphore.locked():
+                    await self._semaphore.acquire()
+                else:
+                    try:
+                        remaining = max(started_at + max_wait - loop.time(), 0.0)
+                        await asyncio.wait_for(self._semaphore.acquire(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        self.rejected += 1
+                        raise RateLimitExceeded("Concurrency limit exceeded")
+        finally:
+            self.waiting -= 1
+        self.wait_time.observe(loop.time() - started_at)
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    def stats(self) -> dict[str, Any]:
+        """Возвращает состояние ограничителя.
+
+        Returns:
+            Словарь с длиной очереди, её максимумом, количеством выполняющихся и отклонённых
+            вызовов и временем ожидания.
+        """
+        return {
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "in_flight": self.in_flight,
+            "concurrency": self.concurrency,
+            "rejected": self.rejected,
+            "wait_time": self.wait_time.as_dict(),
+        }
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """Лимит `limit` запросов за `window` секунд (ведро токенов с запасом `limit`)."""
+
+    limit: int
+    window: float
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimitPolicy":
+        """Разбирает лимит из строки вида `100/60`.
+
+        Args:
+            value: Количество запросов и окно в секундах через `/`.
+
+        Returns:
+            Лимит.
+
+        Raises:
+            ValueError: Если строка имеет неверный формат.
+        """
+        limit, _, window = value.partition("/")
+        policy = cls(limit=int(limit), window=float(window or 1))
+        if policy.limit <= 0 or policy.window <= 0:
+            raise ValueError(f"Invalid rate limit: {value!r}")
+        return policy
+
+    @property
+    def rate(self) -> float:
+        """Скорость пополнения в токенах в секунду."""
+        return self.limit / self.window
+
+
+@dataclass
+class RateLimitDecision:
+    """Результат проверки лимита для одного запроса."""
+
+    allowed: bool
+    policy: RateLimitPolicy
+    remaining: int
+    reset: float
+    retry_after: float = 0.0
+
+    def headers(self) -> dict[str, str]:
+        """Возвращает заголовки `RateLimit-*` (и `Retry-After` при отказе).
+
+        Returns:
+            Словарь заголовков ответа.
+        """
+        headers = {
+            "RateLimit-Limit": str(self.policy.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(math.ceil(self.reset)),
+            "RateLimit-Policy": f"{self.policy.limit};w={self.policy.window:g}",
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+class KeyedRateLimiter(ABC):
+    """Лимиты запросов по ключу (например, по пользователю и маршруту)."""
+
+    @abstractmethod
+    async def hit(self, key: str, policy: RateLimitPolicy) -> RateLimitDecision:
+        """Учитывает запрос и проверяет лимит без ожидания.
+
+        Args:
+            key: Ключ лимита.
+            policy: Лимит для ключа.
+
+        Returns:
+            Решение и данные для заголовков `RateLimit-*`.
+        """
+
+
+class InMemoryKeyedRateLimiter(KeyedRateLimiter):
+    """Лимиты в памяти процесса.
+
+    Ведро, не использовавшееся дольше окна лимита, всё равно было бы полным,
+    поэтому оно удаляется по TTL без потери точности.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        """Инициализирует хранилище вёдер.
+
+        Args:
+            maxsize: Максимальное количество отслеживаемых ключей.
+        """
+        self._buckets: TTLCache[str, TokenBucket] = TTLCache(maxsize=maxsize, ttl=60.0)
+
+    async def hit(self, key: str, policy: RateLimitPolicy) -> RateLimitDecision:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate=policy.rate, burst=policy.limit)
+        self._buckets.set(key, bucket, ttl=policy.window)
+        allowed = bucket.reserve(max_wait=0) is not None
+        return RateLimitDecision(
+            allowed=allowed,
+            policy=policy,
+            remaining=max(0, math.floor(bucket.tokens)),
+            reset=(policy.limit - bucket.tokens) / policy.rate,
+            retry_after=0.0 if allowed else (1 - bucket.tokens) / policy.rate,
+        )
+
+
+@dataclass
+class _Lease:
+    tokens: int = 0
+    available: float = 0.0
+    refill: asyncio.Task | None = None
+    failed: bool = False
+    # До этого момента общее ведро пусто, и запросы отклоняются без обращения к БД
+    empty_until: float = 0.0
+
+
+class PostgresKeyedRateLimiter(KeyedRateLimiter):
+    """Лимиты, общие для всех процессов, в таблице `rate_limit_buckets`.
+
+    Токены забираются из общего ведра партиями по `lease` штук и расходуются локально.
+    Когда локальный запас уменьшается вдвое, следующая партия запрашивается в фоне,
+    поэтому на обычном запросе обращения к БД нет. Если общее ведро пусто, запросы по ключу
+    отклоняются локально, пока в нём не накопится токен. Если БД недоступна, используются
+    лимиты в памяти процесса.
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        lease: int,
+        maxsize: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Инициализирует лимиты.
+
+        Args:
+            database: Экземпляр подключения к базе данных.
+            lease: Количество токенов, забираемых из общего ведра за раз.
+            maxsize: Максимальное количество отслеживаемых ключей.
+            clock: Источник монотонного времени.
+        """
+        self.db = database
+        self.lease = lease
+        self._clock = clock
+        self._leases: TTLCache[str, _Lease] = TTLCache(maxsize=maxsize, ttl=60.0)
+        self._fallback = InMemoryKeyedRateLimiter(maxsize=maxsize)
+
+    async def hit(self, key: str, policy: RateLimitPolicy) -> RateLimitDecision:
+        lease = self._leases.get(key)
+        if lease is None:
+            lease = _Lease()
+        self._leases.set(key, lease, ttl=policy.window)
+
+        now = self._clock()
+        if not lease.tokens and now < lease.empty_until:
+            return RateLimitDecision(
+                allowed=False,
+                policy=policy,
+                remaining=0,
+                reset=policy.limit / policy.rate,
+                retry_after=lease.empty_until - now,
+            )
+        if not lease.tokens:
+            if lease.refill is None:
+                lease.refill = asyncio.create_task(self._refill(key, lease, policy))
+            await asyncio.shield(lease.refill)
+        if lease.failed and not lease.tokens:
+            lease.failed = False
+            return await self._fallback.hit(key, policy)
+
+        allowed = lease.tokens > 0
+        if allowed:
+            lease.tokens -= 1
+            if lease.tokens <= self.lease // 2 and lease.refill is None:
+                lease.refill = asyncio.create_task(self._refill(key, lease, policy))
+        available = lease.tokens + max(lease.available, 0.0)
+        return RateLimitDecision(
+            allowed=allowed,
+            policy=policy,
+            remaining=math.floor(available),
+            reset=(policy.limit - available) / policy.rate,
+            retry_after=0.0 if allowed else (1 - lease.available) / policy.rate,
+        )
+
+    async def _refill(self, key: str, lease: _Lease, policy: RateLimitPolicy) -> None:
+        """Забирает следующую партию токенов из общего ведра."""
+        try:
+            row = await self.db.fetchrow(
+                "SELECT granted, available FROM rate_limit_take($1, $2, $3, $4)",
+                f"api:{key}",
+                policy.rate,
+                float(policy.limit),
+                self.lease,
+                track=False,
+            )
+            lease.tokens += row["granted"]
+            lease.available = row["available"]
+            if not row["granted"]:
+                lease.empty_until = self._clock() + (1 - lease.available) / policy.rate
+        except Exception:
+            logger.exception("Failed to lease rate limit tokens for %s", key)
+            lease.failed = True
+        finally:
+            lease.refill = None
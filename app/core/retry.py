@@ -0,0 +1,55 @@
+import random
+
+
+def backoff_delay(attempt: int, base: float, cap: float, rng: random.Random | None = None) -> float:
+    """Возвращает паузу перед повтором: экспоненциальный рост с полным джиттером.
+
+    Args:
+        attempt: Номер повтора, начиная с 0.
+        base: Пауза перед первым повтором в секундах.
+        cap: Максимальная пауза в секундах.
+        rng: Генератор случайных чисел (по умолчанию — модуль `random`).
+
+    Returns:
+        Случайная пауза от 0 до `min(cap, base * 2 ** attempt)`.
+    """
+    return (rng or random).uniform(0, min(cap, base * 2**attempt))
+
+
+class RetryBudget:
+    """Общий бюджет повторных и дублирующих вызовов.
+
+    Каждый исходный вызов пополняет бюджет на `ratio` токена, каждый дополнительный
+    вызов (повтор или hedge) расходует один токен. Так дополнительная нагрузка на
+    вызываемый сервис не превышает `ratio` от числа исходных вызовов плюс `burst`.
+    """
+
+    def __init__(self, ratio: float, burst: float) -> None:
+        """Инициализирует заполненный бюджет.
+
+        Args:
+            ratio: Доля дополнительных вызовов относительно исходных.
+            burst: Максимальный запас токенов.
+        """
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst
+
+    def deposit(self) -> None:
+        """Учитывает исходный вызов."""
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Пытается потратить токен на дополнительный вызов.
+
+        Returns:
+            True, если дополнительный вызов разрешён.
+        """
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def reset(self) -> None:
+        """Восстанавливает полный запас токенов."""
+        self.tokens = self.burst
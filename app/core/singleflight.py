@@ -0,0 +1,62 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Call(Generic[T]):
+    task: asyncio.Future[T]
+    waiters: int = 0
+
+
+class SingleFlight(Generic[T]):
+    """Объединяет одновременные вызовы с одинаковым ключом в один.
+
+    Первый вызов запускает корутину в отдельной задаче, остальные ожидают её результат.
+    Исключение задачи получают все ожидающие. Отмена одного из ожидающих не отменяет
+    общую задачу; задача отменяется, только когда её перестают ждать все вызывающие.
+    """
+
+    def __init__(self) -> None:
+        """Инициализирует пустой реестр выполняющихся вызовов."""
+        self.coalesced = 0
+        self._calls: dict[Hashable, _Call[T]] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Количество выполняющихся в данный момент уникальных вызовов."""
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Выполняет `fn` или присоединяется к уже выполняющемуся вызову с тем же ключом.
+
+        Args:
+            key: Ключ, по которому объединяются вызовы.
+            fn: Функция, возвращающая корутину с результатом.
+
+        Returns:
+            Результат общего вызова.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(task=asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+                self._forget(key, call)
+
+    def _forget(self, key: Hashable, call: _Call[T]) -> None:
+        """Удаляет вызов из реестра, если он не был заменён новым."""
+        if self._calls.get(key) is call:
+            del self._calls[key]
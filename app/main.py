@@ -1,26 +1,103 @@
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 
-from api.routers import checkhealth, query
+from api.cache import result_cache
+from api.jobs import query_jobs
+from api.partitions import partition_maintenance
+from api.routers import cadastral, checkhealth, query
+from api.writer import query_writer
 from auth import routers as auth
+from auth.hashing import password_hasher
 from core.config import settings
-from core.database import db
+from core.database import ReadYourWritesMiddleware, db, sql_init_hook
+from core.http_client import http_client
+from core.metrics import MetricsMiddleware, metrics
 
 
 @asynccontextmanager
 async def lifespan(application: FastAPI):
-    await db.connect(dsn=settings.db_url)
+    await db.connect(
+        dsn=settings.db_url,
+        min_size=settings.DB_POOL_MIN_SIZE,
+        max_size=settings.DB_POOL_MAX_SIZE,
+        max_inactive_connection_lifetime=settings.DB_POOL_MAX_INACTIVE_CONNECTION_LIFETIME,
+        statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+        command_timeout=settings.DB_COMMAND_TIMEOUT,
+        init=sql_init_hook(settings.DB_INIT_SQL),
+        replica_dsns=settings.replica_urls,
+        read_strategy=settings.DB_READ_STRATEGY,
+        read_your_writes=settings.DB_READ_YOUR_WRITES,
+        health_check_interval=settings.DB_REPLICA_HEALTH_CHECK_INTERVAL,
+    )
+    await http_client.connect(
+        base_url=settings.EXTERNAL_SERVICE_HOST,
+        http2=settings.EXTERNAL_SERVICE_HTTP2,
+        max_connections=settings.EXTERNAL_SERVICE_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.EXTERNAL_SERVICE_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.EXTERNAL_SERVICE_KEEPALIVE_EXPIRY,
+        connect_timeout=settings.EXTERNAL_SERVICE_CONNECT_TIMEOUT,
+        read_timeout=settings.EXTERNAL_SERVICE_READ_TIMEOUT,
+        write_timeout=settings.EXTERNAL_SERVICE_WRITE_TIMEOUT,
+        pool_timeout=settings.EXTERNAL_SERVICE_POOL_TIMEOUT,
+    )
+    if result_cache is not None:
+        await result_cache.start()
+    await query_jobs.start(
+        db=db,
+        http_client=http_client,
+        cache=result_cache,
+        workers=settings.QUERY_JOB_WORKERS,
+        maxsize=settings.QUERY_JOB_QUEUE_SIZE,
+    )
+    if settings.QUERY_PARTITION_MAINTENANCE_ENABLED:
+        await partition_maintenance.start(
+            db=db,
+            interval=settings.QUERY_PARTITION_MAINTENANCE_INTERVAL,
+            months_ahead=settings.QUERY_PARTITION_MONTHS_AHEAD,
+            retention_months=settings.QUERY_RETENTION_MONTHS,
+            retention_mode=settings.QUERY_RETENTION_MODE,
+            archive_schema=settings.QUERY_ARCHIVE_SCHEMA,
+        )
+    if settings.QUERY_WRITE_BUFFER_ENABLED:
+        await query_writer.start(
+            db=db,
+            batch_size=settings.QUERY_WRITE_BUFFER_BATCH_SIZE,
+            max_age=settings.QUERY_WRITE_BUFFER_MAX_AGE,
+            capacity=settings.QUERY_WRITE_BUFFER_CAPACITY,
+            spool_path=settings.QUERY_WRITE_BUFFER_SPOOL_PATH,
+            max_wait=settings.QUERY_WRITE_BUFFER_MAX_WAIT,
+        )
     yield
+    await query_jobs.stop()
+    await query_writer.stop()
+    await partition_maintenance.stop()
+    if result_cache is not None:
+        await result_cache.stop()
+    await http_client.disconnect()
+    password_hasher.shutdown()
     await db.disconnect()
 
 
+metrics.configure(enabled=settings.METRICS_ENABLED, opentelemetry=settings.METRICS_OPENTELEMETRY)
+
 app = FastAPI(
     title="Cadastral Service",
     lifespan=lifespan,
 )
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics() -> str:
+    """Метрики в текстовом формате Prometheus."""
+    return metrics.render()
+
 
 # Подключение роутеров
 app.include_router(checkhealth.router)
 app.include_router(query.router)
+app.include_router(cadastral.router)
 app.include_router(auth.router)
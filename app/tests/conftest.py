@@ -1,9 +1,67 @@
+import os
+import tempfile
+from pathlib import Path
+
 import pytest
 import pytest_asyncio
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+
+def generate_jwt_keys() -> tempfile.TemporaryDirectory:
+    """Создаёт временную пару RSA-ключей для подписи JWT и указывает на неё настройки.
 
-from api.schemas import QueryRequestAddDTO
-from main import app
-from tests.utils import test_client_with_overrides
+    Ключи задаются через переменные окружения до импорта приложения: `auth.utils`
+    читает их при импорте, поэтому тесты не зависят от ключей в `certs/`.
+
+    Returns:
+        Временный каталог с ключами; удаляется при завершении процесса.
+    """
+    keys_dir = tempfile.TemporaryDirectory(prefix="jwt-keys-")
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_path = Path(keys_dir.name) / "private.pem"
+    public_path = Path(keys_dir.name) / "public.pem"
+    private_path.write_bytes(
+        private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        )
+    )
+    public_path.write_bytes(
+        private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    )
+    os.environ["JWT_ALGORITHM"] = "RS256"
+    os.environ["JWT_PRIVATE_KEY_PATH"] = str(private_path)
+    os.environ["JWT_PUBLIC_KEY_PATH"] = str(public_path)
+    return keys_dir
+
+
+jwt_keys_dir = generate_jwt_keys()
+
+# isort: split
+
+from api.schemas import QueryRequestAddDTO  # noqa: E402
+from api.services import external_breaker, external_budget, external_latency  # noqa: E402
+from core.config import settings  # noqa: E402
+from core.http_client import HttpClient  # noqa: E402
+from main import app  # noqa: E402
+from tests.utils import test_client_with_overrides  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def reset_external_breaker(monkeypatch):
+    """Сбрасывает автоматический выключатель, окно задержек и бюджет повторов внешнего сервиса
+    между тестами и убирает паузы между повторами."""
+    monkeypatch.setattr(settings, "EXTERNAL_RETRY_BACKOFF_BASE", 0.0)
+    yield
+    if external_breaker is not None:
+        external_breaker.reset()
+    external_latency.clear()
+    external_budget.reset()
 
 
 @pytest.fixture(
@@ -51,6 +109,19 @@ def result_test_data(request):
     return request.param
 
 
+@pytest_asyncio.fixture
+async def http_client():
+    """Общий HTTP-клиент внешнего сервиса, созданный на время теста.
+
+    Yields:
+        Подключённый экземпляр `HttpClient`.
+    """
+    client = HttpClient()
+    await client.connect(base_url="http://external.test")
+    yield client
+    await client.disconnect()
+
+
 @pytest_asyncio.fixture
 def async_client_factory():
     """Фикстура-фабрика для создания асинхронного HTTP-клиента с возможностью переопределения зависимостей.
@@ -0,0 +1,74 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from api.cache import InMemoryResultCache, PostgresResultCache, make_cache_key
+from api.schemas import QueryRequestAddDTO
+
+
+def test_cache_key_uses_normalized_number_and_rounded_coordinates():
+    """Проверяет, что близкие координаты и пробелы в номере дают один ключ."""
+    # Arrange
+    first = QueryRequestAddDTO(cadastral_number="77:01:0004010:1234", latitude=55.75000001, longitude=37.61)
+    second = QueryRequestAddDTO(cadastral_number=" 77 : 01:0004010: 1234", latitude=55.75, longitude=37.6100004)
+
+    # Act & Assert
+    assert make_cache_key(first, precision=6) == make_cache_key(second, precision=6)
+    assert make_cache_key(first, precision=6) == "77:01:0004010:1234:55.750000:37.610000"
+
+
+@pytest.mark.asyncio
+async def test_in_memory_cache_evicts_least_recently_used():
+    """Проверяет вытеснение самой давно использованной записи при переполнении."""
+    # Arrange
+    cache = InMemoryResultCache(maxsize=2, ttl=60)
+    await cache.set("a", True)
+    await cache.set("b", False)
+    await cache.get("a")
+
+    # Act
+    await cache.set("c", True)
+
+    # Assert
+    assert await cache.get("b") is None
+    assert await cache.get("a") is True
+    assert await cache.get("c") is True
+    assert cache.stats.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_in_memory_cache_expires_entries():
+    """Проверяет, что запись с истёкшим TTL считается промахом."""
+    # Arrange
+    cache = InMemoryResultCache(maxsize=10, ttl=5)
+    with patch("core.cache.time.monotonic", return_value=100.0):
+        await cache.set("a", False)
+
+    # Act
+    with patch("core.cache.time.monotonic", return_value=106.0):
+        value = await cache.get("a")
+
+    # Assert
+    assert value is None
+    assert cache.stats.expirations == 1
+    assert cache.stats.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_postgres_cache_purges_expired_entries_periodically():
+    """Проверяет периодическое удаление просроченных записей из `query_cache`."""
+    # Arrange
+    db = AsyncMock()
+    db.execute.return_value = "DELETE 3"
+    cache = PostgresResultCache(db, ttl=60, purge_interval=0.01)
+
+    # Act
+    await cache.start()
+    await asyncio.sleep(0.05)
+    await cache.stop()
+
+    # Assert
+    assert db.execute.await_count >= 1
+    assert "DELETE FROM query_cache WHERE expires_at" in db.execute.await_args.args[0]
+    assert await cache.purge_expired() == 3
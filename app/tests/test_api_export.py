@@ -0,0 +1,49 @@
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+
+from api.export import gzip_stream, rows_to_csv, rows_to_ndjson
+
+
+@pytest.fixture
+def history_row(cadastral_test_data, result_test_data):
+    """Строка таблицы `queries` с тестовыми данными."""
+    return {**cadastral_test_data, **result_test_data, "id": 1, "created_at": datetime(2026, 1, 2, 3, 4, 5)}
+
+
+def test_rows_to_ndjson(history_row):
+    """Проверяет сериализацию строк истории в NDJSON."""
+    # Act
+    lines = rows_to_ndjson([history_row, history_row]).splitlines()
+
+    # Assert
+    assert len(lines) == 2
+    assert json.loads(lines[0]) == {**history_row, "created_at": "2026-01-02 03:04:05"}
+
+
+def test_rows_to_csv_with_header(history_row):
+    """Проверяет сериализацию строк истории в CSV с заголовком."""
+    # Act
+    lines = rows_to_csv([history_row], header=True).splitlines()
+
+    # Assert
+    assert lines[0] == "id,cadastral_number,latitude,longitude,result,created_at"
+    assert lines[1].startswith(f"1,{history_row['cadastral_number']},")
+
+
+@pytest.mark.asyncio
+async def test_gzip_stream_produces_valid_archive():
+    """Проверяет, что сжатый поток распаковывается в исходный текст."""
+
+    # Arrange
+    async def chunks():
+        for i in range(100):
+            yield f"line {i}\n"
+
+    # Act
+    compressed = b"".join([part async for part in gzip_stream(chunks())])
+
+    # Assert
+    assert gzip.decompress(compressed).decode() == "".join(f"line {i}\n" for i in range(100))
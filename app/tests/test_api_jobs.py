@@ -0,0 +1,86 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from api.exceptions import ExternalServiceUnavailable, JobQueueFull
+from api.jobs import QueryJobQueue
+
+
+@pytest.mark.asyncio
+@patch("api.jobs.finish_query_job", new_callable=AsyncMock)
+@patch("api.jobs.get_external_result", new_callable=AsyncMock)
+async def test_worker_stores_result(mock_get_result, mock_finish_job, query_request, http_client):
+    """Тестирует запись результата фонового запроса."""
+    # Arrange
+    jobs = QueryJobQueue()
+    mock_db = AsyncMock()
+    mock_get_result.return_value = True
+    await jobs.start(db=mock_db, http_client=http_client, cache=None, workers=1, maxsize=10)
+
+    # Act
+    jobs.submit(1, query_request)
+    await jobs.wait(1, timeout=1)
+    await jobs.stop()
+
+    # Assert
+    mock_finish_job.assert_awaited_once_with(mock_db, 1, True, track=False)
+    mock_db.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@patch("api.jobs.finish_query_job", new_callable=AsyncMock)
+@patch("api.jobs.get_external_result", new_callable=AsyncMock)
+async def test_worker_marks_unavailable_as_failed(mock_get_result, mock_finish_job, query_request, http_client):
+    """Тестирует запись пустого результата при недоступном внешнем сервисе."""
+    # Arrange
+    jobs = QueryJobQueue()
+    mock_db = AsyncMock()
+    mock_get_result.side_effect = ExternalServiceUnavailable("Service down")
+    await jobs.start(db=mock_db, http_client=http_client, cache=None, workers=1, maxsize=10)
+
+    # Act
+    jobs.submit(1, query_request)
+    await jobs.wait(1, timeout=1)
+    await jobs.stop()
+
+    # Assert
+    mock_finish_job.assert_awaited_once_with(mock_db, 1, None, track=False)
+
+
+@pytest.mark.asyncio
+@patch("api.jobs.get_external_result", new_callable=AsyncMock)
+async def test_stop_fails_unfinished_jobs(mock_get_result, query_request, http_client):
+    """Тестирует пометку незавершённых задач как `failed` при остановке."""
+    # Arrange
+    jobs = QueryJobQueue()
+    mock_db = AsyncMock()
+
+    async def hang(*_):
+        await asyncio.Event().wait()
+
+    mock_get_result.side_effect = hang
+    await jobs.start(db=mock_db, http_client=http_client, cache=None, workers=1, maxsize=10)
+    jobs.submit(1, query_request)
+    jobs.submit(2, query_request)
+    await asyncio.sleep(0)
+
+    # Act
+    await jobs.stop()
+
+    # Assert
+    mock_db.execute.assert_awaited_once()
+    assert sorted(mock_db.execute.await_args.args[1]) == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_submit_to_full_queue(query_request, http_client):
+    """Тестирует отказ при переполненной очереди."""
+    # Arrange
+    jobs = QueryJobQueue()
+    await jobs.start(db=AsyncMock(), http_client=http_client, cache=None, workers=0, maxsize=1)
+    jobs.submit(1, query_request)
+
+    # Act & Assert
+    with pytest.raises(JobQueueFull):
+        jobs.submit(2, query_request)
@@ -0,0 +1,58 @@
+from datetime import datetime
+
+import pytest
+
+from api.pagination import cursor_scope, decode_cursor, decode_distance_cursor, encode_cursor, encode_distance_cursor
+
+SCOPE = cursor_scope("asc", None, None, None)
+
+
+def test_cursor_round_trip():
+    """Проверяет, что курсор декодируется в исходную позицию."""
+    # Arrange
+    created_at = datetime(2026, 10, 18, 12, 30, 15, 123456)
+
+    # Act
+    cursor = encode_cursor(created_at, 42, SCOPE)
+
+    # Assert
+    assert decode_cursor(cursor, SCOPE) == (created_at, 42)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", "WzFd"])
+def test_invalid_cursor(cursor):
+    """Проверяет отклонение повреждённого курсора."""
+    # Act & Assert
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor, SCOPE)
+
+
+@pytest.mark.parametrize(
+    "params",
+    [("desc", None, None, None), ("asc", "77:01:0004010:1234", None, None), ("asc", None, datetime(2026, 1, 1), None)],
+    ids=["order", "cadastral_number", "date_range"],
+)
+def test_cursor_is_bound_to_query_parameters(params):
+    """Проверяет отклонение курсора, выданного для другой сортировки или других фильтров."""
+    # Arrange
+    cursor = encode_cursor(datetime(2026, 10, 18), 42, SCOPE)
+
+    # Act & Assert
+    with pytest.raises(ValueError, match="does not match"):
+        decode_cursor(cursor, cursor_scope(*params))
+
+
+def test_distance_cursor_round_trip():
+    """Проверяет, что курсор поиска по расстоянию сохраняет точное значение расстояния."""
+    # Arrange
+    scope = cursor_scope(55.75, 37.61, 500.0)
+
+    # Act
+    cursor = encode_distance_cursor(1234.5678901234567, 7, scope)
+
+    # Assert
+    assert decode_distance_cursor(cursor, scope) == (1234.5678901234567, 7)
+    with pytest.raises(ValueError, match="does not match"):
+        decode_distance_cursor(cursor, cursor_scope(55.75, 37.61, 1000.0))
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_distance_cursor(encode_cursor(datetime(2026, 1, 1), 7, scope), scope)
@@ -0,0 +1,117 @@
+from datetime import date
+from unittest.mock import AsyncMock
+
+import pytest
+
+from api.partitions import add_months, maintain_partitions, maintenance_script, partition_month
+
+
+def test_add_months_crosses_year_boundary():
+    """Проверяет сдвиг месяца через границу года."""
+    # Act & Assert
+    assert add_months(date(2026, 11, 15), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+def test_partition_month_ignores_default_partition():
+    """Проверяет разбор названий секций."""
+    # Act & Assert
+    assert partition_month("queries_2026_10") == date(2026, 10, 1)
+    assert partition_month("queries_default") is None
+
+
+def test_script_creates_missing_future_partitions():
+    """Проверяет создание только отсутствующих секций на месяцы вперёд."""
+    # Act
+    commands = maintenance_script(
+        partitions=["queries_2026_10", "queries_default"],
+        today=date(2026, 10, 18),
+        months_ahead=2,
+        retention_months=0,
+        retention_mode="drop",
+        archive_schema="archive",
+    )
+
+    # Assert
+    assert commands == [
+        "CREATE TABLE IF NOT EXISTS queries_2026_11 PARTITION OF queries "
+        "FOR VALUES FROM ('2026-11-01') TO ('2026-12-01')",
+        "CREATE TABLE IF NOT EXISTS queries_2026_12 PARTITION OF queries "
+        "FOR VALUES FROM ('2026-12-01') TO ('2027-01-01')",
+    ]
+
+
+@pytest.mark.parametrize(
+    "retention_mode, expected",
+    [
+        ("drop", ["ALTER TABLE queries DETACH PARTITION queries_2026_06", "DROP TABLE queries_2026_06"]),
+        (
+            "archive",
+            [
+                'CREATE SCHEMA IF NOT EXISTS "archive"',
+                "ALTER TABLE queries DETACH PARTITION queries_2026_06",
+                'ALTER TABLE queries_2026_06 SET SCHEMA "archive"',
+            ],
+        ),
+    ],
+)
+def test_script_applies_retention(retention_mode, expected):
+    """Проверяет удаление или архивирование секций старше срока хранения."""
+    # Act
+    commands = maintenance_script(
+        partitions=["queries_2026_06", "queries_2026_07", "queries_2026_10", "queries_default"],
+        today=date(2026, 10, 18),
+        months_ahead=0,
+        retention_months=3,
+        retention_mode=retention_mode,
+        archive_schema="archive",
+    )
+
+    # Assert
+    assert commands == expected
+
+
+@pytest.mark.asyncio
+async def test_maintenance_runs_commands_under_advisory_lock():
+    """Проверяет выполнение команд одним вызовом под advisory-блокировкой."""
+    # Arrange
+    mock_db = AsyncMock()
+    mock_db.fetch.return_value = [{"relname": "queries_2026_10"}]
+
+    # Act
+    commands = await maintain_partitions(
+        mock_db,
+        months_ahead=1,
+        retention_months=0,
+        retention_mode="drop",
+        archive_schema="archive",
+        today=date(2026, 10, 1),
+    )
+
+    # Assert
+    assert len(commands) == 1
+    script = mock_db.execute.await_args.args[0]
+    assert script.startswith("SELECT pg_advisory_xact_lock(")
+    assert "queries_2026_11" in script
+
+
+@pytest.mark.asyncio
+async def test_maintenance_without_changes_skips_execute():
+    """Проверяет, что при наличии всех секций команды не выполняются."""
+    # Arrange
+    mock_db = AsyncMock()
+    mock_db.fetch.return_value = [{"relname": "queries_2026_10"}]
+
+    # Act
+    commands = await maintain_partitions(
+        mock_db,
+        months_ahead=0,
+        retention_months=0,
+        retention_mode="drop",
+        archive_schema="archive",
+        today=date(2026, 10, 1),
+    )
+
+    # Assert
+    assert commands == []
+    mock_db.execute.assert_not_awaited()
@@ -0,0 +1,55 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import status
+
+from auth.deps import get_current_active_auth_user
+from core.deps import get_db
+
+
+@pytest.mark.asyncio
+@patch("api.routers.cadastral.get_latest_result", new_callable=AsyncMock)
+async def test_get_cadastral_latest(mock_get_latest, cadastral_test_data, async_client_factory):
+    """Тест получения последнего результата по кадастровому номеру."""
+    # Arrange
+    row = {**cadastral_test_data, "result": True, "updated_at": "2026-01-01T00:00:00", "hit_count": 3, "age": 5.0}
+    mock_get_latest.return_value = row
+    async with async_client_factory(
+        dependency_overrides={
+            get_db: lambda: AsyncMock(),
+            get_current_active_auth_user: lambda: AsyncMock(),
+        }
+    ) as client:
+
+        # Act
+        response = await client.get(f"/cadastral/{cadastral_test_data['cadastral_number']}")
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {k: v for k, v in row.items() if k != "age"}
+        assert mock_get_latest.await_args.args[1] == cadastral_test_data["cadastral_number"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "cadastral_number, status_code",
+    [("77:01:0004012:2041", status.HTTP_404_NOT_FOUND), ("bad", status.HTTP_422_UNPROCESSABLE_ENTITY)],
+    ids=["not_found", "invalid"],
+)
+@patch("api.routers.cadastral.get_latest_result", new_callable=AsyncMock)
+async def test_get_cadastral_latest_errors(mock_get_latest, cadastral_number, status_code, async_client_factory):
+    """Тест ошибок поиска последнего результата: номер без результатов и некорректный номер."""
+    # Arrange
+    mock_get_latest.return_value = None
+    async with async_client_factory(
+        dependency_overrides={
+            get_db: lambda: AsyncMock(),
+            get_current_active_auth_user: lambda: AsyncMock(),
+        }
+    ) as client:
+
+        # Act
+        response = await client.get(f"/cadastral/{cadastral_number}")
+
+        # Assert
+        assert response.status_code == status_code
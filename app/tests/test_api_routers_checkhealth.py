@@ -5,7 +5,10 @@ import pytest
 from fastapi import status
 from httpx import AsyncClient
 
+from api.cache import InMemoryResultCache
+from api.deps import get_result_cache
 from core.deps import get_db
+from core.metrics import metrics
 
 
 @pytest.mark.asyncio
@@ -25,7 +28,7 @@ async def test_ping_db_alive(
 
     # Assert
     assert response.status_code == status.HTTP_200_OK
-    assert response.json() == {"db_alive": True}
+    assert response.json() == {"db_alive": True, "external_circuit": "closed"}
 
 
 @pytest.mark.asyncio
@@ -46,3 +49,55 @@ async def test_ping_db_unavailable(
     # Assert
     assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
     assert response.json()["detail"] == "Database connection unavailable"
+
+
+@pytest.mark.asyncio
+async def test_stats_reports_result_cache_counters(
+    async_client_factory: Callable[
+        [dict[Callable[..., Any], Callable[..., Any]] | None], AsyncContextManager[AsyncClient]
+    ],
+):
+    """Тестирует вывод счётчиков кэша результатов."""
+    # Arrange
+    cache = InMemoryResultCache(maxsize=10, ttl=60)
+    await cache.set("key", True)
+    await cache.get("key")
+    await cache.get("missing")
+
+    # Act
+    async with async_client_factory(dependency_overrides={get_result_cache: lambda: cache}) as client:
+        response = await client.get("/stats")
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["result_cache"] == {
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+        "expirations": 0,
+        "hit_rate": 0.5,
+    }
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_route_latency(
+    async_client_factory: Callable[
+        [dict[Callable[..., Any], Callable[..., Any]] | None], AsyncContextManager[AsyncClient]
+    ],
+):
+    """Тестирует гистограммы длительности запросов по шаблону маршрута на `/metrics`."""
+    # Arrange
+    metrics.reset()
+    mock_db = AsyncMock()
+    mock_db.fetchrow.return_value = (1,)
+
+    # Act
+    async with async_client_factory(dependency_overrides={get_db: lambda: mock_db}) as client:
+        await client.get("/ping")
+        await client.get("/missing")
+        response = await client.get("/metrics")
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert 'http_request_duration_seconds_count{method="GET",route="/ping",status="200"} 1' in response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="<unmatched>",status="404"} 1' in response.text
@@ -1,16 +1,21 @@
+import json
+from datetime import datetime
 from unittest.mock import AsyncMock, patch
 
 import pytest
 from fastapi import status
 
-from api.exceptions import ExternalServiceUnavailable
+from api.deps import get_api_rate_limiter, get_query_writer
+from api.exceptions import ExternalRateLimited, ExternalServiceUnavailable
+from api.pagination import cursor_scope, decode_cursor
 from auth.deps import get_current_active_auth_user
-from core.deps import get_db
+from core.deps import get_db, get_http_client
+from core.rate_limit import InMemoryKeyedRateLimiter, RateLimitPolicy
 
 
 @pytest.mark.asyncio
 @patch("api.routers.query.save_query_to_db", new_callable=AsyncMock)
-@patch("api.routers.query.make_request_to_external", new_callable=AsyncMock)
+@patch("api.routers.query.get_external_result", new_callable=AsyncMock)
 async def test_submit_query_success(
     mock_make_request,
     mock_save_query,
@@ -28,6 +33,7 @@ async def test_submit_query_success(
     async with async_client_factory(
         dependency_overrides={
             get_db: lambda: mock_db_conn,
+            get_http_client: lambda: AsyncMock(),
             get_current_active_auth_user: lambda: auth_user,
         }
     ) as client:
@@ -43,8 +49,76 @@ async def test_submit_query_success(
 
 
 @pytest.mark.asyncio
+@patch("api.routers.query.settings.EXTERNAL_RATE_LIMIT_STATUS_CODE", status.HTTP_429_TOO_MANY_REQUESTS)
 @patch("api.routers.query.save_query_to_db", new_callable=AsyncMock)
-@patch("api.routers.query.make_request_to_external", new_callable=AsyncMock)
+@patch("api.routers.query.get_external_result", new_callable=AsyncMock)
+async def test_submit_query_rate_limited(
+    mock_make_request,
+    mock_save_query,
+    cadastral_test_data,
+    async_client_factory,
+):
+    """Тест отказа с настроенным кодом, когда превышен лимит обращений к внешнему сервису."""
+    # Arrange
+    mock_make_request.side_effect = ExternalRateLimited("External service rate limit exceeded")
+    async with async_client_factory(
+        dependency_overrides={
+            get_db: lambda: AsyncMock(),
+            get_http_client: lambda: AsyncMock(),
+            get_current_active_auth_user: lambda: AsyncMock(),
+        }
+    ) as client:
+
+        # Act
+        response = await client.post("/query", json=cadastral_test_data)
+
+        # Assert
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response.headers["Retry-After"] == "1"
+        mock_save_query.assert_awaited_once()
+        assert mock_save_query.await_args.kwargs["result"] is None
+
+
+@pytest.mark.asyncio
+@patch("api.routers.query.save_query_to_db", new_callable=AsyncMock)
+@patch("api.routers.query.get_external_result", new_callable=AsyncMock)
+async def test_submit_query_buffers_history(
+    mock_make_request,
+    mock_save_query,
+    cadastral_test_data,
+    async_client_factory,
+):
+    """Тест отложенной записи истории: ответ строится из запроса без обращения к БД."""
+    # Arrange
+    writer = AsyncMock()
+    mock_make_request.return_value = False
+    async with async_client_factory(
+        dependency_overrides={
+            get_db: lambda: AsyncMock(),
+            get_http_client: lambda: AsyncMock(),
+            get_query_writer: lambda: writer,
+            get_current_active_auth_user: lambda: AsyncMock(),
+        }
+    ) as client:
+
+        # Act
+        response = await client.post("/query", json=cadastral_test_data)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {**cadastral_test_data, "result": False}
+        writer.add.assert_awaited_once_with(
+            cadastral_test_data["cadastral_number"],
+            cadastral_test_data["latitude"],
+            cadastral_test_data["longitude"],
+            result=False,
+        )
+        mock_save_query.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@patch("api.routers.query.save_query_to_db", new_callable=AsyncMock)
+@patch("api.routers.query.get_external_result", new_callable=AsyncMock)
 async def test_submit_query_external_service_unavailable(
     mock_make_request,
     mock_save_query,
@@ -60,6 +134,7 @@ async def test_submit_query_external_service_unavailable(
     async with async_client_factory(
         dependency_overrides={
             get_db: lambda: mock_db_conn,
+            get_http_client: lambda: AsyncMock(),
             get_current_active_auth_user: lambda: auth_user,
         }
     ) as client:
@@ -72,3 +147,359 @@ async def test_submit_query_external_service_unavailable(
         assert response.json() == {"detail": "Service down"}
         mock_make_request.assert_awaited_once()
         mock_save_query.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@patch("api.routers.query.query_jobs")
+@patch("api.routers.query.create_query_job", new_callable=AsyncMock)
+async def test_submit_query_async_mode(
+    mock_create_job,
+    mock_query_jobs,
+    cadastral_test_data,
+    async_client_factory,
+):
+    """Тест постановки запроса в очередь фоновых запросов."""
+    # Arrange
+    mock_create_job.return_value = 42
+    async with async_client_factory(
+        dependency_overrides={
+            get_db: lambda: AsyncMock(),
+            get_http_client: lambda: AsyncMock(),
+            get_current_active_auth_user: lambda: AsyncMock(),
+        }
+    ) as client:
+
+        # Act
+        response = await client.post("/query", params={"mode": "async"}, json=cadastral_test_data)
+
+        # Assert
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.json() == {"id": 42, "status": "pending"}
+        assert response.headers["Location"] == "/query/42"
+        mock_query_jobs.submit.assert_called_once()
+
+
+@pytest.mark.asyncio
+@patch("api.routers.query.query_jobs")
+@patch("api.routers.query.get_query_by_id", new_callable=AsyncMock)
+async def test_get_query_long_polls_until_done(
+    mock_get_query,
+    mock_query_jobs,
+    cadastral_test_data,
+    async_client_factory,
+):
+    """Тест long-polling запроса до его завершения."""
+    # Arrange
+    row = {**cadastral_test_data, "id": 7, "result": None, "created_at": "2026-01-01T00:00:00"}
+    mock_get_query.side_effect = [
+        {**row, "status": "pending", "finished_at": None},
+        {**row, "status": "done", "result": True, "finished_at": "2026-01-01T00:00:02"},
+    ]
+    mock_query_jobs.wait = AsyncMock()
+    async with async_client_factory(
+        dependency_overrides={
+            get_db: lambda: AsyncMock(),
+            get_current_active_auth_user: lambda: AsyncMock(),
+        }
+    ) as client:
+
+        # Act
+        response = await client.get("/query/7", params={"wait": 5})
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["status"] == "done"
+        assert response.json()["result"] is True
+        mock_query_jobs.wait.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@patch("api.routers.query.get_query_by_id", new_callable=AsyncMock)
+async def test_get_query_not_found(mock_get_query, async_client_factory):
+    """Тест запроса несуществующей задачи."""
+    # Arrange
+    mock_get_query.return_value = None
+    async with async_client_factory(
+        dependency_overrides={
+            get_db: lambda: AsyncMock(),
+            get_current_active_auth_user: lambda: AsyncMock(),
+        }
+    ) as client:
+
+        # Act
+        response = await client.get("/query/1")
+
+        # Assert
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+@patch("api.routers.query.save_queries_to_db", new_callable=AsyncMock)
+@patch("api.services.get_external_result", new_callable=AsyncMock)
+async def test_submit_query_batch(mock_get_result, mock_save_queries, async_client_factory):
+    """Тест пакетной отправки запросов с валидными и невалидными элементами."""
+    # Arrange
+    mock_get_result.side_effect = [True, ExternalServiceUnavailable("Service down")]
+    items = [
+        {"cadastral_number": "77:01:0004010:1234", "latitude": 55.75, "longitude": 37.61},
+        {"cadastral_number": "bad", "latitude": 55.75, "longitude": 37.61},
+        {"cadastral_number": "50:21:0004011:5678", "latitude": 56.12, "longitude": 37.35},
+    ]
+    async with async_client_factory(
+        dependency_overrides={
+            get_db: lambda: AsyncMock(),
+            get_http_client: lambda: AsyncMock(),
+            get_current_active_auth_user: lambda: AsyncMock(),
+        }
+    ) as client:
+
+        # Act
+        response = await client.post("/query/batch", json=items)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        result = response.json()["items"]
+        assert [item["index"] for item in result] == [0, 1, 2]
+        assert result[0]["result"] is True and result[0]["error"] is None
+        assert "Incorrect cadastral number format" in result[1]["error"]
+        assert result[2]["result"] is None and result[2]["error"] == "Service down"
+        mock_save_queries.assert_awaited_once()
+        assert len(mock_save_queries.await_args.args[1]) == 2
+
+
+@pytest.mark.asyncio
+@patch("api.routers.query.save_queries_to_db", new_callable=AsyncMock)
+@patch("api.services.get_external_result", new_callable=AsyncMock)
+async def test_submit_query_batch_stream(
+    mock_get_result, mock_save_queries, cadastral_test_data, async_client_factory
+):
+    """Тест потоковой выдачи результатов пакета в формате NDJSON."""
+    # Arrange
+    mock_get_result.return_value = False
+    async with async_client_factory(
+        dependency_overrides={
+            get_db: lambda: AsyncMock(),
+            get_http_client: lambda: AsyncMock(),
+            get_current_active_auth_user: lambda: AsyncMock(),
+        }
+    ) as client:
+
+        # Act
+        response = await client.post("/query/batch", params={"stream": True}, json=[cadastral_test_data] * 3)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(line["index"] for line in lines) == [0, 1, 2]
+        assert all(line["result"] is False for line in lines)
+        mock_save_queries.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_get_history_returns_next_cursor(cadastral_test_data, async_client_factory):
+    """Тест курсорной пагинации истории запросов."""
+    # Arrange
+    rows = [
+        {**cadastral_test_data, "id": i, "result": True, "created_at": datetime(2026, 1, 1, 0, 0, i)}
+        for i in range(1, 4)
+    ]
+    mock_db = AsyncMock()
+    mock_db.fetch.return_value = rows
+    async with async_client_factory(
+        dependency_overrides={
+            get_db: lambda: mock_db,
+            get_current_active_auth_user: lambda: AsyncMock(),
+        }
+    ) as client:
+
+        # Act
+        first_page = await client.get("/history", params={"limit": 2})
+        mock_db.fetch.return_value = rows[2:]
+        next_cursor = first_page.headers["X-Next-Cursor"]
+        second_page = await client.get("/history", params={"limit": 2, "cursor": next_cursor})
+        other_order = await client.get("/history", params={"limit": 2, "order_by": "desc", "cursor": next_cursor})
+
+        # Assert
+        assert first_page.status_code == status.HTTP_200_OK
+        assert [item["id"] for item in first_page.json()] == [1, 2]
+        scope = cursor_scope("asc", None, None, None)
+        assert decode_cursor(next_cursor, scope) == (rows[1]["created_at"], 2)
+        assert [item["id"] for item in second_page.json()] == [3]
+        assert "X-Next-Cursor" not in second_page.headers
+        assert other_order.status_code == status.HTTP_400_BAD_REQUEST
+        query, *params = mock_db.fetch.await_args.args
+        assert "(created_at, id) > ($1, $2)" in query
+        assert params == [rows[1]["created_at"], 2, 3, 0]
+
+
+@pytest.mark.asyncio
+async def test_get_history_filters_by_date_range(async_client_factory):
+    """Тест фильтра истории по диапазону дат, ограничивающего просматриваемые секции."""
+    # Arrange
+    mock_db = AsyncMock()
+    mock_db.fetch.return_value = []
+    async with async_client_factory(
+        dependency_overrides={
+            get_db: lambda: mock_db,
+            get_current_active_auth_user: lambda: AsyncMock(),
+        }
+    ) as client:
+
+        # Act
+        response = await client.get(
+            "/history",
+            params={"created_from": "2026-09-01T00:00:00", "created_to": "2026-10-01T00:00:00"},
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        query, *params = mock_db.fetch.await_args.args
+        assert "WHERE created_at >= $1 AND created_at < $2" in query
+        assert params == [datetime(2026, 9, 1), datetime(2026, 10, 1), 11, 0]
+
+
+@pytest.mark.asyncio
+@patch.dict("api.deps.api_rate_limits", {"history": RateLimitPolicy(limit=1, window=60)})
+async def test_get_history_rate_limited_per_user(async_client_factory):
+    """Тест лимита запросов пользователя с заголовками RateLimit-*."""
+    # Arrange
+    mock_db = AsyncMock()
+    mock_db.fetch.return_value = []
+    user = AsyncMock(id=1)
+    limiter = InMemoryKeyedRateLimiter(maxsize=10)
+    async with async_client_factory(
+        dependency_overrides={
+            get_db: lambda: mock_db,
+            get_current_active_auth_user: lambda: user,
+            get_api_rate_limiter: lambda: limiter,
+        }
+    ) as client:
+
+        # Act
+        allowed = await client.get("/history")
+        denied = await client.get("/history")
+        user.id = 2
+        other_user = await client.get("/history")
+
+        # Assert
+        assert allowed.status_code == status.HTTP_200_OK
+        assert allowed.headers["RateLimit-Limit"] == "1"
+        assert allowed.headers["RateLimit-Remaining"] == "0"
+        assert denied.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert denied.headers["Retry-After"] == "60"
+        assert denied.headers["RateLimit-Policy"] == "1;w=60"
+        assert other_user.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+@patch("api.routers.query.settings.HISTORY_NEARBY_BACKEND", "earthdistance")
+async def test_get_history_nearby_paginates_by_distance(cadastral_test_data, async_client_factory):
+    """Тест поиска запросов рядом с точкой с курсорной пагинацией по расстоянию."""
+    # Arrange
+    rows = [
+        {**cadastral_test_data, "id": i, "result": True, "created_at": datetime(2026, 1, 1), "distance": 10.0 * i}
+        for i in range(1, 4)
+    ]
+    mock_db = AsyncMock()
+    mock_db.fetch.return_value = rows
+    async with async_client_factory(
+        dependency_overrides={
+            get_db: lambda: mock_db,
+            get_current_active_auth_user: lambda: AsyncMock(),
+        }
+    ) as client:
+
+        # Act
+        params = {"lat": 55.75, "lon": 37.61, "radius": 500, "limit": 2}
+        first_page = await client.get("/history/nearby", params=params)
+        mock_db.fetch.return_value = rows[2:]
+        second_page = await client.get(
+            "/history/nearby", params={**params, "cursor": first_page.json()["next_cursor"]}
+        )
+
+        other_radius = await client.get(
+            "/history/nearby", params={**params, "radius": 1000, "cursor": first_page.json()["next_cursor"]}
+        )
+
+        # Assert
+        assert first_page.status_code == status.HTTP_200_OK
+        assert [item["distance"] for item in first_page.json()["items"]] == [10.0, 20.0]
+        assert second_page.json()["next_cursor"] is None
+        query, *query_params = mock_db.fetch.await_args.args
+        assert "ll_to_earth(latitude, longitude) <-> ll_to_earth($1, $2)" in query
+        assert query_params == [55.75, 37.61, 500.0, 3, 20.0, 2]
+        assert other_radius.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_get_history_nearby_rejects_large_radius(async_client_factory):
+    """Тест отклонения радиуса больше допустимого."""
+    # Arrange
+    async with async_client_factory(
+        dependency_overrides={
+            get_db: lambda: AsyncMock(),
+            get_current_active_auth_user: lambda: AsyncMock(),
+        }
+    ) as client:
+
+        # Act
+        response = await client.get("/history/nearby", params={"lat": 0, "lon": 0, "radius": 10**9})
+
+        # Assert
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_get_history_rejects_invalid_cursor(async_client_factory):
+    """Тест отклонения повреждённого курсора."""
+    # Arrange
+    async with async_client_factory(
+        dependency_overrides={
+            get_db: lambda: AsyncMock(),
+            get_current_active_auth_user: lambda: AsyncMock(),
+        }
+    ) as client:
+
+        # Act
+        response = await client.get("/history", params={"cursor": "broken"})
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_export_history_streams_csv(cadastral_test_data, async_client_factory):
+    """Тест потоковой выгрузки истории в формате CSV с фильтрами."""
+    # Arrange
+    row = {**cadastral_test_data, "id": 1, "result": True, "created_at": datetime(2026, 1, 1)}
+    mock_db = AsyncMock()
+    calls = []
+
+    async def iterate(query, *params, chunk_size, read_only=False):
+        calls.append((query, params, chunk_size))
+        yield [row, row]
+        yield [row]
+
+    mock_db.iterate = iterate
+    async with async_client_factory(
+        dependency_overrides={
+            get_db: lambda: mock_db,
+            get_current_active_auth_user: lambda: AsyncMock(),
+        }
+    ) as client:
+
+        # Act
+        response = await client.get(
+            "/history/export",
+            params={"format": "csv", "cadastral_number": row["cadastral_number"], "chunk_size": 2},
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/csv")
+        assert len(response.text.splitlines()) == 4
+        query, params, chunk_size = calls[0]
+        assert "WHERE cadastral_number = $1" in query
+        assert params == (row["cadastral_number"],)
+        assert chunk_size == 2
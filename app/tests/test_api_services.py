@@ -1,16 +1,30 @@
+import asyncio
 from unittest.mock import AsyncMock, patch
 
 import httpx
 import pytest
 from fastapi import status
 
+from api.cache import InMemoryResultCache
 from api.exceptions import ExternalServiceUnavailable
-from api.services import make_request_to_external
+from api.schemas import QueryRequestAddDTO
+from api.services import (
+    external_breaker,
+    external_budget,
+    external_latency,
+    external_stats,
+    external_timeout,
+    get_external_result,
+    iter_batch_results,
+    make_request_to_external,
+)
+from core.config import settings
+from core.metrics import metrics
 
 
 @pytest.mark.asyncio
 @patch("httpx.AsyncClient.post", new_callable=AsyncMock)
-async def test_getting_positive_result(mock_post, query_request, async_client_factory):
+async def test_getting_positive_result(mock_post, query_request, http_client):
     """Тест получения положительного результата от внешнего сервиса."""
     # Arrange
     positive_result = True
@@ -21,7 +35,7 @@ async def test_getting_positive_result(mock_post, query_request, async_client_fa
     mock_post.return_value = mock_response
 
     # Act
-    res = await make_request_to_external(query_request)
+    res = await make_request_to_external(query_request, http_client)
 
     # Assert
     assert res is positive_result
@@ -30,7 +44,7 @@ async def test_getting_positive_result(mock_post, query_request, async_client_fa
 
 @pytest.mark.asyncio
 @patch("httpx.AsyncClient.post", new_callable=AsyncMock)
-async def test_getting_negative_result(mock_post, query_request, async_client_factory):
+async def test_getting_negative_result(mock_post, query_request, http_client):
     """Тест получения отрицательного результата от внешнего сервиса."""
     # Arrange
     negative_result = False
@@ -41,7 +55,7 @@ async def test_getting_negative_result(mock_post, query_request, async_client_fa
     mock_post.return_value = mock_response
 
     # Act
-    res = await make_request_to_external(query_request)
+    res = await make_request_to_external(query_request, http_client)
 
     # Assert
     assert res is negative_result
@@ -50,7 +64,7 @@ async def test_getting_negative_result(mock_post, query_request, async_client_fa
 
 @pytest.mark.asyncio
 @patch("httpx.AsyncClient.post", new_callable=AsyncMock)
-async def test_service_unavailable(mock_post, query_request, async_client_factory):
+async def test_service_unavailable(mock_post, query_request, http_client):
     """Тест обработки ошибки запроса к внешнему сервису."""
     # Arrange
     mock_post.side_effect = httpx.RequestError("Some request error")
@@ -58,7 +72,363 @@ async def test_service_unavailable(mock_post, query_request, async_client_factor
 
     # Act & Assert
     with pytest.raises(ExternalServiceUnavailable, match=expected_exc_info):
-        await make_request_to_external(query_request)
+        await make_request_to_external(query_request, http_client)
 
     # Assert
+    assert mock_post.await_count == settings.EXTERNAL_RETRY_ATTEMPTS
+
+
+@pytest.mark.asyncio
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+async def test_external_outcomes_are_counted(mock_post, query_request, http_client):
+    """Тест счётчиков исходов обращений к внешнему сервису и span'а вокруг обращения."""
+    # Arrange
+    metrics.reset()
+    mock_post.side_effect = [
+        httpx.Response(status_code=status.HTTP_200_OK, json={"result": True}),
+        *[httpx.RequestError("Some request error")] * settings.EXTERNAL_RETRY_ATTEMPTS,
+    ]
+
+    # Act
+    await make_request_to_external(query_request, http_client)
+    with pytest.raises(ExternalServiceUnavailable):
+        await make_request_to_external(query_request, http_client)
+
+    # Assert
+    assert metrics.counters == {
+        ("external_requests", (("outcome", "true"),)): 1,
+        ("external_requests", (("outcome", "unavailable"),)): 1,
+    }
+    assert metrics.spans["external.request"].count == 2
+    assert metrics.span_errors["external.request"] == 1
+
+
+@pytest.mark.asyncio
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+async def test_error_status_is_unavailable(mock_post, query_request, http_client):
+    """Тест обработки ответа внешнего сервиса с кодом ошибки."""
+    # Arrange
+    mock_post.return_value = httpx.Response(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, json={"detail": "down"})
+
+    # Act & Assert
+    with pytest.raises(ExternalServiceUnavailable, match="External service temporarily unavailable"):
+        await make_request_to_external(query_request, http_client)
+
+
+@pytest.mark.asyncio
+@patch("api.services.settings.EXTERNAL_BATCH_ENABLED", True)
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+async def test_concurrent_requests_are_batched(mock_post, http_client):
+    """Тест объединения одновременных запросов в одно пакетное обращение к `/results`."""
+    # Arrange
+    requests = [
+        QueryRequestAddDTO(cadastral_number=f"77:01:000401{i}:10", latitude=55.75, longitude=37.61) for i in range(3)
+    ]
+    mock_post.return_value = httpx.Response(status_code=status.HTTP_200_OK, json={"results": [True, False, True]})
+
+    # Act
+    results = await asyncio.gather(*(make_request_to_external(request, http_client) for request in requests))
+
+    # Assert
+    assert results == [True, False, True]
     mock_post.assert_awaited_once()
+    url = mock_post.await_args.args[0]
+    assert url == "/results"
+    assert [item["cadastral_number"] for item in mock_post.await_args.kwargs["json"]["items"]] == [
+        request.cadastral_number for request in requests
+    ]
+    assert http_client.batcher.stats()["batches"] == 1
+    await http_client.disconnect()
+    assert http_client.batcher is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("batched", [False, True], ids=["single", "batched"])
+@pytest.mark.parametrize("payload", [{}, {"results": []}, ["not", "an", "object"]], ids=["empty", "short", "list"])
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+async def test_malformed_response_is_unavailable(mock_post, payload, batched, query_request, http_client):
+    """Тест обработки ответа внешнего сервиса без результата или с неверным количеством результатов."""
+    # Arrange
+    mock_post.return_value = httpx.Response(status_code=status.HTTP_200_OK, json=payload)
+
+    # Act & Assert
+    with patch("api.services.settings.EXTERNAL_BATCH_ENABLED", batched):
+        with pytest.raises(ExternalServiceUnavailable, match="External service temporarily unavailable"):
+            await make_request_to_external(query_request, http_client)
+
+
+@pytest.mark.asyncio
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+async def test_shared_client_is_reused(mock_post, query_request, http_client):
+    """Тест переиспользования одного HTTP-клиента для нескольких запросов."""
+    # Arrange
+    mock_post.return_value = httpx.Response(status_code=status.HTTP_200_OK, json={"result": True})
+    client_before = http_client.client
+
+    # Act
+    await make_request_to_external(query_request, http_client)
+    await make_request_to_external(query_request, http_client)
+
+    # Assert
+    assert http_client.client is client_before
+    assert mock_post.await_count == 2
+    assert mock_post.await_args.args[0] == "/result"
+
+
+@pytest.mark.asyncio
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+async def test_open_circuit_fails_fast(mock_post, query_request, http_client):
+    """Тест немедленного отказа без обращения к внешнему сервису при разомкнутом выключателе."""
+    # Arrange
+    mock_post.side_effect = httpx.ConnectError("Connection refused")
+    for _ in range(external_breaker.min_calls):
+        with pytest.raises(ExternalServiceUnavailable):
+            await make_request_to_external(query_request, http_client)
+    mock_post.reset_mock()
+
+    # Act & Assert
+    with pytest.raises(ExternalServiceUnavailable, match="circuit open"):
+        await make_request_to_external(query_request, http_client)
+    mock_post.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@patch("api.services.fetch_external_result", new_callable=AsyncMock)
+async def test_unexpected_error_releases_probe(mock_fetch, query_request, http_client, monkeypatch):
+    """Тест того, что непредвиденная ошибка пробного вызова не занимает слот полуоткрытого выключателя навсегда."""
+    # Arrange
+    mock_fetch.side_effect = httpx.ConnectError("Connection refused")
+    for _ in range(external_breaker.min_calls):
+        with pytest.raises(ExternalServiceUnavailable):
+            await make_request_to_external(query_request, http_client)
+    monkeypatch.setattr(external_breaker, "open_duration", 0)
+    mock_fetch.side_effect = RuntimeError("boom")
+
+    # Act & Assert
+    for _ in range(external_breaker.half_open_calls + 1):
+        with pytest.raises(RuntimeError):
+            await make_request_to_external(query_request, http_client)
+    assert mock_fetch.await_count == external_breaker.min_calls + external_breaker.half_open_calls + 1
+
+
+@pytest.mark.asyncio
+@patch("api.services.external_timeout", return_value=0.01)
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+async def test_slow_response_times_out(mock_post, mock_timeout, query_request, http_client):
+    """Тест прерывания обращения, не уложившегося в адаптивный таймаут."""
+
+    # Arrange
+    async def slow_post(*args, **kwargs):
+        await asyncio.sleep(1)
+
+    mock_post.side_effect = slow_post
+
+    # Act & Assert
+    with pytest.raises(ExternalServiceUnavailable):
+        await make_request_to_external(query_request, http_client)
+    assert external_breaker.stats()["failure_rate"] == 1.0
+
+
+@patch("api.services.settings.EXTERNAL_ADAPTIVE_TIMEOUT_MIN_SAMPLES", 5)
+def test_external_timeout_follows_p99():
+    """Тест вычисления таймаута по p99 последних задержек в заданных пределах."""
+    # Arrange
+    for latency in (1.0, 1.0, 2.0, 2.0, 4.0):
+        external_latency.observe(latency)
+
+    # Act & Assert
+    assert external_timeout() == pytest.approx(
+        min(4.0 * settings.EXTERNAL_ADAPTIVE_TIMEOUT_MULTIPLIER, settings.EXTERNAL_TIMEOUT_MAX)
+    )
+
+
+@pytest.mark.asyncio
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+async def test_transient_error_is_retried(mock_post, query_request, http_client):
+    """Тест успешного повтора после временной ошибки внешнего сервиса."""
+    # Arrange
+    mock_post.side_effect = [
+        httpx.ConnectError("Connection reset"),
+        httpx.Response(status_code=status.HTTP_200_OK, json={"result": True}),
+    ]
+    retries_before = external_stats.retries
+
+    # Act
+    res = await make_request_to_external(query_request, http_client)
+
+    # Assert
+    assert res is True
+    assert mock_post.await_count == 2
+    assert external_stats.retries == retries_before + 1
+
+
+@pytest.mark.asyncio
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+async def test_retries_stop_when_budget_is_exhausted(mock_post, query_request, http_client):
+    """Тест отказа от повторов, когда бюджет дополнительных обращений исчерпан."""
+    # Arrange
+    mock_post.side_effect = httpx.ConnectError("Connection refused")
+    external_budget.tokens = 0
+
+    # Act & Assert
+    with pytest.raises(ExternalServiceUnavailable):
+        await make_request_to_external(query_request, http_client)
+    mock_post.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@patch("api.services.hedge_delay", return_value=0.01)
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+async def test_slow_call_is_hedged(mock_post, mock_hedge_delay, query_request, http_client):
+    """Тест дублирующего запроса: ответ берётся у того, кто ответил первым."""
+    # Arrange
+    responses = iter([1, 0])
+
+    async def post(*args, **kwargs):
+        await asyncio.sleep(next(responses))
+        return httpx.Response(status_code=status.HTTP_200_OK, json={"result": True})
+
+    mock_post.side_effect = post
+    hedge_wins_before = external_stats.hedge_wins
+
+    # Act
+    res = await asyncio.wait_for(make_request_to_external(query_request, http_client), timeout=0.5)
+
+    # Assert
+    assert res is True
+    assert mock_post.await_count == 2
+    assert external_stats.hedge_wins == hedge_wins_before + 1
+
+
+@pytest.mark.asyncio
+@patch("api.services.make_request_to_external", new_callable=AsyncMock)
+async def test_cached_result_skips_external_call(mock_make_request, query_request, http_client):
+    """Тест повторного запроса, обслуженного из кэша без обращения к внешнему сервису."""
+    # Arrange
+    cache = InMemoryResultCache(maxsize=10, ttl=60)
+    mock_make_request.return_value = False
+
+    # Act
+    first = await get_external_result(query_request, http_client, cache)
+    second = await get_external_result(query_request, http_client, cache)
+
+    # Assert
+    assert first is second is False
+    mock_make_request.assert_awaited_once()
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "latest, served",
+    [
+        ({"age": 10.0, "latitude": 55.7558, "longitude": 37.6173}, True),
+        ({"age": 10.0, "latitude": 55.7558004, "longitude": 37.6173}, True),
+        ({"age": 120.0, "latitude": 55.7558, "longitude": 37.6173}, False),
+        ({"age": 10.0, "latitude": 55.76, "longitude": 37.6173}, False),
+        (None, False),
+    ],
+    ids=["fresh", "same_point_at_cache_precision", "stale", "other_point", "missing"],
+)
+@patch("api.services.settings.CADASTRAL_LATEST_MAX_AGE", 60.0)
+@patch("api.services.get_latest_result", new_callable=AsyncMock)
+@patch("api.services.make_request_to_external", new_callable=AsyncMock)
+async def test_fresh_latest_result_skips_external(mock_make_request, mock_get_latest, latest, served, http_client):
+    """Тест ответа из `cadastral_latest` только для свежего результата по тем же координатам."""
+    # Arrange
+    request = QueryRequestAddDTO(cadastral_number="77:01:0004012:2041", latitude=55.7558, longitude=37.6173)
+    mock_get_latest.return_value = None if latest is None else {**latest, "result": True}
+    mock_make_request.return_value = False
+
+    # Act
+    result = await get_external_result(request, http_client, None, AsyncMock())
+
+    # Assert
+    assert result is served
+    assert mock_make_request.await_count == (0 if served else 1)
+
+
+@pytest.mark.asyncio
+@patch("api.services.get_latest_result", new_callable=AsyncMock)
+@patch("api.services.make_request_to_external", new_callable=AsyncMock)
+async def test_latest_result_is_disabled_by_default(mock_make_request, mock_get_latest, query_request, http_client):
+    """Тест того, что без `CADASTRAL_LATEST_MAX_AGE` таблица `cadastral_latest` не читается."""
+    # Arrange
+    mock_make_request.return_value = True
+
+    # Act
+    result = await get_external_result(query_request, http_client, None, AsyncMock())
+
+    # Assert
+    assert result is True
+    mock_get_latest.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@patch("api.services.make_request_to_external", new_callable=AsyncMock)
+async def test_unavailable_result_is_not_cached(mock_make_request, query_request, http_client):
+    """Тест того, что ошибка внешнего сервиса не попадает в кэш."""
+    # Arrange
+    cache = InMemoryResultCache(maxsize=10, ttl=60)
+    mock_make_request.side_effect = ExternalServiceUnavailable("Service down")
+
+    # Act & Assert
+    for _ in range(2):
+        with pytest.raises(ExternalServiceUnavailable):
+            await get_external_result(query_request, http_client, cache)
+
+    # Assert
+    assert mock_make_request.await_count == 2
+
+
+@pytest.mark.asyncio
+@patch("api.services.make_request_to_external")
+async def test_identical_requests_are_coalesced(mock_make_request, query_request, http_client):
+    """Тест объединения одновременных одинаковых запросов в одно обращение к внешнему сервису."""
+    # Arrange
+    release = asyncio.Event()
+
+    async def slow_request(*_):
+        await release.wait()
+        return True
+
+    mock_make_request.side_effect = slow_request
+
+    # Act
+    tasks = [asyncio.create_task(get_external_result(query_request, http_client, None)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    # Assert
+    assert results == [True] * 5
+    mock_make_request.assert_called_once()
+
+
+@pytest.mark.asyncio
+@patch("api.services.get_external_result")
+async def test_batch_respects_concurrency_limit(mock_get_result, http_client):
+    """Тест ограничения количества одновременных обращений при обработке пакета."""
+    # Arrange
+    active = peak = 0
+
+    async def slow_request(*_):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return True
+
+    mock_get_result.side_effect = slow_request
+    items = [
+        {"cadastral_number": f"77:01:0004010:{1000 + i}", "latitude": 55.75, "longitude": 37.61} for i in range(10)
+    ]
+
+    # Act
+    results = [item async for item in iter_batch_results(items, http_client, None, concurrency=3)]
+
+    # Assert
+    assert len(results) == 10
+    assert all(item.result is True for item in results)
+    assert peak == 3
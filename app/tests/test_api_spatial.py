@@ -0,0 +1,43 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from api.spatial import SpatialIndex, nearby_query
+
+
+@pytest.mark.parametrize(
+    "backend,index_condition",
+    [
+        ("postgis", "ST_DWithin(geog, "),
+        ("earthdistance", "earth_box(ll_to_earth($1, $2), $3) @> ll_to_earth(latitude, longitude)"),
+    ],
+)
+def test_nearby_query_uses_index_operators(backend, index_condition):
+    """Проверяет, что запрос фильтрует по индексируемому условию и сортирует оператором KNN."""
+    # Act
+    query = nearby_query(backend, with_cursor=True)
+
+    # Assert
+    assert index_condition in query
+    assert "ORDER BY " in query and " <-> " in query.split("ORDER BY ")[1]
+    assert "id) > ($5, $6)" in query
+    assert query.endswith("LIMIT $4")
+    assert "$5" not in nearby_query(backend, with_cursor=False)
+
+
+@pytest.mark.asyncio
+async def test_spatial_index_detects_backend_once():
+    """Проверяет определение способа индексации по схеме БД и его запоминание."""
+    # Arrange
+    mock_db = AsyncMock()
+    mock_db.fetchrow.return_value = {"has_geog": True}
+    spatial_index = SpatialIndex()
+
+    # Act
+    backends = [await spatial_index.get_backend(mock_db, "auto") for _ in range(2)]
+    configured = await spatial_index.get_backend(mock_db, "earthdistance")
+
+    # Assert
+    assert backends == ["postgis", "postgis"]
+    assert configured == "earthdistance"
+    mock_db.fetchrow.assert_awaited_once()
@@ -2,7 +2,7 @@ from unittest.mock import AsyncMock
 
 import pytest
 
-from api.utils import save_query_to_db
+from api.utils import save_queries_to_db, save_query_to_db
 
 
 @pytest.mark.asyncio
@@ -42,3 +42,18 @@ async def test_save_query_to_db_without_returning(cadastral_test_data, result_te
     # Assert
     mock_db.execute.assert_awaited_once()
     assert result is None
+
+
+@pytest.mark.asyncio
+async def test_save_queries_to_db_uses_single_batch(cadastral_test_data, result_test_data):
+    """Тестирует сохранение нескольких запросов одним пакетом."""
+    # Arrange
+    mock_db = AsyncMock()
+    row = (*cadastral_test_data.values(), result_test_data["result"])
+
+    # Act
+    await save_queries_to_db(mock_db, [row, row])
+
+    # Assert
+    mock_db.executemany.assert_awaited_once()
+    assert len(mock_db.executemany.await_args.args[1]) == 2
@@ -1,6 +1,8 @@
+import time
+
 import pytest
 
-from api.validators import CadastralValidator
+from api.validators import CadastralNumber, CadastralValidator, _parse
 
 
 @pytest.mark.parametrize(
@@ -39,12 +41,77 @@ def test_old_format_with_cadastral_validator(old_cn, normalized_cn):
 @pytest.mark.parametrize(
     "invalid_cn",
     [
-        ("50:45:1234567",),  # неверное количество частей (всего 3)
-        ("50:45:abcdefg:12",),  # неверный формат чисел
-        ("50 45 1234567 890",),  # отсутствует обязательный символ `:`
+        "50:45:1234567",  # неверное количество частей (всего 3)
+        "50:45:abcdefg:12",  # неверный формат чисел
+        "50 45 1234567 890",  # отсутствует обязательный символ `:`
+        "50:45:1234567:1234567",  # слишком длинный номер участка
+        "50:45:1234567:12:1",  # неверное количество частей (всего 5)
     ],
 )
 def test_invalid_format_with_cadastral_validator(invalid_cn):
     """Проверяет отклонение неверных кадастровых номеров."""
     # Act & Assert
     assert CadastralValidator.is_valid(invalid_cn) is False
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        (" 77:01 :0004012:2041", CadastralNumber("77", "01", "0004012", "2041")),
+        ("01:02:3456789:56:4:5", CadastralNumber("01", "02", "3456789", "56:4:5")),
+        ("50:45:abcdefg:12", None),
+    ],
+)
+def test_parse_returns_parts(value, expected):
+    """Проверяет разбор кадастрового номера на части."""
+    # Act
+    parsed = CadastralValidator.parse(value)
+
+    # Assert
+    assert parsed == expected
+    if parsed is not None:
+        assert str(parsed) == CadastralValidator.normalize(value)
+        assert parsed.legacy is (parsed.parcel.count(":") == 2)
+
+
+def test_validate_many_keeps_order():
+    """Проверяет пакетный разбор с сохранением порядка и повторяющимися номерами."""
+    # Act
+    results = CadastralValidator.validate_many(["77:01:0004012:2041", "bad", " 77:01:0004012:2041 "])
+
+    # Assert
+    assert results == [CadastralNumber("77", "01", "0004012", "2041"), None, results[0]]
+
+
+def test_parse_is_memoized():
+    """Проверяет, что повторный разбор того же номера берётся из кэша."""
+    # Arrange
+    _parse.cache_clear()
+
+    # Act
+    for _ in range(3):
+        CadastralValidator.parse("77:01:0004012:2041")
+
+    # Assert
+    assert _parse.cache_info().hits == 2
+    assert _parse.cache_info().misses == 1
+
+
+@pytest.mark.benchmark
+def test_validation_benchmark():
+    """Микробенчмарк: разбор пакета номеров с повторами укладывается в бюджет времени."""
+    # Arrange
+    _parse.cache_clear()
+    values = [f" 77:{i % 100:02d}:{i:07d}:{i % 9000 + 10} " for i in range(2_000)] * 10
+
+    # Act
+    started = time.perf_counter()
+    results = CadastralValidator.validate_many(values)
+    for value in values:
+        CadastralValidator.is_valid(CadastralValidator.normalize(value))
+    elapsed = time.perf_counter() - started
+
+    # Assert
+    assert all(results)
+    assert _parse.cache_info().misses == 2_000
+    assert elapsed < 1.0, f"{len(values) * 2 / elapsed:.0f} validations/s"
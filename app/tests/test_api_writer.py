@@ -0,0 +1,181 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from api.writer import QUERY_COLUMNS, QueryWriteBuffer
+
+
+@pytest.mark.asyncio
+async def test_rows_are_flushed_when_batch_is_full():
+    """Тестирует запись буфера одним COPY при достижении размера пакета."""
+    # Arrange
+    writer = QueryWriteBuffer()
+    mock_db = AsyncMock()
+    await writer.start(db=mock_db, batch_size=2, max_age=60, capacity=10, spool_path=None)
+
+    # Act
+    await writer.add("77:01:0001001:1", 55.7, 37.6, True)
+    await writer.add("77:01:0001001:2", 55.8, 37.7, None)
+    await asyncio.sleep(0.01)
+
+    # Assert
+    mock_db.copy_records.assert_awaited_once()
+    table, rows = mock_db.copy_records.await_args.args
+    assert table == "queries"
+    assert mock_db.copy_records.await_args.kwargs["columns"] == QUERY_COLUMNS
+    assert [row[:5] for row in rows] == [
+        ("77:01:0001001:1", 55.7, 37.6, True, "done"),
+        ("77:01:0001001:2", 55.8, 37.7, None, "failed"),
+    ]
+    await writer.stop()
+    assert writer.stats() == {"buffered": 0, "flushed": 2, "spooled": 0}
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_remaining_rows():
+    """Тестирует запись оставшихся строк при остановке."""
+    # Arrange
+    writer = QueryWriteBuffer()
+    mock_db = AsyncMock()
+    await writer.start(db=mock_db, batch_size=100, max_age=60, capacity=100, spool_path=None)
+    await writer.add("77:01:0001001:1", 55.7, 37.6, True)
+
+    # Act
+    await writer.stop()
+
+    # Assert
+    mock_db.copy_records.assert_awaited_once()
+    assert writer.stats()["buffered"] == 0
+
+
+@pytest.mark.asyncio
+async def test_add_waits_when_buffer_is_full():
+    """Тестирует ожидание свободного места в заполненном буфере."""
+    # Arrange
+    writer = QueryWriteBuffer()
+    mock_db = AsyncMock()
+    await writer.start(db=mock_db, batch_size=100, max_age=60, capacity=1, spool_path=None)
+    await writer.add("77:01:0001001:1", 55.7, 37.6, True)
+
+    # Act
+    await asyncio.wait_for(writer.add("77:01:0001001:2", 55.7, 37.6, True), timeout=1)
+
+    # Assert
+    mock_db.copy_records.assert_awaited_once()
+    assert writer.stats()["buffered"] == 1
+    await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_rows_are_spooled_and_replayed(tmp_path):
+    """Тестирует сохранение строк в spool-файл при ошибке БД и их повторную загрузку."""
+    # Arrange
+    spool_path = tmp_path / "queries.ndjson"
+    writer = QueryWriteBuffer()
+    mock_db = AsyncMock()
+    mock_db.copy_records.side_effect = ConnectionRefusedError()
+    await writer.start(db=mock_db, batch_size=100, max_age=60, capacity=100, spool_path=spool_path)
+    await writer.add("77:01:0001001:1", 55.7, 37.6, True)
+
+    # Act
+    await writer.stop()
+
+    # Assert
+    assert spool_path.exists()
+    assert writer.stats()["spooled"] == 1
+
+    # Act
+    mock_db.copy_records.side_effect = None
+    restarted = QueryWriteBuffer()
+    await restarted.start(db=mock_db, batch_size=100, max_age=60, capacity=100, spool_path=spool_path)
+    await restarted.stop()
+
+    # Assert
+    _, rows = mock_db.copy_records.await_args.args
+    assert rows[0][:5] == ("77:01:0001001:1", 55.7, 37.6, True, "done")
+    assert not spool_path.exists()
+
+
+@pytest.mark.asyncio
+async def test_background_flush_survives_errors():
+    """Тестирует, что ошибка одной записи не останавливает фоновую запись."""
+    # Arrange
+    writer = QueryWriteBuffer()
+    mock_db = AsyncMock()
+    await writer.start(db=mock_db, batch_size=1, max_age=60, capacity=10, spool_path=None)
+    writer._copy = AsyncMock(side_effect=[RuntimeError("boom"), True])
+
+    # Act
+    await writer.add("77:01:0001001:1", 55.7, 37.6, True)
+    await asyncio.sleep(0.01)
+    await writer.add("77:01:0001001:2", 55.7, 37.6, True)
+    await asyncio.sleep(0.01)
+
+    # Assert
+    assert writer._copy.await_count == 2
+    assert writer._task is not None and not writer._task.done()
+    await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_add_writes_directly_after_max_wait():
+    """Тестирует прямую запись строки, если место в заполненном буфере не освободилось вовремя."""
+    # Arrange
+    writer = QueryWriteBuffer()
+    mock_db = AsyncMock()
+    await writer.start(db=mock_db, batch_size=100, max_age=60, capacity=1, spool_path=None, max_wait=0.01)
+    # Фоновая запись остановлена и не освобождает место
+    await writer.stop()
+    await writer.add("77:01:0001001:1", 55.7, 37.6, True)
+
+    # Act
+    await asyncio.wait_for(writer.add("77:01:0001001:2", 55.7, 37.6, False), timeout=1)
+
+    # Assert
+    _, rows = mock_db.copy_records.await_args.args
+    assert [row[:4] for row in rows] == [("77:01:0001001:2", 55.7, 37.6, False)]
+    assert writer.stats()["buffered"] == 1
+    await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_row_spooled_during_replay_is_kept(tmp_path):
+    """Тестирует, что строка, отложенная в spool-файл во время его повторной загрузки, не теряется."""
+    # Arrange
+    spool_path = tmp_path / "queries.ndjson"
+    replay_started, release_replay = asyncio.Event(), asyncio.Event()
+    calls = {"77:01:0001001:1": 0}
+
+    async def copy_records(table, rows, columns, track):
+        number = rows[0][0]
+        if number == "77:01:0001001:1":
+            calls[number] += 1
+            if calls[number] == 1:
+                raise ConnectionRefusedError()
+            replay_started.set()
+            await release_replay.wait()
+        elif number == "77:01:0001001:3":
+            raise ConnectionRefusedError()
+
+    mock_db = AsyncMock()
+    mock_db.copy_records.side_effect = copy_records
+    writer = QueryWriteBuffer()
+    await writer.start(db=mock_db, batch_size=100, max_age=60, capacity=1, spool_path=spool_path, max_wait=0)
+    await writer.add("77:01:0001001:1", 55.7, 37.6, True)
+    await writer.flush()
+    await writer.add("77:01:0001001:2", 55.7, 37.6, True)
+
+    # Act
+    flush = asyncio.create_task(writer.flush())
+    await replay_started.wait()
+    await writer.add("77:01:0001001:4", 55.7, 37.6, True)
+    add = asyncio.create_task(writer.add("77:01:0001001:3", 55.7, 37.6, False))
+    await asyncio.sleep(0.01)
+    release_replay.set()
+    await asyncio.gather(flush, add)
+
+    # Assert
+    assert spool_path.read_text(encoding="utf-8").count("77:01:0001001:3") == 1
+    assert writer.stats()["spooled"] == 1
+    await writer.stop()
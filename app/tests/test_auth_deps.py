@@ -0,0 +1,108 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+
+from auth.cache import user_cache
+from auth.deps import get_current_auth_user, validate_auth_user
+from auth.hashing import PasswordHasher
+from auth.utils import set_user_active
+
+USER_RECORD = {"id": 1, "email": "user@example.com", "hashed_password": "hash", "active": True}
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    """Очищает кэш пользователей до и после каждого теста."""
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_user_is_loaded_from_db_once():
+    """Тестирует, что повторный запрос с тем же токеном обслуживается из кэша."""
+    # Arrange
+    mock_db = AsyncMock()
+    mock_db.fetchrow.return_value = USER_RECORD
+    payload = {"sub": USER_RECORD["email"]}
+
+    # Act
+    first = await get_current_auth_user(mock_db, payload)
+    second = await get_current_auth_user(mock_db, payload)
+
+    # Assert
+    assert first == second
+    assert first.id == USER_RECORD["id"]
+    mock_db.fetchrow.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_deactivation_invalidates_cached_user():
+    """Тестирует сброс кэша при деактивации пользователя."""
+    # Arrange
+    mock_db = AsyncMock()
+    mock_db.fetchrow.return_value = USER_RECORD
+    payload = {"sub": USER_RECORD["email"]}
+    await get_current_auth_user(mock_db, payload)
+
+    # Act
+    await set_user_active(mock_db, USER_RECORD["email"], active=False)
+    mock_db.fetchrow.return_value = {**USER_RECORD, "active": False}
+    user = await get_current_auth_user(mock_db, payload)
+
+    # Assert
+    assert user.active is False
+    assert mock_db.fetchrow.await_count == 2
+
+
+@pytest.mark.asyncio
+@patch("auth.deps.settings")
+async def test_trusted_claims_skip_db(mock_settings):
+    """Тестирует построение пользователя из подписанных claims без обращения к БД."""
+    # Arrange
+    mock_settings.AUTH_TRUST_TOKEN_CLAIMS = True
+    mock_db = AsyncMock()
+    payload = {"sub": USER_RECORD["email"], "uid": 5, "active": True}
+
+    # Act
+    user = await get_current_auth_user(mock_db, payload)
+
+    # Assert
+    assert (user.id, user.email, user.active) == (5, USER_RECORD["email"], True)
+    mock_db.fetchrow.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_unknown_user_is_rejected():
+    """Тестирует отказ, если пользователь из токена не найден."""
+    # Arrange
+    mock_db = AsyncMock()
+    mock_db.fetchrow.return_value = None
+
+    # Act & Assert
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_auth_user(mock_db, {"sub": "missing@example.com"})
+    assert exc_info.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_password_with_outdated_cost():
+    """Тестирует пересчёт хеша пароля при смене cost factor."""
+    # Arrange
+    old_hasher = PasswordHasher(rounds=4, max_workers=1, max_pending=4)
+    new_hasher = PasswordHasher(rounds=5, max_workers=1, max_pending=4)
+    mock_db = AsyncMock()
+    mock_db.fetchrow.return_value = {**USER_RECORD, "hashed_password": await old_hasher.hash("qwerty123")}
+    form_data = OAuth2PasswordRequestForm(username=USER_RECORD["email"], password="qwerty123")
+
+    # Act
+    user = await validate_auth_user(mock_db, new_hasher, form_data)
+
+    # Assert
+    assert user.hashed_password.startswith("$2b$05$")
+    mock_db.execute.assert_awaited_once()
+    assert mock_db.execute.await_args.args[2] == user.hashed_password
+    old_hasher.shutdown()
+    new_hasher.shutdown()
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+
+import pytest
+
+from auth.exceptions import PasswordHasherBusy
+from auth.hashing import PasswordHasher
+
+
+@pytest.fixture
+def hasher():
+    """Пул хеширования паролей с минимальным cost factor."""
+    instance = PasswordHasher(rounds=4, max_workers=1, max_pending=1)
+    yield instance
+    instance.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify(hasher):
+    """Проверяет хеширование и проверку пароля в пуле потоков."""
+    # Act
+    hashed = await hasher.hash("qwerty123")
+
+    # Assert
+    assert hashed.startswith("$2b$04$")
+    assert await hasher.verify("qwerty123", hashed) is True
+    assert await hasher.verify("wrong-password", hashed) is False
+
+
+@pytest.mark.asyncio
+async def test_overloaded_pool_sheds_load(hasher):
+    """Проверяет отказ при переполнении очереди хеширования."""
+    # Arrange
+    release = threading.Event()
+    blocker = asyncio.ensure_future(hasher._run(release.wait))
+    await asyncio.sleep(0)
+
+    # Act & Assert
+    with pytest.raises(PasswordHasherBusy):
+        await hasher.hash("qwerty123")
+    release.set()
+    await blocker
+    assert hasher.pending == 0
+
+
+@pytest.mark.parametrize(
+    "hashed_password,expected",
+    [
+        ("$2b$04$abcdefghijklmnopqrstuu", False),
+        ("$2b$12$abcdefghijklmnopqrstuu", True),
+        ("not-a-bcrypt-hash", True),
+    ],
+)
+def test_needs_rehash(hasher, hashed_password, expected):
+    """Проверяет определение устаревшего cost factor."""
+    # Act & Assert
+    assert hasher.needs_rehash(hashed_password) is expected
@@ -0,0 +1,77 @@
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+from auth.cache import token_cache
+from auth.utils import decode_jwt, decode_jwt_cached, encode_jwt, get_user_by_email
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    """Очищает кэш токенов до и после каждого теста."""
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+def test_token_signature_is_verified_once():
+    """Проверяет, что повторная проверка того же токена берётся из кэша."""
+    # Arrange
+    token = encode_jwt({"sub": "user@example.com"})
+
+    # Act
+    with patch("auth.utils.jwt.decode", wraps=jwt.decode) as mock_decode:
+        first = decode_jwt_cached(token)
+        second = decode_jwt_cached(token)
+
+    # Assert
+    assert first == second
+    assert first["sub"] == "user@example.com"
+    mock_decode.assert_called_once()
+
+
+def test_expired_token_is_not_cached():
+    """Проверяет, что просроченный токен отклоняется и не попадает в кэш."""
+    # Arrange
+    token = encode_jwt({"sub": "user@example.com"}, expire_timedelta=timedelta(seconds=-1))
+    hits_before = token_cache.stats.hits
+
+    # Act & Assert
+    for _ in range(2):
+        with pytest.raises(jwt.ExpiredSignatureError):
+            decode_jwt_cached(token)
+    assert token_cache.stats.hits == hits_before
+    assert len(token_cache._cache) == 0
+
+
+@pytest.mark.parametrize(
+    "private_key,algorithm",
+    [
+        (ec.generate_private_key(ec.SECP256R1()), "ES256"),
+        (ed25519.Ed25519PrivateKey.generate(), "EdDSA"),
+    ],
+)
+def test_alternative_algorithms(private_key, algorithm):
+    """Проверяет выпуск и проверку токенов ключами ES256 и EdDSA."""
+    # Act
+    token = encode_jwt({"sub": "user@example.com"}, private_key=private_key, algorithm=algorithm)
+    payload = decode_jwt(token, public_key=private_key.public_key(), algorithm=algorithm)
+
+    # Assert
+    assert payload["sub"] == "user@example.com"
+
+
+@pytest.mark.asyncio
+async def test_user_is_read_from_primary():
+    """Проверяет, что пользователь читается с основного сервера, а не с реплики."""
+    # Arrange
+    db = AsyncMock()
+
+    # Act
+    await get_user_by_email(db, "user@example.com")
+
+    # Assert
+    assert db.fetchrow.await_args.kwargs.get("read_only", False) is False
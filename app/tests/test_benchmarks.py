@@ -0,0 +1,67 @@
+import httpx
+import pytest
+
+from benchmarks.load import percentile, run_scenario
+from benchmarks.stand_in import EmulatorSettings, ExternalStandIn, cadastral_result
+
+
+async def collect_statuses(stand_in: ExternalStandIn, numbers: list[str]) -> list[tuple[int, bool | None]]:
+    async with httpx.AsyncClient(transport=stand_in, base_url="http://external.test") as client:
+        responses = [
+            await client.post("/result", json={"cadastral_number": number, "latitude": 0, "longitude": 0})
+            for number in numbers
+        ]
+    return [(response.status_code, response.json().get("result")) for response in responses]
+
+
+@pytest.mark.asyncio
+async def test_stand_in_is_deterministic():
+    """Проверяет, что эмулятор с одинаковым зерном даёт одинаковые ответы и ошибки."""
+    # Arrange
+    numbers = [f"77:01:{i:07d}:10" for i in range(50)]
+    settings = EmulatorSettings(latency_model="uniform", latency_low=0.0, latency_high=0.001, error_rate=0.3, seed=7)
+
+    # Act
+    first = await collect_statuses(ExternalStandIn(settings), numbers)
+    second = await collect_statuses(ExternalStandIn(settings), numbers)
+
+    # Assert
+    assert first == second
+    assert {status_code for status_code, _ in first} == {200, 503}
+    assert all(
+        result == cadastral_result(number, settings.positive_rate)
+        for number, (status_code, result) in zip(numbers, first)
+        if status_code == 200
+    )
+
+
+def test_percentile_nearest_rank():
+    """Проверяет квантили методом ближайшего ранга."""
+    # Arrange
+    values = [float(i) for i in range(1, 101)]
+
+    # Act & Assert
+    assert percentile(values, 0.5) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.5) is None
+
+
+@pytest.mark.asyncio
+async def test_run_scenario_respects_request_count():
+    """Проверяет, что сценарий отправляет заданное количество запросов и считает коды ответов."""
+    # Arrange
+    sent = []
+
+    async def send(index: int) -> httpx.Response:
+        sent.append(index)
+        return httpx.Response(200 if index % 4 else 500)
+
+    # Act
+    result = await run_scenario(send, requests=20, concurrency=3)
+
+    # Assert
+    assert sorted(sent) == list(range(20))
+    summary = result.as_dict()
+    assert summary["requests"] == 20
+    assert summary["statuses"] == {"200": 15, "500": 5}
+    assert summary["errors"] == 5
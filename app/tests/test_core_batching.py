@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from core.batching import MicroBatcher
+
+
+@pytest.mark.asyncio
+async def test_concurrent_items_are_sent_in_one_batch():
+    """Проверяет, что одновременные элементы отправляются одним пакетом, а результаты раздаются по порядку."""
+    # Arrange
+    batches = []
+
+    async def send_batch(items: list[int]) -> list[int]:
+        batches.append(items)
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(send_batch, max_size=100, window=0.01)
+
+    # Act
+    results = await asyncio.gather(*(batcher.submit(item) for item in range(5)))
+
+    # Assert
+    assert results == [0, 10, 20, 30, 40]
+    assert batches == [[0, 1, 2, 3, 4]]
+    assert batcher.stats()["batches"] == 1
+    assert batcher.stats()["items"] == 5
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_sent_before_window_ends():
+    """Проверяет отправку пакета при достижении максимального размера, не дожидаясь окна."""
+    # Arrange
+    batches = []
+
+    async def send_batch(items: list[int]) -> list[int]:
+        batches.append(items)
+        return items
+
+    batcher = MicroBatcher(send_batch, max_size=2, window=10)
+
+    # Act
+    results = await asyncio.wait_for(asyncio.gather(*(batcher.submit(item) for item in range(4))), timeout=1)
+
+    # Assert
+    assert results == [0, 1, 2, 3]
+    assert batches == [[0, 1], [2, 3]]
+
+
+@pytest.mark.asyncio
+async def test_batch_error_is_raised_for_every_item():
+    """Проверяет, что ошибка пакетного вызова получают все элементы пакета."""
+
+    # Arrange
+    async def send_batch(items: list[int]) -> list[int]:
+        raise ConnectionError("boom")
+
+    batcher = MicroBatcher(send_batch, max_size=100, window=0)
+
+    # Act
+    results = await asyncio.gather(*(batcher.submit(item) for item in range(3)), return_exceptions=True)
+
+    # Assert
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_item_is_not_sent():
+    """Проверяет, что элемент, отменённый до отправки пакета, в пакет не попадает."""
+    # Arrange
+    batches = []
+
+    async def send_batch(items: list[int]) -> list[int]:
+        batches.append(items)
+        return items
+
+    batcher = MicroBatcher(send_batch, max_size=100, window=0.01)
+    cancelled = asyncio.create_task(batcher.submit(1))
+    kept = asyncio.create_task(batcher.submit(2))
+    await asyncio.sleep(0)
+
+    # Act
+    cancelled.cancel()
+    result = await kept
+
+    # Assert
+    assert result == 2
+    assert batches == [[2]]
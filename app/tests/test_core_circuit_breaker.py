@@ -0,0 +1,111 @@
+import pytest
+
+from core.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+
+
+class FakeClock:
+    """Управляемый источник времени."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(
+        window=10,
+        min_calls=4,
+        failure_rate=0.5,
+        slow_call_duration=1.0,
+        slow_call_rate=0.75,
+        open_duration=5.0,
+        half_open_calls=2,
+        clock=clock,
+    )
+
+
+def test_opens_on_failure_rate(breaker):
+    """Проверяет размыкание при достижении доли ошибок."""
+    # Act
+    breaker.record_success(0.1)
+    breaker.record_failure()
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitState.closed
+    breaker.record_failure()
+
+    # Assert
+    assert breaker.state == CircuitState.open
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_opens_on_slow_call_rate(breaker):
+    """Проверяет размыкание при большой доле медленных вызовов."""
+    # Act
+    for _ in range(3):
+        breaker.record_success(2.0)
+    breaker.record_success(0.1)
+
+    # Assert
+    assert breaker.state == CircuitState.open
+
+
+def test_half_open_closes_after_successful_probes(breaker, clock):
+    """Проверяет переход в `half_open` по таймеру и замыкание после успешных пробных вызовов."""
+    # Arrange
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now = 5.0
+
+    # Act
+    breaker.allow()
+    breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+
+    # Assert
+    assert breaker.state == CircuitState.closed
+
+
+def test_half_open_reopens_on_failure(breaker, clock):
+    """Проверяет повторное размыкание при ошибке пробного вызова."""
+    # Arrange
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now = 5.0
+    breaker.allow()
+
+    # Act
+    breaker.record_failure()
+
+    # Assert
+    assert breaker.state == CircuitState.open
+    clock.now = 9.0
+    assert breaker.state == CircuitState.open
+
+
+def test_cancelled_probe_releases_slot(breaker, clock):
+    """Проверяет освобождение слота отменённого пробного вызова."""
+    # Arrange
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now = 5.0
+    breaker.allow()
+    breaker.allow()
+
+    # Act
+    breaker.record_cancelled()
+
+    # Assert
+    breaker.allow()
@@ -0,0 +1,243 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core.database import Database, ReadYourWritesMiddleware
+
+
+def make_pool(name: str = "primary", in_use: int = 3):
+    """Создаёт подменённый пул, соединение которого возвращает `name`."""
+    conn = AsyncMock()
+    conn.fetchrow.return_value = {"value": 1}
+    conn.fetchval.return_value = name
+
+    @asynccontextmanager
+    async def acquire(timeout=None):
+        yield conn
+
+    pool = MagicMock()
+    pool.acquire = acquire
+    pool.conn = conn
+    pool.get_size.return_value = 10
+    pool.get_idle_size.return_value = 10 - in_use
+    pool.get_max_size.return_value = 20
+    return pool
+
+
+@pytest.fixture
+def database():
+    """Экземпляр `Database` с подменённым пулом соединений."""
+    instance = Database()
+    instance.pool = make_pool()
+    return instance
+
+
+@pytest.fixture
+def replicated():
+    """Экземпляр `Database` с основным пулом и двумя репликами."""
+    instance = Database()
+    instance.pool = make_pool()
+    instance.replicas = [make_pool("replica1", in_use=5), make_pool("replica2", in_use=1)]
+    instance.replica_healthy = [True, True]
+    return instance
+
+
+async def read(database: Database) -> str:
+    """Выполняет чтение и возвращает название пула, на котором оно выполнилось."""
+    return await database._run("fetchval", True, lambda conn: conn.fetchval("SELECT 1"))
+
+
+@pytest.mark.asyncio
+async def test_queries_are_recorded_in_metrics(database):
+    """Проверяет учёт времени ожидания соединения и задержек запросов."""
+    # Act
+    await database.fetchrow("SELECT 1")
+    await database.fetchrow("SELECT 1")
+    await database.execute("SELECT 1")
+
+    # Assert
+    stats = database.stats()
+    assert stats["acquire_wait"]["count"] == 3
+    assert stats["queries"]["fetchrow"]["count"] == 2
+    assert stats["queries"]["execute"]["count"] == 1
+    assert database.metrics.queries_total == 3
+
+
+def test_pool_usage_stats(database):
+    """Проверяет вывод занятых и свободных соединений пула."""
+    # Act
+    stats = database.stats()
+
+    # Assert
+    assert (stats["pool_size"], stats["pool_idle"], stats["pool_in_use"], stats["pool_max_size"]) == (10, 7, 3, 20)
+
+
+@pytest.mark.asyncio
+async def test_reads_are_distributed_over_replicas(replicated):
+    """Проверяет распределение чтений по репликам по кругу, а записей — на основной сервер."""
+    # Act
+    targets = [await read(replicated) for _ in range(4)]
+
+    # Assert
+    assert targets == ["replica1", "replica2", "replica1", "replica2"]
+    assert await replicated.fetch("SELECT 1") is replicated.pool.conn.fetch.return_value
+
+
+@pytest.mark.asyncio
+async def test_least_loaded_strategy_picks_replica_with_fewest_connections_in_use(replicated):
+    """Проверяет выбор наименее загруженной реплики."""
+    # Arrange
+    replicated.read_strategy = "least_loaded"
+
+    # Act & Assert
+    assert await read(replicated) == "replica2"
+
+
+@pytest.mark.asyncio
+async def test_reads_after_write_go_to_primary(replicated):
+    """Проверяет режим read-your-writes: после записи чтения выполняются на основном сервере."""
+    # Act
+    await replicated.execute("INSERT INTO queries DEFAULT VALUES")
+
+    # Assert
+    assert await read(replicated) == "primary"
+    replicated.read_your_writes = False
+    assert await read(replicated) == "replica1"
+
+
+@pytest.mark.asyncio
+async def test_untracked_writes_keep_reads_on_replicas(replicated):
+    """Проверяет, что фоновые и служебные записи с `track=False` не переключают чтения на основной сервер."""
+    # Act
+    await replicated.execute("UPDATE queries SET status = 'failed'", track=False)
+    await replicated.fetchrow("SELECT * FROM rate_limit_take($1, $2, $3, $4)", "api:query", 1, 1, 1, track=False)
+
+    # Assert
+    assert await read(replicated) == "replica1"
+
+
+@pytest.mark.asyncio
+async def test_read_your_writes_is_scoped_to_request(replicated):
+    """Проверяет, что запись в одном HTTP-запросе не направляет на основной сервер чтения следующих запросов."""
+    # Arrange
+    targets = []
+
+    async def app(scope, receive, send):
+        if scope["path"] == "/write":
+            await replicated.execute("INSERT INTO queries DEFAULT VALUES")
+        targets.append(await read(replicated))
+
+    middleware = ReadYourWritesMiddleware(app)
+
+    # Act
+    await middleware({"type": "http", "path": "/write"}, None, None)
+    await middleware({"type": "http", "path": "/read"}, None, None)
+
+    # Assert
+    assert targets == ["primary", "replica1"]
+
+
+@pytest.mark.asyncio
+async def test_unavailable_replica_falls_back_to_primary(replicated):
+    """Проверяет повтор чтения на основном сервере и исключение недоступной реплики."""
+    # Arrange
+    replicated.replicas[0].conn.fetchval.side_effect = ConnectionRefusedError()
+
+    # Act & Assert
+    assert await read(replicated) == "primary"
+    assert replicated.replica_healthy == [False, True]
+    assert [await read(replicated) for _ in range(2)] == ["replica2", "replica2"]
+
+
+@pytest.mark.asyncio
+async def test_all_replicas_unhealthy_reads_from_primary(replicated):
+    """Проверяет чтение с основного сервера, когда все реплики недоступны."""
+    # Arrange
+    replicated.replica_healthy = [False, False]
+
+    # Act & Assert
+    assert await read(replicated) == "primary"
+    assert [replica["healthy"] for replica in replicated.stats()["replicas"]] == [False, False]
+
+
+@pytest.mark.asyncio
+async def test_unavailable_replica_at_startup_is_retried(monkeypatch):
+    """Проверяет запуск при недоступной реплике и создание её пула при следующей проверке."""
+    # Arrange
+    primary, replica = make_pool(), make_pool("replica1")
+    primary.close = replica.close = AsyncMock()
+    attempts = {"replica": 0}
+
+    async def create_pool(dsn, **kwargs):
+        if dsn == "primary":
+            return primary
+        attempts["replica"] += 1
+        if attempts["replica"] == 1:
+            raise ConnectionRefusedError()
+        return replica
+
+    monkeypatch.setattr("core.database.asyncpg.create_pool", create_pool)
+    database = Database()
+
+    # Act
+    await database.connect("primary", replica_dsns=["replica"], health_check_interval=0.01)
+    started = (list(database.replicas), list(database.replica_healthy), await read(database))
+    await asyncio.sleep(0.05)
+    await database.disconnect()
+
+    # Assert
+    assert started == ([None], [False], "primary")
+    assert database.replicas == [replica]
+    assert database.replica_healthy == [True]
+
+
+@pytest.mark.asyncio
+async def test_replica_query_timeout_is_not_retried_on_primary(replicated):
+    """Проверяет, что таймаут запроса на реплике не исключает её и не повторяет запрос на основном сервере."""
+    # Arrange
+    replicated.replicas[0].conn.fetchval.side_effect = asyncio.TimeoutError()
+
+    # Act & Assert
+    with pytest.raises(asyncio.TimeoutError):
+        await read(replicated)
+    assert replicated.replica_healthy == [True, True]
+    replicated.pool.conn.fetchval.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_iterate_falls_back_to_primary(replicated):
+    """Проверяет повтор потокового чтения на основном сервере, если реплика недоступна до первой порции."""
+    # Arrange
+    cursor = AsyncMock()
+    cursor.fetch.side_effect = [["row"], []]
+    primary = replicated.pool.conn
+    primary.transaction = MagicMock(return_value=AsyncMock())
+    primary.cursor.return_value = cursor
+    replicated.replicas[0].conn.transaction = MagicMock(side_effect=ConnectionRefusedError())
+
+    # Act
+    chunks = [rows async for rows in replicated.iterate("SELECT 1", read_only=True)]
+
+    # Assert
+    assert chunks == [["row"]]
+    assert replicated.replica_healthy == [False, True]
+
+
+@pytest.mark.asyncio
+async def test_sessions_use_utc_timezone(monkeypatch):
+    """Проверяет, что соединения основного сервера и реплик открываются с TimeZone UTC."""
+    # Arrange
+    pool = make_pool()
+    pool.close = AsyncMock()
+    create_pool = AsyncMock(return_value=pool)
+    monkeypatch.setattr("core.database.asyncpg.create_pool", create_pool)
+    database = Database()
+
+    # Act
+    await database.connect("primary", replica_dsns=["replica"], health_check_interval=60)
+    await database.disconnect()
+
+    # Assert
+    assert [call.kwargs["server_settings"] for call in create_pool.await_args_list] == [{"timezone": "UTC"}] * 2
@@ -0,0 +1,116 @@
+import pytest
+
+from core.metrics import Histogram, LatencyWindow, MetricsRegistry, render_histogram
+
+
+def test_histogram_counts_observations():
+    """Проверяет распределение наблюдений по корзинам."""
+    # Arrange
+    histogram = Histogram(buckets=(0.1, 1.0))
+
+    # Act
+    for value in (0.05, 0.5, 0.7, 5.0):
+        histogram.observe(value)
+
+    # Assert
+    assert histogram.counts == [1, 2, 1]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(6.25)
+
+
+def test_histogram_quantile_interpolates_within_bucket():
+    """Проверяет оценку квантиля по корзинам."""
+    # Arrange
+    histogram = Histogram(buckets=(1.0, 2.0))
+    for _ in range(10):
+        histogram.observe(1.5)
+
+    # Act & Assert
+    assert histogram.quantile(0.5) == pytest.approx(1.5)
+    assert histogram.quantile(1.0) == pytest.approx(2.0)
+    assert Histogram().quantile(0.99) is None
+
+
+def test_latency_window_keeps_only_recent_values():
+    """Проверяет, что квантили окна считаются по последним наблюдениям."""
+    # Arrange
+    window = LatencyWindow(size=10, refresh_every=1)
+
+    # Act
+    for value in range(100):
+        window.observe(float(value))
+
+    # Assert
+    assert len(window) == 10
+    assert window.quantile(0.0) == 90.0
+    assert window.quantile(0.99) == 99.0
+
+
+def test_span_records_duration_and_errors():
+    """Проверяет учёт длительности span'ов и span'ов, завершившихся исключением."""
+    # Arrange
+    registry = MetricsRegistry()
+    registry.configure(enabled=True)
+
+    # Act
+    with registry.span("db.fetch"):
+        pass
+    with pytest.raises(RuntimeError):
+        with registry.span("db.fetch"):
+            raise RuntimeError
+
+    # Assert
+    assert registry.spans["db.fetch"].count == 2
+    assert registry.span_errors == {"db.fetch": 1}
+
+
+def test_disabled_registry_collects_nothing():
+    """Проверяет, что выключенный реестр не создаёт span'ов и не увеличивает счётчики."""
+    # Arrange
+    registry = MetricsRegistry()
+    registry.configure(enabled=False)
+
+    # Act
+    with registry.span("db.fetch"):
+        registry.inc("external_requests", outcome="true")
+
+    # Assert
+    assert registry.spans == {}
+    assert registry.counters == {}
+
+
+def test_render_prometheus_text_format():
+    """Проверяет вывод гистограмм и счётчиков в текстовом формате Prometheus."""
+    # Arrange
+    registry = MetricsRegistry()
+    registry.configure(enabled=True)
+    registry.observe_request("GET", "/query/{query_id}", 200, 0.02)
+    registry.inc("external_requests", outcome="unavailable")
+    registry.inc("external_requests", outcome="unavailable")
+
+    # Act
+    text = registry.render()
+
+    # Assert
+    assert 'http_request_duration_seconds_count{method="GET",route="/query/{query_id}",status="200"} 1' in text
+    assert 'external_requests_total{outcome="unavailable"} 2' in text
+    assert "# TYPE external_requests_total counter" in text
+
+
+def test_render_histogram_buckets_are_cumulative():
+    """Проверяет накопленные счётчики корзин и корзину +Inf."""
+    # Arrange
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+
+    # Act
+    lines = render_histogram("latency_seconds", [("span", 'a"b')], histogram)
+
+    # Assert
+    assert lines[:3] == [
+        'latency_seconds_bucket{span="a\\"b",le="0.1"} 1',
+        'latency_seconds_bucket{span="a\\"b",le="1.0"} 2',
+        'latency_seconds_bucket{span="a\\"b",le="+Inf"} 3',
+    ]
+    assert lines[-1] == 'latency_seconds_count{span="a\\"b"} 3'
@@ -0,0 +1,236 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from core.rate_limit import (
+    CallLimiter,
+    InMemoryKeyedRateLimiter,
+    LocalTokenSource,
+    PostgresKeyedRateLimiter,
+    PostgresTokenSource,
+    RateLimitExceeded,
+    RateLimitPolicy,
+    TokenBucket,
+)
+
+
+class FakeClock:
+    """Управляемый источник времени."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_queues_reservations():
+    """Проверяет выдачу запаса токенов и резервирование следующих по очереди."""
+    # Arrange
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=2, clock=clock)
+
+    # Act & Assert
+    assert bucket.reserve(max_wait=0) == 0
+    assert bucket.reserve(max_wait=0) == 0
+    assert bucket.reserve(max_wait=0) is None
+    assert bucket.reserve(max_wait=1) == pytest.approx(0.1)
+    assert bucket.reserve(max_wait=1) == pytest.approx(0.2)
+    clock.now = 10
+    assert bucket.reserve(max_wait=0) == 0
+
+
+@pytest.mark.asyncio
+async def test_local_source_rejects_when_wait_exceeds_deadline():
+    """Проверяет отказ, если токен не накопится за отведённое время."""
+    # Arrange
+    source = LocalTokenSource(rate=1, burst=1)
+
+    # Act & Assert
+    assert await source.take(max_wait=0)
+    assert not await source.take(max_wait=0.5)
+
+
+@pytest.mark.asyncio
+async def test_limiter_caps_concurrency_and_reports_queue():
+    """Проверяет ограничение одновременных вызовов, очередь и отказ по истечении ожидания."""
+    # Arrange
+    limiter = CallLimiter(tokens=None, concurrency=1)
+    release = asyncio.Event()
+
+    async def hold():
+        async with limiter.slot(max_wait=1):
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+
+    # Act & Assert
+    assert limiter.stats()["in_flight"] == 1
+    assert limiter.stats()["waiting"] == 1
+    with pytest.raises(RateLimitExceeded):
+        async with limiter.slot(max_wait=0.01):
+            pass
+    release.set()
+    await asyncio.gather(holder, waiter)
+    assert limiter.stats()["max_waiting"] == 2
+    assert limiter.stats()["rejected"] == 1
+    assert limiter.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_postgres_source_leases_tokens_in_batches():
+    """Проверяет, что токены забираются из общего ведра партиями, а не на каждый вызов."""
+    # Arrange
+    mock_db = AsyncMock()
+    mock_db.fetchrow.return_value = {"granted": 3, "available": 0.0}
+    source = PostgresTokenSource(mock_db, key="external_service", rate=10, burst=10, lease=3)
+
+    # Act
+    taken = [await source.take(max_wait=0) for _ in range(4)]
+
+    # Assert
+    assert taken == [True] * 4
+    assert mock_db.fetchrow.await_count == 2
+    assert mock_db.fetchrow.await_args.args[1:] == ("external_service", 10, 10, 3)
+
+
+@pytest.mark.asyncio
+async def test_postgres_source_waits_for_refill_or_rejects():
+    """Проверяет отказ, если общее ведро не пополнится за отведённое время."""
+    # Arrange
+    mock_db = AsyncMock()
+    mock_db.fetchrow.return_value = {"granted": 0, "available": -5.0}
+    source = PostgresTokenSource(mock_db, key="external_service", rate=1, burst=1, lease=1)
+
+    # Act & Assert
+    assert not await source.take(max_wait=0.1)
+
+
+@pytest.mark.asyncio
+async def test_postgres_source_falls_back_to_local_bucket():
+    """Проверяет использование локального ведра при недоступной БД."""
+    # Arrange
+    mock_db = AsyncMock()
+    mock_db.fetchrow.side_effect = ConnectionRefusedError()
+    source = PostgresTokenSource(mock_db, key="external_service", rate=1, burst=1, lease=1)
+
+    # Act & Assert
+    assert await source.take(max_wait=0)
+    assert not await source.take(max_wait=0)
+
+
+def test_rate_limit_policy_parse():
+    """Проверяет разбор лимита из строки и отказ для неверных значений."""
+    # Act & Assert
+    assert RateLimitPolicy.parse("100/60") == RateLimitPolicy(limit=100, window=60.0)
+    assert RateLimitPolicy.parse("5") == RateLimitPolicy(limit=5, window=1.0)
+    with pytest.raises(ValueError):
+        RateLimitPolicy.parse("0/60")
+    with pytest.raises(ValueError):
+        RateLimitPolicy.parse("ten/60")
+
+
+@pytest.mark.asyncio
+async def test_in_memory_keyed_limiter_denies_over_limit():
+    """Проверяет лимит по ключу, заголовки RateLimit-* и независимость ключей."""
+    # Arrange
+    limiter = InMemoryKeyedRateLimiter(maxsize=100)
+    policy = RateLimitPolicy(limit=2, window=60)
+
+    # Act
+    decisions = [await limiter.hit("query:1", policy) for _ in range(3)]
+    other = await limiter.hit("query:2", policy)
+
+    # Assert
+    assert [decision.allowed for decision in decisions] == [True, True, False]
+    assert decisions[0].headers()["RateLimit-Remaining"] == "1"
+    assert decisions[0].headers()["RateLimit-Policy"] == "2;w=60"
+    denied = decisions[2].headers()
+    assert denied["RateLimit-Remaining"] == "0"
+    assert denied["Retry-After"] == "30"
+    assert "Retry-After" not in decisions[1].headers()
+    assert other.allowed
+
+
+@pytest.mark.asyncio
+async def test_postgres_keyed_limiter_leases_tokens():
+    """Проверяет, что токены берутся из общего ведра партиями и дозапрашиваются заранее."""
+    # Arrange
+    mock_db = AsyncMock()
+    mock_db.fetchrow.return_value = {"granted": 4, "available": 6.0}
+    limiter = PostgresKeyedRateLimiter(mock_db, lease=4, maxsize=100)
+    policy = RateLimitPolicy(limit=10, window=10)
+
+    # Act
+    first = await limiter.hit("history:1", policy)
+    second = await limiter.hit("history:1", policy)
+    await asyncio.sleep(0)
+    third = await limiter.hit("history:1", policy)
+
+    # Assert
+    assert first.allowed and second.allowed and third.allowed
+    assert first.remaining == 9
+    assert mock_db.fetchrow.await_count == 2
+    assert mock_db.fetchrow.await_args.args[1:] == ("api:history:1", 1.0, 10.0, 4)
+
+
+@pytest.mark.asyncio
+async def test_postgres_keyed_limiter_denies_when_bucket_empty():
+    """Проверяет отказ, если общее ведро пусто."""
+    # Arrange
+    mock_db = AsyncMock()
+    mock_db.fetchrow.return_value = {"granted": 0, "available": 0.5}
+    limiter = PostgresKeyedRateLimiter(mock_db, lease=4, maxsize=100)
+
+    # Act
+    decision = await limiter.hit("history:1", RateLimitPolicy(limit=10, window=10))
+
+    # Assert
+    assert not decision.allowed
+    assert decision.headers()["Retry-After"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_postgres_keyed_limiter_rejects_locally_until_bucket_refills():
+    """Проверяет, что при пустом общем ведре повторные запросы отклоняются без обращения к БД."""
+    # Arrange
+    clock = FakeClock()
+    mock_db = AsyncMock()
+    mock_db.fetchrow.return_value = {"granted": 0, "available": 0.5}
+    limiter = PostgresKeyedRateLimiter(mock_db, lease=4, maxsize=100, clock=clock)
+    policy = RateLimitPolicy(limit=10, window=10)
+
+    # Act
+    decisions = [await limiter.hit("history:1", policy) for _ in range(5)]
+    clock.now = 0.4
+    throttled = await limiter.hit("history:1", policy)
+    clock.now = 0.5
+    mock_db.fetchrow.return_value = {"granted": 1, "available": 0.0}
+    refilled = await limiter.hit("history:1", policy)
+
+    # Assert
+    assert not any(decision.allowed for decision in decisions)
+    assert not throttled.allowed
+    assert throttled.retry_after == pytest.approx(0.1)
+    assert refilled.allowed
+    assert mock_db.fetchrow.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_postgres_keyed_limiter_falls_back_to_memory():
+    """Проверяет использование лимитов в памяти при недоступной БД."""
+    # Arrange
+    mock_db = AsyncMock()
+    mock_db.fetchrow.side_effect = ConnectionRefusedError()
+    limiter = PostgresKeyedRateLimiter(mock_db, lease=4, maxsize=100)
+    policy = RateLimitPolicy(limit=1, window=60)
+
+    # Act
+    decisions = [await limiter.hit("query:1", policy) for _ in range(2)]
+
+    # Assert
+    assert [decision.allowed for decision in decisions] == [True, False]
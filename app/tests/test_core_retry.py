@@ -0,0 +1,32 @@
+import random
+
+from core.retry import RetryBudget, backoff_delay
+
+
+def test_backoff_delay_grows_and_is_capped():
+    """Проверяет экспоненциальный рост верхней границы паузы и её ограничение."""
+    # Arrange
+    rng = random.Random(0)
+
+    # Act
+    delays = [backoff_delay(attempt, base=0.1, cap=0.5, rng=rng) for attempt in range(10) for _ in range(50)]
+
+    # Assert
+    assert all(0 <= delay <= 0.5 for delay in delays)
+    assert max(delays[:50]) <= 0.1
+
+
+def test_retry_budget_limits_extra_calls():
+    """Проверяет, что дополнительные вызовы не превышают доли исходных вызовов плюс запас."""
+    # Arrange
+    budget = RetryBudget(ratio=0.1, burst=2)
+
+    # Act
+    allowed = 0
+    for _ in range(100):
+        budget.deposit()
+        allowed += budget.withdraw()
+
+    # Assert
+    assert allowed <= 2 + 100 * 0.1
+    assert not budget.withdraw()
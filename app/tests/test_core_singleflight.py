@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from core.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    """Проверяет, что одновременные вызовы с одним ключом выполняются один раз."""
+    # Arrange
+    flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def fn():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return True
+
+    # Act
+    tasks = [asyncio.create_task(flight.do("key", fn)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    # Assert
+    assert results == [True, True, True]
+    assert calls == 1
+    assert flight.coalesced == 2
+    assert flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_exception_is_propagated_to_all_waiters():
+    """Проверяет, что исключение общего вызова получают все ожидающие."""
+    # Arrange
+    flight = SingleFlight()
+
+    async def fn():
+        await asyncio.sleep(0)
+        raise RuntimeError("upstream failed")
+
+    # Act
+    results = await asyncio.gather(flight.do("key", fn), flight.do("key", fn), return_exceptions=True)
+
+    # Assert
+    assert all(isinstance(res, RuntimeError) for res in results)
+    assert flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    """Проверяет, что отмена одного ожидающего не прерывает вызов для остальных."""
+    # Arrange
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def fn():
+        await release.wait()
+        return False
+
+    first = asyncio.create_task(flight.do("key", fn))
+    second = asyncio.create_task(flight.do("key", fn))
+    await asyncio.sleep(0)
+
+    # Act
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    # Assert
+    assert await second is False
+    assert first.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_shared_call_is_cancelled_when_nobody_waits():
+    """Проверяет отмену общего вызова, когда его перестают ждать все вызывающие."""
+    # Arrange
+    flight = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def fn():
+        started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    task = asyncio.create_task(flight.do("key", fn))
+    await started.wait()
+
+    # Act
+    task.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+    # Assert
+    assert flight.in_flight == 0
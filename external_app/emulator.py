@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import itertools
+import math
+import os
+import random
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Iterator, Literal, get_args
+
+LatencyModel = Literal["fixed", "uniform", "lognormal", "trace"]
+
+
+@dataclass(frozen=True)
+class EmulatorSettings:
+    """Настройки эмулятора из переменных окружения `EMULATOR_*`."""
+
+    latency_model: LatencyModel = "uniform"
+    latency: float = 0.05  # задержка для `fixed` и медиана для `lognormal`
+    latency_low: float = 1.0
+    latency_high: float = 3.0
+    latency_sigma: float = 0.5
+    trace_path: Path | None = None  # файл с задержками в секундах, по одной на строку
+    seed: int | None = None
+    positive_rate: float = 0.8
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    timeout_delay: float = 60.0
+    batch_max_size: int = 1000
+
+    @classmethod
+    def from_env(cls) -> "EmulatorSettings":
+        """Читает настройки из переменных окружения.
+
+        Returns:
+            Настройки эмулятора (значения по умолчанию для незаданных переменных).
+        """
+        env = os.environ
+        defaults = cls()
+        return cls(
+            latency_model=env.get("EMULATOR_LATENCY_MODEL", defaults.latency_model),
+            latency=float(env.get("EMULATOR_LATENCY", defaults.latency)),
+            latency_low=float(env.get("EMULATOR_LATENCY_LOW", defaults.latency_low)),
+            latency_high=float(env.get("EMULATOR_LATENCY_HIGH", defaults.latency_high)),
+            latency_sigma=float(env.get("EMULATOR_LATENCY_SIGMA", defaults.latency_sigma)),
+            trace_path=Path(env["EMULATOR_TRACE_PATH"]) if env.get("EMULATOR_TRACE_PATH") else None,
+            seed=int(env["EMULATOR_SEED"]) if env.get("EMULATOR_SEED") else None,
+            positive_rate=float(env.get("EMULATOR_POSITIVE_RATE", defaults.positive_rate)),
+            error_rate=float(env.get("EMULATOR_ERROR_RATE", defaults.error_rate)),
+            timeout_rate=float(env.get("EMULATOR_TIMEOUT_RATE", defaults.timeout_rate)),
+            timeout_delay=float(env.get("EMULATOR_TIMEOUT_DELAY", defaults.timeout_delay)),
+            batch_max_size=int(env.get("EMULATOR_BATCH_MAX_SIZE", defaults.batch_max_size)),
+        )
+
+
+def load_trace(path: Path) -> list[float]:
+    """Читает записанные задержки ответов.
+
+    Args:
+        path: Файл с задержками в секундах, по одной на строку (пустые строки и `#`-комментарии пропускаются).
+
+    Returns:
+        Список задержек.
+
+    Raises:
+        ValueError: Если файл не содержит ни одной задержки.
+    """
+    delays = [float(line) for raw_line in path.read_text().splitlines() if (line := raw_line.split("#", 1)[0].strip())]
+    if not delays:
+        raise ValueError(f"Latency trace {path} is empty")
+    return delays
+
+
+def cadastral_result(cadastral_number: str, positive_rate: float) -> bool:
+    """Возвращает детерминированный ответ для кадастрового номера.
+
+    Args:
+        cadastral_number: Кадастровый номер.
+        positive_rate: Доля номеров с положительным ответом.
+
+    Returns:
+        Один и тот же результат для одного и того же номера при любом зерне.
+    """
+    digest = hashlib.blake2b(cadastral_number.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64 < positive_rate
+
+
+class Outcome(str, Enum):
+    """Исход обращения к эмулятору."""
+
+    ok = "ok"
+    error = "error"
+    timeout = "timeout"
+
+
+class Emulator:
+    """Эмулятор внешнего сервиса: задержки, ответы и внедряемые ошибки."""
+
+    def __init__(self, settings: EmulatorSettings) -> None:
+        """Инициализирует эмулятор.
+
+        Args:
+            settings: Настройки эмулятора.
+
+        Raises:
+            ValueError: Если модель задержек неизвестна или для `trace` не задан файл.
+        """
+        if settings.latency_model not in get_args(LatencyModel):
+            raise ValueError(f"Unknown latency model: {settings.latency_model!r}")
+        self.settings = settings
+        self.rng = random.Random(settings.seed)
+        self._trace: Iterator[float] | None = None
+        if settings.latency_model == "trace":
+            if settings.trace_path is None:
+                raise ValueError("EMULATOR_TRACE_PATH is required for the trace latency model")
+            # Задержки воспроизводятся по кругу в записанном порядке
+            self._trace = itertools.cycle(load_trace(settings.trace_path))
+
+    def sample_latency(self) -> float:
+        """Возвращает задержку следующего ответа.
+
+        Returns:
+            Задержка в секундах.
+        """
+        settings = self.settings
+        if self._trace is not None:
+            return next(self._trace)
+        if settings.latency_model == "uniform":
+            return self.rng.uniform(settings.latency_low, settings.latency_high)
+        if settings.latency_model == "lognormal":
+            return self.rng.lognormvariate(math.log(settings.latency), settings.latency_sigma)
+        return settings.latency
+
+    async def respond(self) -> Outcome:
+        """Выдерживает задержку ответа и определяет исход обращения.
+
+        Returns:
+            `ok`, `error` (ответить ошибкой) или `timeout` (сервис «завис» на `timeout_delay` секунд).
+        """
+        roll = self.rng.random()
+        if roll < self.settings.timeout_rate:
+            await asyncio.sleep(self.settings.timeout_delay)
+            return Outcome.timeout
+        delay = self.sample_latency()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if roll < self.settings.timeout_rate + self.settings.error_rate:
+            return Outcome.error
+        return Outcome.ok
+
+    def result(self, cadastral_number: str) -> bool:
+        """Возвращает детерминированный ответ для кадастрового номера.
+
+        Args:
+            cadastral_number: Кадастровый номер.
+
+        Returns:
+            Результат проверки.
+        """
+        return cadastral_result(cadastral_number, self.settings.positive_rate)
@@ -1,16 +1,56 @@
-import asyncio
-import random
 from typing import Annotated
 
-from fastapi import Body, FastAPI
+from fastapi import Body, FastAPI, HTTPException, status
 
-from schemas import QueryRequestDTO
+from emulator import Emulator, EmulatorSettings, Outcome
+from schemas import QueryBatchRequestDTO, QueryBatchResultDTO, QueryRequestDTO
 
 app = FastAPI(title="External App")
 
+settings = EmulatorSettings.from_env()
+emulator = Emulator(settings)
 
-@app.post("/result", summary="Эмуляция обработки запроса внешним сервером")
-async def get_result(_info_to_check: Annotated[QueryRequestDTO, Body(...)]) -> dict[str, bool]:
-    await asyncio.sleep(random.randint(1, 3))
-    # await asyncio.sleep(random.randint(1, 60))
-    return {"result": bool(random.randrange(0, 5))}  # False с вероятностью 20%
+
+async def respond_or_fail() -> None:
+    """Выдерживает задержку ответа и выбрасывает внедрённую ошибку, если она выпала.
+
+    Raises:
+        HTTPException: `503` при внедрённой ошибке, `504` после внедрённого «зависания».
+    """
+    outcome = await emulator.respond()
+    if outcome == Outcome.error:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Injected error")
+    if outcome == Outcome.timeout:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Injected timeout")
+
+
+@app.post(
+    "/result",
+    summary="Эмуляция обработки запроса внешним сервером",
+    description=(
+        "Возвращает детерминированный результат для кадастрового номера после задержки "
+        "из настроенной модели (`EMULATOR_LATENCY_MODEL`: fixed, uniform, lognormal, trace).\n\n"
+        "- С вероятностью `EMULATOR_ERROR_RATE` отвечает `503`.\n"
+        "- С вероятностью `EMULATOR_TIMEOUT_RATE` не отвечает `EMULATOR_TIMEOUT_DELAY` секунд, затем отвечает `504`."
+    ),
+)
+async def get_result(info_to_check: Annotated[QueryRequestDTO, Body(...)]) -> dict[str, bool]:
+    await respond_or_fail()
+    return {"result": emulator.result(info_to_check.cadastral_number)}
+
+
+@app.post(
+    "/results",
+    response_model=QueryBatchResultDTO,
+    summary="Эмуляция пакетной обработки запросов внешним сервером",
+    description=(
+        "Обрабатывает пакет запросов за одно обращение: задержка и внедрённые ошибки применяются "
+        "ко всему пакету, результаты возвращаются в порядке элементов запроса.\n\n"
+        "- Размер пакета ограничен `EMULATOR_BATCH_MAX_SIZE`, иначе `413`."
+    ),
+)
+async def get_results(batch: Annotated[QueryBatchRequestDTO, Body(...)]) -> QueryBatchResultDTO:
+    if len(batch.items) > settings.batch_max_size:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Batch is too large")
+    await respond_or_fail()
+    return QueryBatchResultDTO(results=[emulator.result(item.cadastral_number) for item in batch.items])
@@ -5,3 +5,11 @@ class QueryRequestDTO(BaseModel):
     cadastral_number: str = Field(..., json_schema_extra={"example": "77:01:0004012:2041"})
     latitude: float = Field(..., ge=-90, le=90, json_schema_extra={"example": 55.7558})
     longitude: float = Field(..., ge=-180, le=180, json_schema_extra={"example": 37.6173})
+
+
+class QueryBatchRequestDTO(BaseModel):
+    items: list[QueryRequestDTO] = Field(..., min_length=1)
+
+
+class QueryBatchResultDTO(BaseModel):
+    results: list[bool] = Field(...)
@@ -0,0 +1,159 @@
+import math
+
+import httpx
+import pytest
+from fastapi import status
+
+import main
+from emulator import Emulator, EmulatorSettings, Outcome, cadastral_result
+
+NUMBERS = [f"77:01:{i:07d}:10" for i in range(1000)]
+
+
+@pytest.mark.parametrize(
+    "settings, bounds",
+    [
+        (EmulatorSettings(latency_model="fixed", latency=0.2, seed=1), (0.2, 0.2)),
+        (EmulatorSettings(latency_model="uniform", latency_low=0.5, latency_high=1.5, seed=1), (0.5, 1.5)),
+        (EmulatorSettings(latency_model="lognormal", latency=0.1, latency_sigma=0.5, seed=1), (0.0, math.inf)),
+    ],
+    ids=["fixed", "uniform", "lognormal"],
+)
+def test_sample_latency_follows_model(settings, bounds):
+    """Проверяет, что задержки каждой модели лежат в своих пределах."""
+    # Arrange
+    emulator = Emulator(settings)
+
+    # Act
+    delays = [emulator.sample_latency() for _ in range(1000)]
+
+    # Assert
+    assert all(bounds[0] <= delay <= bounds[1] for delay in delays)
+    if settings.latency_model == "lognormal":
+        # Медиана логнормального распределения равна `latency`
+        assert sorted(delays)[len(delays) // 2] == pytest.approx(settings.latency, rel=0.1)
+
+
+def test_trace_is_replayed_in_a_cycle(tmp_path):
+    """Проверяет воспроизведение записанных задержек по кругу с пропуском комментариев."""
+    # Arrange
+    trace_path = tmp_path / "trace.txt"
+    trace_path.write_text("# recorded\n0.1\n\n0.2  # slow\n0.3\n")
+    emulator = Emulator(EmulatorSettings(latency_model="trace", trace_path=trace_path))
+
+    # Act
+    delays = [emulator.sample_latency() for _ in range(5)]
+
+    # Assert
+    assert delays == [0.1, 0.2, 0.3, 0.1, 0.2]
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [EmulatorSettings(latency_model="unknown"), EmulatorSettings(latency_model="trace")],
+    ids=["unknown_model", "trace_without_path"],
+)
+def test_invalid_settings_are_rejected(settings):
+    """Проверяет отказ при неизвестной модели задержек и при `trace` без файла."""
+    # Act & Assert
+    with pytest.raises(ValueError):
+        Emulator(settings)
+
+
+def test_same_seed_gives_same_sequence():
+    """Проверяет, что одинаковое зерно даёт одинаковые задержки и исходы, а другое — другие."""
+
+    # Arrange
+    def sequence(seed: int) -> list[tuple[float, float]]:
+        emulator = Emulator(EmulatorSettings(latency_model="lognormal", seed=seed))
+        return [(emulator.rng.random(), emulator.sample_latency()) for _ in range(100)]
+
+    # Act & Assert
+    assert sequence(42) == sequence(42)
+    assert sequence(42) != sequence(43)
+
+
+def test_cadastral_result_is_stable():
+    """Проверяет, что ответ зависит только от номера и доля положительных ответов соответствует настройке."""
+    # Act
+    results = [cadastral_result(number, 0.8) for number in NUMBERS]
+
+    # Assert
+    assert results == [cadastral_result(number, 0.8) for number in NUMBERS]
+    assert sum(results) / len(results) == pytest.approx(0.8, abs=0.05)
+    assert not any(cadastral_result(number, 0.0) for number in NUMBERS[:10])
+    assert all(cadastral_result(number, 1.0) for number in NUMBERS[:10])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "settings, outcome",
+    [
+        (EmulatorSettings(latency_model="fixed", latency=0), Outcome.ok),
+        (EmulatorSettings(latency_model="fixed", latency=0, error_rate=1.0), Outcome.error),
+        (EmulatorSettings(latency_model="fixed", latency=0, timeout_rate=1.0, timeout_delay=0), Outcome.timeout),
+    ],
+    ids=["ok", "error", "timeout"],
+)
+async def test_respond_injects_outcomes(settings, outcome):
+    """Проверяет внедрение ошибок и «зависаний» с заданной вероятностью."""
+    # Act & Assert
+    assert await Emulator(settings).respond() == outcome
+
+
+@pytest.fixture
+def client_factory(monkeypatch):
+    """Создаёт клиент эмулятора с заданными настройками."""
+
+    def factory(settings: EmulatorSettings) -> httpx.AsyncClient:
+        monkeypatch.setattr(main, "settings", settings)
+        monkeypatch.setattr(main, "emulator", Emulator(settings))
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://external.test")
+
+    return factory
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "settings, status_code",
+    [
+        (EmulatorSettings(latency_model="fixed", latency=0), status.HTTP_200_OK),
+        (EmulatorSettings(latency_model="fixed", latency=0, error_rate=1.0), status.HTTP_503_SERVICE_UNAVAILABLE),
+        (
+            EmulatorSettings(latency_model="fixed", latency=0, timeout_rate=1.0, timeout_delay=0),
+            status.HTTP_504_GATEWAY_TIMEOUT,
+        ),
+    ],
+    ids=["ok", "error", "timeout"],
+)
+async def test_result_endpoint_statuses(client_factory, settings, status_code):
+    """Проверяет ответы `POST /result`: результат, внедрённые `503` и `504`."""
+    # Arrange
+    payload = {"cadastral_number": NUMBERS[0], "latitude": 55.75, "longitude": 37.61}
+    async with client_factory(settings) as client:
+
+        # Act
+        response = await client.post("/result", json=payload)
+
+        # Assert
+        assert response.status_code == status_code
+        if status_code == status.HTTP_200_OK:
+            assert response.json() == {"result": cadastral_result(NUMBERS[0], settings.positive_rate)}
+
+
+@pytest.mark.asyncio
+async def test_results_endpoint_keeps_order_and_limits_size(client_factory):
+    """Проверяет порядок результатов `POST /results` и отказ `413` для слишком большого пакета."""
+    # Arrange
+    settings = EmulatorSettings(latency_model="fixed", latency=0, batch_max_size=3)
+    items = [{"cadastral_number": number, "latitude": 55.75, "longitude": 37.61} for number in NUMBERS[:4]]
+    async with client_factory(settings) as client:
+
+        # Act
+        accepted = await client.post("/results", json={"items": items[:3]})
+        rejected = await client.post("/results", json={"items": items})
+
+        # Assert
+        assert accepted.status_code == status.HTTP_200_OK
+        assert accepted.json() == {"results": [cadastral_result(number, 0.8) for number in NUMBERS[:3]]}
+        assert rejected.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE